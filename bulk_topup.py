@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+批量 CDK 兑换脚本
+
+从清单文件读取 (provider, account, key)，跨账号并发调用 utils.topup.topup 兑换：
+- 每个 provider 有独立的并发上限
+- 每个账号复用同一个 curl_cffi Session
+- 结果写入报告文件，重复运行时跳过已兑换 / 已被使用的 key
+
+清单支持 CSV（表头 provider,account,key）或 JSONL（每行 {"provider", "account", "key"}），
+account 与 ACCOUNTS 中的账号显示名称一致（name 或 "{provider} {序号}"）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+from curl_cffi import requests as curl_requests
+from dotenv import load_dotenv
+
+from utils.aliyun_waf import get_waf_cookies_with_http
+from utils.browser_utils import parse_cookies
+from utils.checkin_http import MAX_RATE_LIMIT_RETRIES, build_topup_headers
+from utils.checkin_runtime import build_common_headers
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.fingerprint_profiles import FINGERPRINT_PROFILES_FILE, FingerprintProfileStore
+from utils.http_utils import proxy_resolve
+from utils.runtime_flags import get_int_env
+from utils.safe_logging import mask_secret
+from utils.topup import topup
+from utils.topup_pipeline import TOPUP_PACING_FILE, AdaptiveTopupPacer
+
+DEFAULT_INVENTORY_FILE = 'bulk_topup.csv'
+DEFAULT_REPORT_FILE = 'bulk_topup_report.json'
+DEFAULT_PROVIDER_CONCURRENCY = 2
+
+# 报告中这些状态的 key 不会再次兑换
+DONE_STATUSES = {'redeemed', 'already_used'}
+
+
+def inventory_key_hash(provider: str, key: str) -> str:
+    """报告中用于标识 key 的哈希（报告不保存明文 key）"""
+    return hashlib.sha256(f'{provider}:{key}'.encode('utf-8')).hexdigest()[:16]
+
+
+def load_inventory(inventory_file: str) -> list[dict]:
+    """读取兑换清单
+
+    Returns:
+        [{"provider": str, "account": str, "key": str}]，已去重
+    """
+    rows: list[dict] = []
+    with open(inventory_file, 'r', encoding='utf-8-sig') as f:
+        if inventory_file.endswith('.jsonl'):
+            raw_rows = []
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    raw_rows.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f'⚠️ Skipping invalid JSON on line {line_no}: {e}')
+        else:
+            raw_rows = list(csv.DictReader(f))
+
+    seen: set[str] = set()
+    for index, raw in enumerate(raw_rows, start=1):
+        provider = str(raw.get('provider') or '').strip()
+        account = str(raw.get('account') or '').strip()
+        key = str(raw.get('key') or '').strip()
+        if not provider or not account or not key:
+            print(f'⚠️ Skipping inventory row {index}: provider, account and key are required')
+            continue
+        key_hash = inventory_key_hash(provider, key)
+        if key_hash in seen:
+            continue
+        seen.add(key_hash)
+        rows.append({'provider': provider, 'account': account, 'key': key})
+    return rows
+
+
+def load_report(report_file: str) -> dict:
+    """加载兑换报告：{key_hash: {...}}"""
+    try:
+        if os.path.exists(report_file):
+            with open(report_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+    except Exception as e:
+        print(f'Warning: Failed to load bulk topup report: {e}')
+    return {}
+
+
+def save_report(report_file: str, report: dict) -> None:
+    """保存兑换报告"""
+    try:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f'Warning: Failed to save bulk topup report: {e}')
+
+
+def resolve_accounts(app_config: AppConfig) -> dict[tuple[str, str], tuple[str, AccountConfig]]:
+    """按 (provider, 账号显示名称) 索引 ACCOUNTS"""
+    accounts = {}
+    for i, account_config in enumerate(app_config.accounts):
+        account_name = account_config.get_display_name(i)
+        accounts[(account_config.provider, account_name)] = (account_name, account_config)
+    return accounts
+
+
+def _record(report: dict, row: dict, status: str, message: str = '') -> None:
+    report[inventory_key_hash(row['provider'], row['key'])] = {
+        'provider': row['provider'],
+        'account': row['account'],
+        'key': mask_secret(row['key']),
+        'status': status,
+        # topup() 的错误信息中带有明文 key
+        'message': message.replace(row['key'], mask_secret(row['key'])),
+        'updated_at': datetime.now().isoformat(),
+    }
+
+
+async def redeem_account_keys(
+    account_name: str,
+    account_config: AccountConfig,
+    provider_config: ProviderConfig,
+    rows: list[dict],
+    semaphore: asyncio.Semaphore,
+    report: dict,
+    report_file: str,
+    pacer: AdaptiveTopupPacer,
+    fingerprint_store: FingerprintProfileStore,
+    global_proxy: dict | None = None,
+) -> None:
+    """顺序兑换单个账号的 key，topup 请求受 provider 并发上限约束
+
+    同一 provider 的所有账号共用 pacer，学习到的充值间隔不会被其他账号覆盖。
+    """
+    cookies = parse_cookies(account_config.cookies)
+    api_user = account_config.api_user
+    if not cookies or not api_user:
+        for row in rows:
+            _record(report, row, 'skipped', 'Account requires cookies and api_user for bulk topup')
+        save_report(report_file, report)
+        print(f'❌ {account_name}: cookies and api_user are required for bulk topup, skipping {len(rows)} key(s)')
+        return
+
+    if global_proxy:
+        account_config.extra['global_proxy'] = global_proxy
+    proxy_config = account_config.proxy or global_proxy
+    http_proxy = proxy_resolve(proxy_config)
+    # 与签到流程使用同一份指纹档案（WAF cookies 与指纹绑定）
+    fingerprint_profile = fingerprint_store.profile(account_name, proxy_config)
+    browser_headers = fingerprint_profile.browser_headers()
+
+    if provider_config.needs_waf_cookies():
+        waf_cookies = await asyncio.to_thread(
+            get_waf_cookies_with_http,
+            account_name,
+            provider_config.get_login_url(),
+            http_proxy,
+            impersonate=fingerprint_profile.impersonate,
+            headers=browser_headers,
+        )
+        if waf_cookies:
+            cookies = {**waf_cookies, **cookies}
+
+    headers = build_topup_headers(provider_config, build_common_headers(account_name, browser_headers), api_user)
+    session = curl_requests.Session(impersonate=fingerprint_profile.impersonate, proxy=http_proxy, timeout=30)
+    try:
+        for index, row in enumerate(rows, start=1):
+            print(f'💰 {account_name}: Redeeming key {index}/{len(rows)}: {mask_secret(row["key"])}')
+            rate_limit_retries = 0
+            while True:
+                await pacer.wait(account_name)
+                async with semaphore:
+                    result = await asyncio.to_thread(
+                        topup,
+                        provider_config=provider_config,
+                        account_config=account_config,
+                        headers=headers,
+                        cookies=cookies,
+                        key=row['key'],
+                        session=session,
+                    )
+                pacer.mark(result)
+                if not result.get('rate_limited') or rate_limit_retries >= MAX_RATE_LIMIT_RETRIES:
+                    break
+                rate_limit_retries += 1
+
+            if result.get('already_used'):
+                _record(report, row, 'already_used', result.get('message', ''))
+            elif result.get('success'):
+                _record(report, row, 'redeemed', result.get('message', ''))
+            else:
+                _record(report, row, 'failed', result.get('error', 'Topup failed'))
+            save_report(report_file, report)
+    finally:
+        session.close()
+
+
+async def run_bulk_topup(
+    rows: list[dict],
+    app_config: AppConfig,
+    report: dict,
+    report_file: str,
+    provider_concurrency: int = DEFAULT_PROVIDER_CONCURRENCY,
+    pacing_state_file: str = os.path.join('storage-states', TOPUP_PACING_FILE),
+    fingerprint_profiles_file: str = os.path.join('storage-states', FINGERPRINT_PROFILES_FILE),
+) -> dict:
+    """执行批量兑换
+
+    Returns:
+        本次运行各状态的数量统计
+    """
+    accounts = resolve_accounts(app_config)
+    pending_by_account: dict[tuple[str, str], list[dict]] = {}
+    counts = {'redeemed': 0, 'already_used': 0, 'failed': 0, 'skipped': 0, 'done_before': 0}
+
+    for row in rows:
+        previous = report.get(inventory_key_hash(row['provider'], row['key']))
+        if previous and previous.get('status') in DONE_STATUSES:
+            counts['done_before'] += 1
+            continue
+
+        provider_config = app_config.get_provider(row['provider'])
+        if not provider_config or not provider_config.topup_path:
+            _record(report, row, 'skipped', f"Provider '{row['provider']}' does not support topup")
+            counts['skipped'] += 1
+            continue
+        if (row['provider'], row['account']) not in accounts:
+            _record(report, row, 'skipped', f"Account '{row['account']}' not found for provider '{row['provider']}'")
+            counts['skipped'] += 1
+            continue
+        pending_by_account.setdefault((row['provider'], row['account']), []).append(row)
+
+    save_report(report_file, report)
+
+    semaphores = {
+        provider: asyncio.Semaphore(max(1, provider_concurrency))
+        for provider, _ in pending_by_account
+    }
+    # 每个 provider 一个 pacer，在该 provider 的所有账号之间共享
+    pacers = {
+        provider: AdaptiveTopupPacer(
+            provider, pacing_state_file, max_interval=app_config.get_provider(provider).topup_interval
+        )
+        for provider in semaphores
+    }
+    fingerprint_store = FingerprintProfileStore(fingerprint_profiles_file)
+    tasks = []
+    for (provider, account), account_rows in pending_by_account.items():
+        account_name, account_config = accounts[(provider, account)]
+        tasks.append(
+            redeem_account_keys(
+                account_name,
+                account_config,
+                app_config.get_provider(provider),
+                account_rows,
+                semaphores[provider],
+                report,
+                report_file,
+                pacers[provider],
+                fingerprint_store,
+                app_config.global_proxy,
+            )
+        )
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f'❌ Bulk topup worker error: {result}')
+
+    for account_rows in pending_by_account.values():
+        for row in account_rows:
+            entry = report.get(inventory_key_hash(row['provider'], row['key'])) or {}
+            status = entry.get('status', 'failed')
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+async def main() -> int:
+    load_dotenv(override=True)
+
+    print('🚀 Bulk CDK topup script started')
+    print(f'🕒 Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+
+    inventory_file = sys.argv[1] if len(sys.argv) > 1 else os.getenv('BULK_TOPUP_FILE', DEFAULT_INVENTORY_FILE)
+    report_file = os.getenv('BULK_TOPUP_REPORT', DEFAULT_REPORT_FILE)
+    provider_concurrency = get_int_env('BULK_TOPUP_CONCURRENCY', DEFAULT_PROVIDER_CONCURRENCY)
+
+    if not await asyncio.to_thread(os.path.exists, inventory_file):
+        print(f'❌ Inventory file not found: {inventory_file}')
+        return 1
+
+    rows = load_inventory(inventory_file)
+    print(f'ℹ️ Loaded {len(rows)} key(s) from {inventory_file}')
+    if not rows:
+        return 1
+
+    app_config = AppConfig.load_from_env()
+    os.makedirs('storage-states', exist_ok=True)
+    report = load_report(report_file)
+    counts = await run_bulk_topup(rows, app_config, report, report_file, provider_concurrency)
+
+    print(
+        f"\n📊 Bulk topup finished: redeemed={counts['redeemed']}, already_used={counts['already_used']}, "
+        f"failed={counts['failed']}, skipped={counts['skipped']}, done_before={counts['done_before']}"
+    )
+    print(f'ℹ️ Report saved to {report_file}')
+    return 0 if counts['failed'] == 0 and counts['skipped'] == 0 else 1
+
+
+def run_main():
+    try:
+        exit_code = asyncio.run(main())
+        sys.exit(exit_code)
+    except KeyboardInterrupt:
+        print('\n⚠️ Program interrupted by user')
+        sys.exit(1)
+    except Exception as e:
+        print(f'\n❌ Error occurred during program execution: {e}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main()
@@ -9,7 +9,11 @@ from urllib.parse import urlencode
 
 from curl_cffi import requests as curl_requests
 
+from utils.aliyun_waf import get_waf_cookies_with_http
 from utils.browser_utils import parse_cookies
+from utils.bypass_stats import BYPASS_STATS_FILE, format_challenge_rate, record_bypass_probe
+from utils.cdk_ledger import CDK_LEDGER_FILE
+from utils.checkin_browser import BrowserSessionBroker
 from utils.checkin_browser import (
     get_aliyun_captcha_cookies_with_browser as browser_get_aliyun_captcha_cookies_with_browser,
 )
@@ -25,6 +29,9 @@ from utils.checkin_browser import (
 from utils.checkin_browser import (
     get_waf_cookies_with_browser as browser_get_waf_cookies_with_browser,
 )
+from utils.checkin_http import (
+    client_id_from_status,
+)
 from utils.checkin_http import (
     execute_check_in as http_execute_check_in,
 )
@@ -40,13 +47,20 @@ from utils.checkin_http import (
 from utils.checkin_http import (
     get_user_info as http_get_user_info,
 )
+from utils.checkin_http import (
+    resolve_provider_status as http_resolve_provider_status,
+)
 from utils.checkin_runtime import build_common_headers
-from utils.config import QUOTA_DIVISOR, AccountConfig, ProviderConfig
+from utils.config import AccountConfig, ProviderConfig
+from utils.fingerprint_profiles import FINGERPRINT_PROFILES_FILE, FingerprintProfileStore
 from utils.get_cf_clearance import get_cf_clearance
 from utils.get_headers import get_curl_cffi_impersonate
 from utils.http_utils import proxy_resolve, response_resolve
+from utils.oauth_browser import OAuthBrowserSession
+from utils.provider_capabilities import PROVIDER_CAPABILITIES_FILE, ProviderCapabilityCache
 from utils.run_models import AccountRunResult, AuthAttemptResult, UserState
 from utils.safe_logging import mask_secret, sanitize_url
+from utils.topup_pipeline import TOPUP_PACING_FILE
 
 
 class CheckIn:
@@ -74,6 +88,8 @@ class CheckIn:
         # 将全局代理存入 account_config.extra，供 get_cdk 和 check_in_status 等函数使用
         if global_proxy:
             self.account_config.extra["global_proxy"] = global_proxy
+        # 带序号的账号名称，未设置 name 的账号在 get_cdk 中据此区分指纹档案
+        self.account_config.extra["account_name"] = account_name
 
         # 代理优先级: 账号配置 > 全局配置
         self.camoufox_proxy_config = account_config.proxy if account_config.proxy else global_proxy
@@ -84,6 +100,21 @@ class CheckIn:
         self.storage_state_dir = storage_state_dir
 
         os.makedirs(self.storage_state_dir, exist_ok=True)
+        self.bypass_stats_path = os.path.join(self.storage_state_dir, BYPASS_STATS_FILE)
+        self.topup_pacing_path = os.path.join(self.storage_state_dir, TOPUP_PACING_FILE)
+        self.cdk_ledger_path = os.path.join(self.storage_state_dir, CDK_LEDGER_FILE)
+        self.capability_cache = ProviderCapabilityCache(
+            os.path.join(self.storage_state_dir, PROVIDER_CAPABILITIES_FILE)
+        )
+        # 按 (账号, 代理) 持久化的浏览器指纹档案，所有浏览器启动与 HTTP 请求共用
+        self.fingerprint_profile = FingerprintProfileStore(
+            os.path.join(self.storage_state_dir, FINGERPRINT_PROFILES_FILE)
+        ).profile(self.account_name, self.camoufox_proxy_config)
+
+        # lazy bypass 状态：是否延迟获取 bypass、命中挑战后获取到的 (bypass_cookies, common_headers)
+        self._defer_bypass = False
+        self._lazy_bypass_upgrade: tuple[dict, dict] | None = None
+        self._challenge_kind: str | None = None
 
     async def get_waf_cookies_with_browser(self) -> dict | None:
         """使用 Camoufox 获取 WAF cookies（隐私模式）"""
@@ -92,6 +123,7 @@ class CheckIn:
             safe_account_name=self.safe_account_name,
             camoufox_proxy_config=self.camoufox_proxy_config,
             provider_config=self.provider_config,
+            fingerprint_profile=self.fingerprint_profile,
         )
 
     async def get_aliyun_captcha_cookies_with_browser(self) -> dict | None:
@@ -101,6 +133,7 @@ class CheckIn:
             safe_account_name=self.safe_account_name,
             camoufox_proxy_config=self.camoufox_proxy_config,
             provider_config=self.provider_config,
+            fingerprint_profile=self.fingerprint_profile,
         )
 
     async def get_status_with_browser(self) -> dict | None:
@@ -113,8 +146,14 @@ class CheckIn:
             safe_account_name=self.safe_account_name,
             camoufox_proxy_config=self.camoufox_proxy_config,
             provider_config=self.provider_config,
+            fingerprint_profile=self.fingerprint_profile,
         )
 
+    @property
+    def quota_divisor(self) -> int | float:
+        """quota 除数，优先使用能力缓存中站点的 quota_per_unit"""
+        return self.capability_cache.get_quota_divisor(self.provider_config.origin)
+
     async def get_auth_client_id(self, session: curl_requests.Session, headers: dict, provider: str) -> dict:
         """获取状态信息
 
@@ -132,6 +171,7 @@ class CheckIn:
             session=session,
             headers=headers,
             provider=provider,
+            capability_cache=self.capability_cache,
         )
 
     async def get_auth_state_with_browser(self) -> dict:
@@ -149,6 +189,7 @@ class CheckIn:
             safe_account_name=self.safe_account_name,
             camoufox_proxy_config=self.camoufox_proxy_config,
             provider_config=self.provider_config,
+            fingerprint_profile=self.fingerprint_profile,
         )
 
     async def get_auth_state(
@@ -182,16 +223,59 @@ class CheckIn:
             safe_account_name=self.safe_account_name,
             camoufox_proxy_config=self.camoufox_proxy_config,
             provider_config=self.provider_config,
-            quota_divisor=QUOTA_DIVISOR,
+            quota_divisor=self.quota_divisor,
+            auth_cookies=auth_cookies,
+            fingerprint_profile=self.fingerprint_profile,
+        )
+
+    def browser_session_broker(self, auth_cookies: list[dict] | None = None) -> BrowserSessionBroker:
+        """创建单页面浏览器会话代理，批量获取 status / auth state / user info"""
+        return BrowserSessionBroker(
+            account_name=self.account_name,
+            safe_account_name=self.safe_account_name,
+            camoufox_proxy_config=self.camoufox_proxy_config,
+            provider_config=self.provider_config,
             auth_cookies=auth_cookies,
+            fingerprint_profile=self.fingerprint_profile,
         )
 
+    def _should_fallback_to_browser(self, result: dict) -> bool:
+        """HTTP 前置请求命中挑战页且 lazy bypass 不会再重试时，改用浏览器兜底"""
+        if not result.get('challenge'):
+            return False
+        return not self._defer_bypass or self._lazy_bypass_upgrade is not None
+
+    async def get_oauth_prerequisites_with_browser(
+        self, provider: str, client_id_result: dict | None = None
+    ) -> tuple[dict, dict]:
+        """HTTP 被拦截时，用一个浏览器页面批量获取 client id 与 auth state
+
+        Args:
+            provider: 提供商类型 (github/linuxdo)
+            client_id_result: 已通过 HTTP 或配置得到的 client id 结果，为空时从 status 中获取
+
+        Returns:
+            (client_id_result, auth_state_result)，与 HTTP 版本的返回结构相同
+        """
+        print(f'ℹ️ {self.account_name}: HTTP blocked, fetching OAuth prerequisites in one browser page')
+        try:
+            async with self.browser_session_broker() as broker:
+                if client_id_result is None:
+                    await broker.prefetch('status', 'auth_state')
+                    client_id_result = client_id_from_status(await broker.get_status(), provider)
+                auth_state_result = await broker.get_auth_state()
+        except Exception as e:
+            print(f'❌ {self.account_name}: Browser fallback for OAuth prerequisites failed: {e}')
+            error = {'success': False, 'error': f'Browser fallback failed: {e}'}
+            return client_id_result or error, error
+        return client_id_result, auth_state_result
+
     async def get_user_info(self, session: curl_requests.Session, headers: dict) -> dict:
         """获取用户信息"""
         return await http_get_user_info(
             account_name=self.account_name,
             provider_config=self.provider_config,
-            quota_divisor=QUOTA_DIVISOR,
+            quota_divisor=self.quota_divisor,
             session=session,
             headers=headers,
         )
@@ -210,7 +294,7 @@ class CheckIn:
         return http_execute_check_in(
             account_name=self.account_name,
             provider_config=self.provider_config,
-            quota_divisor=QUOTA_DIVISOR,
+            quota_divisor=self.quota_divisor,
             session=session,
             headers=headers,
             api_user=api_user,
@@ -221,20 +305,21 @@ class CheckIn:
         headers: dict,
         cookies: dict,
         api_user: str | int,
-        topup_interval: int = 60,
+        topup_interval: int | None = None,
     ) -> dict:
         """执行完整的 CDK 获取和充值流程
 
-        直接调用 get_cdk 生成器函数，每次 yield 一个 CDK 字符串并执行 topup
-        每次 topup 之间保持间隔时间，如果 topup 失败则停止
-        
+        get_cdk 生成器作为生产者（最多领先充值一次获取），充值按自适应的间隔节奏依次执行，
+        获取 CDK 与充值等待可以重叠进行；如果获取或 topup 失败则停止
+        获取到的 CDK 会写入 CDK 账本，下次运行先兑换账本中未完成的 CDK
+
         支持同步生成器和异步生成器两种类型的 get_cdk 函数
 
         Args:
             headers: 请求头
             cookies: cookies 字典
             api_user: API 用户 ID（通过参数传递，因为登录方式可能不同）
-            topup_interval: 多次 topup 之间的间隔时间（秒），默认 60 秒
+            topup_interval: 多次 topup 之间的固定间隔（秒），默认根据 provider 响应自适应调整（以 provider 的 topup_interval 为上限）
 
         Returns:
             包含 success, topup_count, errors 等信息的字典
@@ -247,6 +332,8 @@ class CheckIn:
             cookies=cookies,
             api_user=api_user,
             topup_interval=topup_interval,
+            pacing_state_file=self.topup_pacing_path,
+            ledger_file=self.cdk_ledger_path,
         )
 
     async def check_in_with_cookies(
@@ -254,7 +341,7 @@ class CheckIn:
         cookies: dict,
         common_headers: dict,
         api_user: str | int,
-        impersonate: str = "firefox135",
+        impersonate: str | None = None,
     ) -> tuple[bool, dict]:
         """使用已有 cookies 执行签到操作
         
@@ -262,11 +349,13 @@ class CheckIn:
             cookies: cookies 字典
             common_headers: 公用请求头（包含 User-Agent 和可能的 Client Hints）
             api_user: API 用户 ID
+            impersonate: curl_cffi 浏览器指纹，默认使用指纹档案记录的值
         """
         print(
             f"ℹ️ {self.account_name}: Executing check-in with existing cookies (using proxy: {'true' if self.http_proxy_config else 'false'})"
         )
 
+        impersonate = impersonate or self.fingerprint_profile.impersonate
         session = curl_requests.Session(impersonate=impersonate, proxy=self.http_proxy_config, timeout=30)
         
         try:
@@ -282,8 +371,16 @@ class CheckIn:
             headers["Referer"] = self.provider_config.get_login_url()
             headers["Origin"] = self.provider_config.origin
 
-            # 检查是否需要手动签到
-            if self.provider_config.needs_manual_check_in():
+            # 刷新能力缓存（签到开关、quota_per_unit），失败时按默认值继续
+            await http_resolve_provider_status(
+                self.account_name, self.provider_config, session, headers, self.capability_cache
+            )
+
+            # 检查是否需要手动签到（站点在 /api/status 中明确关闭签到时跳过）
+            check_in_enabled = self.capability_cache.is_check_in_enabled(self.provider_config.origin)
+            if self.provider_config.needs_manual_check_in() and not check_in_enabled:
+                print(f"ℹ️ {self.account_name}: Check-in is disabled by provider status, skipping check-in")
+            elif self.provider_config.needs_manual_check_in():
                 # 如果配置了签到状态查询，先检查是否已签到
                 check_in_status_func = self.provider_config.get_check_in_status_func()
                 if check_in_status_func:
@@ -299,7 +396,10 @@ class CheckIn:
                         # 未签到，执行签到
                         check_in_result = self.execute_check_in(session, headers, api_user)
                         if not check_in_result.get("success"):
-                            return False, {"error": check_in_result.get("error", "Check-in failed")}
+                            return False, {
+                                "error": check_in_result.get("error", "Check-in failed"),
+                                "challenge": check_in_result.get("challenge"),
+                            }
                         # 签到成功后再次查询状态（显示最新状态）
                         check_in_status_func(
                             provider_config=self.provider_config,
@@ -311,7 +411,10 @@ class CheckIn:
                     # 没有配置签到状态查询函数，直接执行签到
                     check_in_result = self.execute_check_in(session, headers, api_user)
                     if not check_in_result.get("success"):
-                        return False, {"error": check_in_result.get("error", "Check-in failed")}
+                        return False, {
+                            "error": check_in_result.get("error", "Check-in failed"),
+                            "challenge": check_in_result.get("challenge"),
+                        }
             else:
                 if self.provider_config.name == "x666":
                     print(f"ℹ️ {self.account_name}: X666 has no separate check-in endpoint, continuing with draw flow")
@@ -340,7 +443,7 @@ class CheckIn:
             elif user_info:
                 error_msg = user_info.get("error", "Unknown error")
                 print(f"❌ {self.account_name}: {error_msg}")
-                return False, {"error": "Failed to get user info"}
+                return False, {"error": "Failed to get user info", "challenge": user_info.get("challenge")}
             else:
                 return False, {"error": "No user info available"}
 
@@ -441,13 +544,26 @@ class CheckIn:
         browser_headers = None
 
         if self.provider_config.needs_waf_cookies():
-            waf_cookies = await self.get_waf_cookies_with_browser()
+            waf_cookies = None
+            if not self.provider_config.aliyun_captcha:
+                waf_cookies = get_waf_cookies_with_http(
+                    self.account_name,
+                    self.provider_config.get_login_url(),
+                    self.http_proxy_config,
+                    impersonate=self.fingerprint_profile.impersonate,
+                    headers=self.fingerprint_profile.browser_headers(),
+                )
+                if not waf_cookies:
+                    print(f'ℹ️ {self.account_name}: Falling back to browser for WAF cookies')
+            if not waf_cookies:
+                waf_cookies = await self.get_waf_cookies_with_browser()
             if waf_cookies:
                 bypass_cookies = waf_cookies
                 print(f'✅ {self.account_name}: WAF cookies obtained')
             else:
                 print(f'⚠️ {self.account_name}: Unable to get WAF cookies, continuing with empty cookies')
-            return bypass_cookies, browser_headers
+            # WAF cookies 与浏览器指纹绑定，后续请求使用档案中记录的 User-Agent
+            return bypass_cookies, self.fingerprint_profile.browser_headers()
 
         if self.provider_config.needs_cf_clearance():
             try:
@@ -455,6 +571,9 @@ class CheckIn:
                     url=self.provider_config.get_login_url(),
                     account_name=self.account_name,
                     proxy_config=self.camoufox_proxy_config,
+                    stats_file=self.bypass_stats_path,
+                    provider_name=self.provider_config.name,
+                    fingerprint_profile=self.fingerprint_profile,
                 )
 
                 if cf_result[0]:
@@ -474,6 +593,29 @@ class CheckIn:
         print(f'ℹ️ {self.account_name}: Bypass not required, using user cookies directly')
         return bypass_cookies, browser_headers
 
+    async def _call_with_lazy_bypass(self, call, bypass_cookies: dict, common_headers: dict) -> tuple[bool, dict]:
+        """执行一次认证尝试；lazy 模式下命中挑战页时获取 bypass 并重试一次。
+
+        Args:
+            call: 接收 (bypass_cookies, common_headers) 的认证协程函数
+            bypass_cookies: 当前 bypass cookies
+            common_headers: 当前公用请求头
+        """
+        if self._lazy_bypass_upgrade is not None:
+            bypass_cookies, common_headers = self._lazy_bypass_upgrade
+
+        success, payload = await call(bypass_cookies, common_headers)
+        challenge = payload.get('challenge') if isinstance(payload, dict) else None
+        if success or not challenge or not self._defer_bypass or self._lazy_bypass_upgrade is not None:
+            return success, payload
+
+        self._challenge_kind = challenge
+        print(f'⚠️ {self.account_name}: {challenge} challenge hit over plain HTTP, acquiring bypass and retrying')
+        upgraded_cookies, browser_headers = await self._resolve_bypass_artifacts()
+        upgraded_headers = build_common_headers(self.account_name, browser_headers) if browser_headers else common_headers
+        self._lazy_bypass_upgrade = (upgraded_cookies, upgraded_headers)
+        return await call(upgraded_cookies, upgraded_headers)
+
     async def _run_cookies_attempt(
         self, cookies_data, bypass_cookies: dict, common_headers: dict, attempts: list[AuthAttemptResult]
     ) -> None:
@@ -497,8 +639,11 @@ class CheckIn:
                 )
                 return
 
-            all_cookies = {**bypass_cookies, **user_cookies}
-            success, user_info = await self.check_in_with_cookies(all_cookies, common_headers, api_user)
+            success, user_info = await self._call_with_lazy_bypass(
+                lambda cookies, headers: self.check_in_with_cookies({**cookies, **user_cookies}, headers, api_user),
+                bypass_cookies,
+                common_headers,
+            )
             if success:
                 print(f'✅ {self.account_name}: Cookies authentication successful')
                 attempts.append(self._build_attempt_result('cookies', True, user_info))
@@ -537,7 +682,11 @@ class CheckIn:
                     )
                     continue
 
-                success, user_info = await runner(username, password, bypass_cookies, common_headers)
+                success, user_info = await self._call_with_lazy_bypass(
+                    lambda cookies, headers: runner(username, password, cookies, headers),
+                    bypass_cookies,
+                    common_headers,
+                )
                 if success:
                     print(f'✅ {self.account_name}: {auth_name} authentication successful ({oauth_account.username})')
                     attempts.append(self._build_attempt_result(account_label, True, user_info))
@@ -685,32 +834,54 @@ class CheckIn:
 
         session, impersonate, headers = self._create_oauth_session_and_headers(common_headers, bypass_cookies)
 
+        username_hash = hashlib.sha256(username.encode('utf-8')).hexdigest()[:8]
+        cache_prefix = 'github' if provider_label == 'GitHub' else 'linuxdo'
+        cache_file_path = f'{self.storage_state_dir}/{cache_prefix}_{username_hash}_storage_state.json'
+
+        # 预先启动浏览器并加载 storage_state，与 client id / auth state 请求并行
+        browser_session = OAuthBrowserSession(
+            self.account_name, cache_file_path, fingerprint_profile=self.fingerprint_profile
+        ).start()
+
         try:
+            provider_key = 'github' if provider_label == 'GitHub' else 'linuxdo'
+            auth_state_result = None
             configured_client_id = getattr(self.provider_config, client_id_attr)
             if configured_client_id:
                 client_id_result = {'success': True, 'client_id': configured_client_id}
                 print(f'ℹ️ {self.account_name}: Using {provider_label} client ID from config')
             else:
-                provider_key = 'github' if provider_label == 'GitHub' else 'linuxdo'
                 client_id_result = await self.get_auth_client_id(session, headers, provider_key)
+                if self._should_fallback_to_browser(client_id_result):
+                    # status 与 auth state 合并到同一个浏览器页面中获取
+                    client_id_result, auth_state_result = await self.get_oauth_prerequisites_with_browser(
+                        provider_key
+                    )
                 if client_id_result and client_id_result.get('success'):
                     print(f"ℹ️ {self.account_name}: Got client ID for {provider_label}: {client_id_result['client_id']}")
                 else:
                     error_msg = client_id_result.get('error', 'Unknown error')
                     print(f'❌ {self.account_name}: {error_msg}')
-                    return False, {'error': f'Failed to get {provider_label} client ID'}
-
-            auth_state_result = await self.get_auth_state(session=session, headers=headers)
+                    return False, {
+                        'error': f'Failed to get {provider_label} client ID',
+                        'challenge': client_id_result.get('challenge'),
+                    }
+
+            if auth_state_result is None:
+                auth_state_result = await self.get_auth_state(session=session, headers=headers)
+                if self._should_fallback_to_browser(auth_state_result):
+                    _, auth_state_result = await self.get_oauth_prerequisites_with_browser(
+                        provider_key, client_id_result
+                    )
             if auth_state_result and auth_state_result.get('success'):
                 print(f"ℹ️ {self.account_name}: Got auth state for {provider_label}: {auth_state_result['state']}")
             else:
                 error_msg = auth_state_result.get('error', 'Unknown error')
                 print(f'❌ {self.account_name}: {error_msg}')
-                return False, {'error': f'Failed to get {provider_label} auth state'}
-
-            username_hash = hashlib.sha256(username.encode('utf-8')).hexdigest()[:8]
-            cache_prefix = 'github' if provider_label == 'GitHub' else 'linuxdo'
-            cache_file_path = f'{self.storage_state_dir}/{cache_prefix}_{username_hash}_storage_state.json'
+                return False, {
+                    'error': f'Failed to get {provider_label} auth state',
+                    'challenge': auth_state_result.get('challenge'),
+                }
 
             oauth_signin = sign_in_cls(
                 account_name=self.account_name,
@@ -724,6 +895,7 @@ class CheckIn:
                 auth_state=auth_state_result.get('state'),
                 auth_cookies=auth_state_result.get('cookies', []),
                 cache_file_path=cache_file_path,
+                browser_session=browser_session,
             )
 
             return await self._finalize_oauth_result(
@@ -742,13 +914,26 @@ class CheckIn:
             print(f'❌ {self.account_name}: Error occurred during check-in process - {e}')
             return False, {'error': f'{provider_label} check-in process error'}
         finally:
+            # 前置请求失败时取消预启动的浏览器；正常流程中 signin 已关闭，这里不会重复关闭
+            await browser_session.aclose()
             session.close()
 
     async def execute(self) -> AccountRunResult:
         """为单个账号执行奖励流程，支持多种认证方式"""
         print(f"\n\n⏳ Starting to process {self.account_name}")
 
-        bypass_cookies, browser_headers = await self._resolve_bypass_artifacts()
+        self._defer_bypass = self.provider_config.should_defer_bypass()
+        self._lazy_bypass_upgrade = None
+        self._challenge_kind = None
+        if self._defer_bypass:
+            print(f"ℹ️ {self.account_name}: Lazy bypass enabled, trying plain HTTP before acquiring bypass")
+            bypass_cookies, browser_headers = {}, None
+        else:
+            bypass_cookies, browser_headers = await self._resolve_bypass_artifacts()
+
+        # 本次没有浏览器头部时，复用指纹档案中记录的 User-Agent / Client Hints
+        if not browser_headers:
+            browser_headers = self.fingerprint_profile.browser_headers()
 
         # 生成公用请求头（只生成一次 User-Agent，整个签到流程保持一致）
         # 注意：Referer 和 Origin 不在这里设置，由各个签到方法根据实际请求动态设置
@@ -774,6 +959,13 @@ class CheckIn:
             run_result.system_error = 'No valid authentication method found in configuration'
             return run_result
 
+        if self._defer_bypass:
+            provider_stats = record_bypass_probe(self.bypass_stats_path, self.provider_config.name, self._challenge_kind)
+            print(
+                f"ℹ️ {self.account_name}: Lazy bypass challenge rate for {self.provider_config.name}: "
+                f"{format_challenge_rate(provider_stats)}"
+            )
+
         # 输出最终结果
         print(f"\n📋 {self.account_name} authentication results:")
         successful_count = 0
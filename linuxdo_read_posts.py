@@ -17,22 +17,29 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import json
+import math
 import os
 import random
 import re
+import statistics
 import sys
 import time
+from collections import deque
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Literal
 
 from camoufox.async_api import AsyncCamoufox
-from curl_cffi import requests as curl_requests
 from dotenv import load_dotenv
 
+from utils.browser_resources import ResourceGuard
 from utils.browser_utils import save_page_content_to_file, take_screenshot
+from utils.linuxdo_api import DEFAULT_PROBE_CONCURRENCY, DEFAULT_PROBE_INTERVAL, LinuxDoApiClient
+from utils.linuxdo_id_density import ID_DENSITY_FILE, TopicIdDensityIndex
+from utils.linuxdo_read_index import ReadTopicIndex
 from utils.notify import get_notifier
-from utils.runtime_flags import allow_interactive_auth
+from utils.runtime_flags import allow_interactive_auth, get_bool_env, get_int_env
 
 DEFAULT_STORAGE_STATE_DIR = 'storage-states'
 TOPIC_STATE_DIR = 'linuxdo_reads'
@@ -43,6 +50,19 @@ DEFAULT_MAX_TOPIC_ATTEMPTS = 60
 DEFAULT_MAX_RUNTIME_SECONDS = 900
 DEFAULT_MAX_TOPIC_DRIFT_FROM_BASE = 50_000
 DEFAULT_DISCOVERY_CANDIDATES = 80
+# 同一登录 context 中并行阅读的标签页数
+DEFAULT_READ_TABS = 2
+MAX_READ_TABS = 6
+# 多账号共用一个浏览器时，同时运行的账号数与所有账号合计打开的页面数上限
+DEFAULT_ACCOUNT_CONCURRENCY = 2
+DEFAULT_MAX_OPEN_PAGES = 4
+# ID fallback：每轮通过 HTTP 探测的 id 数、总探测数相对 max_topic_attempts 的倍数、被限流后的等待秒数
+ID_PROBE_WINDOW = 20
+ID_PROBE_BUDGET_FACTOR = 10
+ID_PROBE_RATE_LIMIT_WAIT = 5
+# 打开一个 topic 的固定开销（导航 + 等待渲染 + 读后停顿，秒）与每次滚动平均经过的楼层数，用于候选排序
+TOPIC_NAVIGATION_SECONDS = 4.0
+TOPIC_POSTS_PER_SCROLL = 4
 
 
 TopicStatus = Literal['valid', 'invalid', 'error', 'challenge', 'unknown']
@@ -57,6 +77,7 @@ class TopicVisitResult:
     status: TopicStatus
     pages_read: int = 0
     error: str | None = None
+    highest_post_number: int = 0
 
 
 @dataclass
@@ -68,6 +89,27 @@ class ReadRuntimeState:
     last_run_at: str = ''
 
 
+@dataclass
+class ReadBudget:
+    """一次阅读的共享预算，多个标签页共用同一份计数"""
+
+    max_posts: int
+    max_topic_attempts: int
+    max_runtime_seconds: int
+    started_at: float = field(default_factory=time.time)
+    pages_read: int = 0
+    runtime_exceeded: bool = False
+
+    def allows(self, attempted_count: int) -> bool:
+        """是否还能开始下一次 topic 访问"""
+        if self.pages_read >= self.max_posts or attempted_count >= self.max_topic_attempts:
+            return False
+        if time.time() - self.started_at >= self.max_runtime_seconds:
+            self.runtime_exceeded = True
+            return False
+        return True
+
+
 @dataclass
 class ReadAccountResult:
     username: str
@@ -85,6 +127,8 @@ class ReadAccountResult:
     duration_seconds: int = 0
     reset_to_base_retry: bool = False
     discovered_candidates: int = 0
+    # 发现的候选中已在已读索引里读完、被跳过的数量
+    skipped_read_topics: int = 0
     used_id_fallback: bool = False
     invalid_topics: int = 0
     unknown_topics: int = 0
@@ -106,48 +150,22 @@ def classify_read_error(error: Exception | str) -> str:
     return message
 
 
-def get_int_env(name: str, default: int) -> int:
-    """读取整数环境变量；空字符串或非法值时回退默认值。"""
-    raw = os.getenv(name)
-    if raw is None:
-        return default
-
-    raw = raw.strip()
-    if not raw:
-        return default
-
-    try:
-        return int(raw)
-    except ValueError:
-        print(f'⚠️ Invalid integer for {name}: {raw!r}, using default {default}')
-        return default
-
-
-def get_bool_env(name: str, default: bool = False) -> bool:
-    """读取布尔环境变量；空字符串或非法值时回退默认值。"""
-    raw = os.getenv(name)
-    if raw is None:
-        return default
+def should_retry_from_base(
+    state: ReadRuntimeState,
+    base_topic_id: int,
+    valid_topics: int,
+    id_density: TopicIdDensityIndex | None = None,
+) -> bool:
+    """当缓存游标明显漂移且本轮一个有效帖子都没读到时，决定是否回退到 base 重试。
 
-    raw = raw.strip().lower()
-    if not raw:
-        return default
-
-    if raw in {'1', 'true', 'yes', 'on'}:
-        return True
-    if raw in {'0', 'false', 'no', 'off'}:
-        return False
-
-    print(f'⚠️ Invalid boolean for {name}: {raw!r}, using default {default}')
-    return default
-
-
-def should_retry_from_base(state: ReadRuntimeState, base_topic_id: int, valid_topics: int) -> bool:
-    """当缓存游标明显漂移且本轮一个有效帖子都没读到时，决定是否回退到 base 重试。"""
+    有 id 密度索引时，游标超过已知最大有效 id 即视为漂移；否则按固定的 base + 漂移上限判断。
+    """
     if valid_topics > 0:
         return False
     if state.last_topic_id <= 0:
         return False
+    if id_density is not None and id_density.max_valid_id:
+        return state.last_topic_id > id_density.max_valid_id
     return state.last_topic_id > base_topic_id + DEFAULT_MAX_TOPIC_DRIFT_FROM_BASE
 
 
@@ -206,6 +224,63 @@ def extract_topic_candidates_from_api(payload: dict, origin: str = 'https://linu
     return candidates
 
 
+def extract_topic_meta_from_api(payload: dict) -> dict[int, dict]:
+    """从 Discourse 列表 JSON 中提取 topic 楼层信息：{topic_id: {"posts_count", "highest_post_number", "last_read_post_number"}}。"""
+    topic_list = payload.get('topic_list', {}) if isinstance(payload, dict) else {}
+    topics = topic_list.get('topics', []) if isinstance(topic_list, dict) else []
+
+    meta: dict[int, dict] = {}
+    for topic in topics:
+        if not isinstance(topic, dict) or not topic.get('id'):
+            continue
+        meta[int(topic['id'])] = {
+            'posts_count': int(topic.get('posts_count') or 0),
+            'highest_post_number': int(topic.get('highest_post_number') or 0),
+            'last_read_post_number': int(topic.get('last_read_post_number') or 0),
+        }
+    return meta
+
+
+def estimate_topic_value(unread_posts: int) -> tuple[float, float]:
+    """估算阅读一个 topic 的 (预计页数, 预计耗时秒数)
+
+    页数按 timeline 的 总楼层 - 落地楼层 计，落地楼层即上次读到的位置，所以约等于未读楼层数；
+    耗时 = 固定的导航开销 + 读完未读楼层需要的滚动次数（受页面脚本的最大滚动次数限制）* 平均滚动间隔。
+    """
+    expected_pages = max(1, unread_posts)
+    scroll_steps = min(SCROLL_READER_OPTIONS['maxSteps'], math.ceil(expected_pages / TOPIC_POSTS_PER_SCROLL) + 1)
+    scroll_seconds = (SCROLL_READER_OPTIONS['minDelay'] + SCROLL_READER_OPTIONS['maxDelay']) / 2 / 1000
+    return float(expected_pages), TOPIC_NAVIGATION_SECONDS + scroll_steps * scroll_seconds
+
+
+def rank_topic_candidates(
+    candidates: list[tuple[int, str]],
+    topic_meta: dict[int, dict],
+    read_index: ReadTopicIndex,
+) -> list[tuple[int, str]]:
+    """按 预计页数 / 预计耗时 从高到低排列候选（同分保持原顺序），让 max_posts 用更少的 topic 加载达到
+
+    没有楼层信息的候选：没读过的按已知候选的中位数估计，读过的按 1 页估计。
+    """
+    known_unread: dict[int, int] = {}
+    for topic_id, _ in candidates:
+        remaining = read_index.unread_posts(topic_id, (topic_meta.get(topic_id) or {}).get('highest_post_number'))
+        if remaining is not None:
+            known_unread[topic_id] = remaining
+    prior = statistics.median(known_unread.values()) if known_unread else 1
+
+    def score(candidate: tuple[int, str]) -> float:
+        topic_id = candidate[0]
+        if topic_id in known_unread:
+            unread = known_unread[topic_id]
+        else:
+            unread = 1 if topic_id in read_index else prior
+        expected_pages, expected_seconds = estimate_topic_value(int(unread))
+        return expected_pages / expected_seconds
+
+    return sorted(candidates, key=score, reverse=True)
+
+
 def load_linuxdo_accounts() -> list[dict]:
     """从 ACCOUNTS_LINUX_DO 或 ACCOUNTS 加载 Linux.do 账号。"""
     accounts_str = os.getenv('ACCOUNTS_LINUX_DO') or os.getenv('ACCOUNTS')
@@ -250,6 +325,107 @@ def load_linuxdo_accounts() -> list[dict]:
         return []
 
 
+CURRENT_SESSION_PATH = '/session/current.json'
+
+# 在页面内请求会话接口（HTTP 请求被挑战拦截时使用）
+_SESSION_FETCH_SCRIPT = """async (path) => {
+    try {
+        const response = await fetch(path, { credentials: 'include', headers: { accept: 'application/json' } });
+        try {
+            return { status: response.status, data: await response.json() };
+        } catch (e) {
+            return { status: response.status, data: null };
+        }
+    } catch (e) {
+        return { status: 0, data: null, error: e.message };
+    }
+}"""
+
+# 页面内滚动阅读参数：最多滚动次数、每次滚动间隔范围（毫秒）、连续无变化多少次视为停滞、整体超时（毫秒）
+SCROLL_READER_OPTIONS = {
+    'maxSteps': 25,
+    'minDelay': 1000,
+    'maxDelay': 2000,
+    'stallLimit': 2,
+    'timeoutMs': 60_000,
+}
+
+# 在页面内完成整个滚动阅读：MutationObserver 监听 .timeline-replies 的楼层变化，
+# 按随机间隔滚动，读到最后一楼、进度停滞或超时时返回 {current, total, pages_read}
+_SCROLL_READER_SCRIPT = """(options) => new Promise((resolve) => {
+    let current = 0;
+    let total = 0;
+    let pagesRead = 0;
+    let steps = 0;
+    let stagnant = 0;
+    let lastSnapshot = '';
+    let done = false;
+    let timer = null;
+    let observer = null;
+    let deadline = null;
+
+    const update = () => {
+        const element = document.querySelector('.timeline-replies');
+        if (!element) {
+            return null;
+        }
+        const text = (element.innerText || element.textContent || '').trim();
+        const parts = text.split('/').map((part) => part.trim());
+        if (parts.length === 2 && /^\\d+$/.test(parts[0]) && /^\\d+$/.test(parts[1])) {
+            current = Math.max(current, parseInt(parts[0], 10));
+            total = parseInt(parts[1], 10);
+            pagesRead = Math.max(pagesRead, total - current);
+        }
+        return text;
+    };
+    const ended = () => total > 0 && current >= total;
+    const finish = () => {
+        if (done) {
+            return;
+        }
+        done = true;
+        clearTimeout(timer);
+        clearTimeout(deadline);
+        if (observer) {
+            observer.disconnect();
+        }
+        resolve({ current, total, pages_read: pagesRead });
+    };
+    const tick = () => {
+        if (done) {
+            return;
+        }
+        const text = update();
+        if (text === null || ended()) {
+            finish();
+            return;
+        }
+        stagnant = text === lastSnapshot ? stagnant + 1 : 0;
+        lastSnapshot = text;
+        if (stagnant >= options.stallLimit || steps >= options.maxSteps) {
+            finish();
+            return;
+        }
+        steps += 1;
+        window.scrollBy(0, window.innerHeight * (0.85 + Math.random() * 0.3));
+        timer = setTimeout(tick, options.minDelay + Math.random() * (options.maxDelay - options.minDelay));
+    };
+
+    const timeline = document.querySelector('.timeline-replies');
+    if (timeline) {
+        observer = new MutationObserver(() => {
+            update();
+            if (ended()) {
+                finish();
+            }
+        });
+        observer.observe(timeline, { childList: true, subtree: true, characterData: true });
+    }
+    deadline = setTimeout(finish, options.timeoutMs);
+    tick();
+})"""
+
+
 class LinuxDoReadPosts:
     def __init__(
         self,
@@ -257,9 +433,13 @@ class LinuxDoReadPosts:
         password: str,
         storage_state_dir: str = DEFAULT_STORAGE_STATE_DIR,
         topic_state_dir: str = TOPIC_STATE_DIR,
+        page_slots: asyncio.Semaphore | None = None,
+        id_density: TopicIdDensityIndex | None = None,
     ):
         self.username = username
         self.password = password
+        # 多账号共用浏览器时的全局页面配额，None 表示不限制
+        self.page_slots = page_slots
         self.storage_state_dir = storage_state_dir
         self.topic_state_dir = topic_state_dir
         self.username_hash = hashlib.sha256(username.encode('utf-8')).hexdigest()[:8]
@@ -269,6 +449,17 @@ class LinuxDoReadPosts:
 
         self.storage_state_path = os.path.join(self.storage_state_dir, f'linuxdo_{self.username_hash}_storage_state.json')
         self.topic_state_path = os.path.join(self.topic_state_dir, f'{self.username_hash}_topic_state.json')
+        # 跨运行的已读 topic 索引（topic_id -> 读到的最高楼层）
+        self.read_index = ReadTopicIndex(
+            os.path.join(self.topic_state_dir, f'{self.username_hash}_read_index.json')
+        ).load()
+        self._last_discovery_meta: dict[int, dict] = {}
+        self._last_skipped_read = 0
+        self._probed_topic_ids: set[int] = set()
+        # 站点级的 topic id 密度索引，多账号并发时共用同一个实例
+        self.id_density = id_density or TopicIdDensityIndex(os.path.join(self.topic_state_dir, ID_DENSITY_FILE)).load()
+        # /session/current.json 返回的登录用户名
+        self.logged_in_username: str | None = None
 
     def _load_topic_state(self) -> ReadRuntimeState:
         try:
@@ -301,15 +492,117 @@ class LinuxDoReadPosts:
         except Exception as e:
             print(f'⚠️ {self.username}: Failed to save topic state: {e}')
 
+    def _save_read_progress(self, state: ReadRuntimeState) -> None:
+        """保存游标状态、已读 topic 索引与 id 密度索引"""
+        self._save_topic_state(state)
+        self.read_index.save()
+        self.id_density.save()
+
+    def _prioritize_unread(self, candidates: list[tuple[int, str]]) -> list[tuple[int, str]]:
+        """根据已读索引过滤已读完的候选，剩下的按预计未读页数 / 导航耗时排序"""
+        # 列表 JSON 中的 last_read_post_number 是服务端记录的阅读进度，一并合入索引
+        for topic_id, meta in self._last_discovery_meta.items():
+            if meta.get('last_read_post_number'):
+                self.read_index.mark(topic_id, meta['last_read_post_number'])
+
+        prioritized, skipped = self.read_index.filter_candidates(candidates, self._last_discovery_meta)
+        self._last_skipped_read = skipped
+        if skipped:
+            print(f'ℹ️ {self.username}: Skipped {skipped} already-read topics ({len(self.read_index)} in read index)')
+        return rank_topic_candidates(prioritized, self._last_discovery_meta, self.read_index)
+
     def _next_topic_id(self, state: ReadRuntimeState, base_topic_id: int) -> int:
         current_topic_id = max(base_topic_id, state.last_topic_id)
         if state.invalid_streak >= 5:
             return current_topic_id + random.randint(50, 100)
         return current_topic_id + random.randint(1, 5)
 
+    async def _fetch_current_user(self, page) -> dict:
+        """通过 /session/current.json 获取当前登录用户
+
+        先用 context 的 cookies 走 HTTP（一个请求），命中挑战页或请求失败时再在页面内 fetch。
+
+        Returns:
+            {"success": bool, "logged_in": bool, "username": str | None, "via": "api" | "page"}，
+            success=False 表示两种方式都无法得到确定结果
+        """
+        try:
+            async with await LinuxDoApiClient.from_context(page.context, page, max_concurrency=1) as client:
+                response = await client.get_json(CURRENT_SESSION_PATH)
+        except Exception as e:
+            response = {'success': False, 'error': str(e)}
+
+        if response.get('status') is not None and not response.get('challenge') and 'data' in response:
+            session = self._parse_current_session(response.get('status'), response.get('data'), via='api')
+            if session['success']:
+                return session
+
+        print(
+            f'ℹ️ {self.username}: Session API unavailable over HTTP '
+            f'(status={response.get("status")}, challenge={response.get("challenge", False)}), trying page fetch'
+        )
+        try:
+            if not page.url.startswith('https://linux.do/'):
+                await page.goto('https://linux.do/', wait_until='domcontentloaded')
+            if 'linux.do/challenge' in page.url or page.url.startswith('https://linux.do/login'):
+                return {'success': True, 'logged_in': False, 'username': None, 'via': 'page'}
+            fetched = await page.evaluate(_SESSION_FETCH_SCRIPT, CURRENT_SESSION_PATH)
+        except Exception as e:
+            print(f'⚠️ {self.username}: Session page fetch failed: {e}')
+            return {'success': False, 'logged_in': False, 'username': None, 'via': 'page'}
+
+        fetched = fetched if isinstance(fetched, dict) else {}
+        if fetched.get('data') is None:
+            return {'success': False, 'logged_in': False, 'username': None, 'via': 'page'}
+        return self._parse_current_session(fetched.get('status'), fetched.get('data'), via='page')
+
+    @staticmethod
+    def _parse_current_session(status: int | None, data, via: str) -> dict:
+        current_user = data.get('current_user') if isinstance(data, dict) else None
+        if status == 200 and isinstance(current_user, dict) and current_user.get('username'):
+            return {'success': True, 'logged_in': True, 'username': current_user['username'], 'via': via}
+        # 未登录时 Discourse 返回 404（或 403）+ {"errors": ["not_logged_in"]}
+        errors = data.get('errors') if isinstance(data, dict) else None
+        not_logged_in = isinstance(errors, list) and 'not_logged_in' in errors
+        error_type = data.get('error_type') if isinstance(data, dict) else None
+        if status == 404 or (status == 403 and (not_logged_in or error_type == 'not_logged_in')):
+            return {'success': True, 'logged_in': False, 'username': None, 'via': via}
+        # 429 / 5xx 等其他响应无法说明登录状态，交给页面 fetch 或页面检查判断，避免对有效会话重新输密码登录
+        return {'success': False, 'logged_in': False, 'username': None, 'via': via}
+
+    def _matches_account(self, session_username: str) -> bool:
+        """登录用户是否为当前账号；配置为邮箱登录时无法比对用户名，视为匹配"""
+        if '@' in self.username:
+            return True
+        return session_username.lower() == self.username.lower()
+
     async def _is_logged_in(self, page) -> bool:
+        print(f'ℹ️ {self.username}: Checking login status...')
+        session = await self._fetch_current_user(page)
+        if not session['success']:
+            return await self._is_logged_in_via_dom(page)
+
+        if not session['logged_in']:
+            print(f'ℹ️ {self.username}: Not logged in (checked via {session["via"]})')
+            return False
+
+        session_username = session['username']
+        if not self._matches_account(session_username):
+            # 恢复的缓存属于其他账号，清掉 cookies 后按未登录处理，重新登录
+            print(f'⚠️ {self.username}: Restored session belongs to {session_username}, clearing cookies')
+            try:
+                await page.context.clear_cookies()
+            except Exception as e:
+                print(f'⚠️ {self.username}: Failed to clear cookies: {e}')
+            return False
+
+        self.logged_in_username = session_username
+        print(f'✅ {self.username}: Logged in as {session_username} (checked via {session["via"]})')
+        return True
+
+    async def _is_logged_in_via_dom(self, page) -> bool:
+        """会话接口无法给出结果时，退回打开首页检查 URL / cookies / 页面元素"""
         try:
-            print(f'ℹ️ {self.username}: Checking login status...')
             await page.goto('https://linux.do/', wait_until='domcontentloaded')
             await page.wait_for_timeout(2000)
 
@@ -368,47 +661,32 @@ class LinuxDoReadPosts:
             await take_screenshot(page, 'login_error', self.username)
             return False, challenge_detected
 
-    async def _scroll_to_read(self, page) -> int:
-        """返回估算的已阅读页数增量。页面行为层，不作为业务验证。"""
-        page_reads = 0
-        last_snapshot = ''
-        stagnant_count = 0
-
-        for _ in range(25):
-            timeline_element = await page.query_selector('.timeline-replies')
-            if not timeline_element:
-                break
+    async def _scroll_to_read(self, page) -> tuple[int, int, int]:
+        """返回 (当前楼层, 总楼层, 估算的已阅读页数增量)。页面行为层，不作为业务验证。
 
-            inner_text = (await timeline_element.inner_text()).strip()
-            if inner_text == last_snapshot:
-                stagnant_count += 1
-            else:
-                stagnant_count = 0
-                last_snapshot = inner_text
-
-            try:
-                parts = [part.strip() for part in inner_text.split('/')]
-                if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                    current_page = int(parts[0])
-                    total_pages = int(parts[1])
-                    page_reads = max(page_reads, total_pages - current_page)
-                    if current_page >= total_pages:
-                        break
-            except Exception:
-                pass
-
-            if stagnant_count >= 2:
-                break
-
-            await page.evaluate('window.scrollBy(0, window.innerHeight)')
-            await page.wait_for_timeout(random.randint(1000, 2000))
-
-        return page_reads
+        滚动循环整体注入页面执行，一次 page.evaluate 代替每轮的查询 / 读取 / 滚动 / 等待往返。
+        """
+        try:
+            outcome = await page.evaluate(_SCROLL_READER_SCRIPT, SCROLL_READER_OPTIONS)
+        except Exception as e:
+            print(f'⚠️ {self.username}: In-page scroll reader failed: {e}')
+            return 0, 0, 0
+
+        outcome = outcome if isinstance(outcome, dict) else {}
+        return (
+            int(outcome.get('current') or 0),
+            int(outcome.get('total') or 0),
+            int(outcome.get('pages_read') or 0),
+        )
 
     async def _discover_topic_candidates(
         self, page, max_candidates: int = DEFAULT_DISCOVERY_CANDIDATES
     ) -> tuple[list[tuple[int, str]], dict[str, int]]:
-        """从 Linux.do 列表页发现当前账号可见的 topic 候选。"""
+        """从 Linux.do 列表发现当前账号可见的 topic 候选。
+
+        通过复用浏览器 cookies 的 JSON API 并发获取 latest / new / top，并按 more_topics_url 翻页；
+        只有命中挑战页的来源才回退到浏览器打开列表页。
+        """
         candidate_pages = [
             'https://linux.do/latest',
             'https://linux.do/new',
@@ -418,83 +696,64 @@ class LinuxDoReadPosts:
         seen_ids: set[int] = set()
         discovery_counts: dict[str, int] = {}
         self._last_discovery_debug: dict[str, dict] = {}
+        self._last_discovery_meta = {}
+
+        print(f'ℹ️ {self.username}: Discovering topics via JSON API from {len(candidate_pages)} lists')
+        try:
+            async with await LinuxDoApiClient.from_context(page.context, page) as client:
+                api_results = await client.fetch_topic_lists(candidate_pages, max_topics=max_candidates)
+        except Exception as e:
+            print(f'⚠️ {self.username}: API discovery failed: {e}, falling back to DOM')
+            api_results = {
+                candidate_page: {'pages': [], 'success': False, 'challenge': True, 'error': str(e)}
+                for candidate_page in candidate_pages
+            }
 
         for candidate_page in candidate_pages:
             page_key = candidate_page.rsplit('/', 1)[-1]
+            api_result = api_results.get(candidate_page) or {'pages': [], 'success': False}
+            api_debug = {
+                'api_status': api_result.get('status'),
+                'api_success': api_result.get('success', False),
+                'api_pages': len(api_result.get('pages', [])),
+            }
             try:
-                print(f'ℹ️ {self.username}: Discovering topics from {candidate_page}')
-                api_payload = await self._discover_topic_candidates_via_api(page, candidate_page)
-
                 page_candidates: list[tuple[int, str]] = []
-                if isinstance(api_payload, dict) and api_payload.get('success') and isinstance(api_payload.get('data'), dict):
-                    page_candidates = extract_topic_candidates_from_api(api_payload['data'])
-                    print(f'ℹ️ {self.username}: API discovery [{page_key}] found {len(page_candidates)} candidates')
+                if api_result.get('success'):
+                    page_ids: set[int] = set()
+                    for payload in api_result['pages']:
+                        self._last_discovery_meta.update(extract_topic_meta_from_api(payload))
+                        for topic_id, topic_url in extract_topic_candidates_from_api(payload):
+                            if topic_id not in page_ids:
+                                page_ids.add(topic_id)
+                                page_candidates.append((topic_id, topic_url))
+                    print(
+                        f'ℹ️ {self.username}: API discovery [{page_key}] found {len(page_candidates)} candidates '
+                        f"from {api_debug['api_pages']} page(s)"
+                    )
+                    self._last_discovery_debug[page_key] = {'candidate_count': len(page_candidates), **api_debug}
+                elif api_result.get('challenge'):
+                    print(f'⚠️ {self.username}: API discovery [{page_key}] hit a challenge, falling back to DOM')
+                    page_candidates = await self._discover_topic_candidates_via_dom(page, candidate_page)
+                    self._last_discovery_debug[page_key] = await self._collect_discovery_debug(
+                        page, page_key, len(page_candidates)
+                    )
+                    self._last_discovery_debug[page_key].update(api_debug)
+                    if len(page_candidates) == 0:
+                        await save_page_content_to_file(page, f'discovery_{page_key}_empty', self.username, prefix='linuxdo')
+                        await take_screenshot(page, f'discovery_{page_key}_empty', self.username)
                 else:
-                    print(f'⚠️ {self.username}: API discovery [{page_key}] failed or returned non-topic payload, falling back to DOM')
-                    await page.goto(candidate_page, wait_until='domcontentloaded')
-                    try:
-                        await page.wait_for_selector(
-                            'tbody.topic-list-body tr.topic-list-item, .topic-list, .discovery-list-container, a[href*="/t/"]',
-                            timeout=12000,
-                        )
-                    except Exception:
-                        await page.wait_for_timeout(3000)
-
-                    hrefs = await page.evaluate(
-                        """() => {
-                            const preciseSelectors = [
-                                'tbody.topic-list-body tr.topic-list-item a.title',
-                                'tbody.topic-list-body tr.topic-list-item a.raw-topic-link',
-                                'tr.topic-list-item a.title',
-                                '.latest-topic-list-item a.title',
-                                '.topic-list .main-link a.title',
-                            ];
-
-                            const hrefs = [];
-                            const seen = new Set();
-
-                            for (const selector of preciseSelectors) {
-                                for (const anchor of document.querySelectorAll(selector)) {
-                                    const href = anchor.getAttribute('href') || '';
-                                    if (!href || seen.has(href)) continue;
-                                    seen.add(href);
-                                    hrefs.push(href);
-                                }
-                            }
-
-                            if (hrefs.length === 0) {
-                                for (const anchor of document.querySelectorAll('a[href*="/t/"]')) {
-                                    const href = anchor.getAttribute('href') || '';
-                                    if (!href || seen.has(href)) continue;
-                                    seen.add(href);
-                                    hrefs.push(href);
-                                }
-                            }
-
-                            return hrefs;
-                        }"""
+                    print(
+                        f"⚠️ {self.username}: API discovery [{page_key}] failed "
+                        f"(status={api_result.get('status')}): {str(api_result.get('error'))[:200]}"
                     )
-                    page_candidates = extract_topic_candidates(hrefs)
-                    if not page_candidates:
-                        await page.evaluate('window.scrollBy(0, window.innerHeight)')
-                        await page.wait_for_timeout(1500)
-                        hrefs = await page.evaluate(
-                            """() => Array.from(document.querySelectorAll('a[href*="/t/"]'))
-                            .map(a => a.getAttribute('href') || '')
-                            """
-                        )
-                        page_candidates = extract_topic_candidates(hrefs)
+                    self._last_discovery_debug[page_key] = {
+                        'candidate_count': 0,
+                        'error': api_result.get('error'),
+                        **api_debug,
+                    }
 
                 discovery_counts[page_key] = len(page_candidates)
-                self._last_discovery_debug[page_key] = await self._collect_discovery_debug(page, page_key, len(page_candidates))
-                if isinstance(api_payload, dict):
-                    self._last_discovery_debug[page_key]['api_status'] = api_payload.get('status')
-                    self._last_discovery_debug[page_key]['api_success'] = api_payload.get('success', False)
-
-                if len(page_candidates) == 0:
-                    await save_page_content_to_file(page, f'discovery_{page_key}_empty', self.username, prefix='linuxdo')
-                    await take_screenshot(page, f'discovery_{page_key}_empty', self.username)
-
                 for topic_id, topic_url in page_candidates:
                     if topic_id in seen_ids:
                         continue
@@ -511,37 +770,62 @@ class LinuxDoReadPosts:
         print(f'ℹ️ {self.username}: Discovered {len(collected)} topic candidates')
         return collected, discovery_counts
 
-    async def _discover_topic_candidates_via_api(self, page, candidate_page: str) -> dict:
-        """使用浏览器上下文中的 cookies 通过 HTTP 客户端请求列表 JSON。"""
-        api_url = f'{candidate_page}.json'
+    async def _discover_topic_candidates_via_dom(self, page, candidate_page: str) -> list[tuple[int, str]]:
+        """在浏览器中打开列表页并提取 topic 链接（仅用于 API 命中挑战页时）。"""
+        await page.goto(candidate_page, wait_until='domcontentloaded')
         try:
-            cookies = await page.context.cookies()
-            session = curl_requests.Session(timeout=30)
-            try:
-                for cookie in cookies:
-                    name = cookie.get('name')
-                    value = cookie.get('value')
-                    domain = cookie.get('domain') or 'linux.do'
-                    path = cookie.get('path') or '/'
-                    if name and value is not None:
-                        session.cookies.set(name, value, domain=domain, path=path)
-
-                headers = {
-                    'accept': 'application/json, text/plain, */*',
-                    'referer': candidate_page,
-                    'origin': 'https://linux.do',
+            await page.wait_for_selector(
+                'tbody.topic-list-body tr.topic-list-item, .topic-list, .discovery-list-container, a[href*="/t/"]',
+                timeout=12000,
+            )
+        except Exception:
+            await page.wait_for_timeout(3000)
+
+        hrefs = await page.evaluate(
+            """() => {
+                const preciseSelectors = [
+                    'tbody.topic-list-body tr.topic-list-item a.title',
+                    'tbody.topic-list-body tr.topic-list-item a.raw-topic-link',
+                    'tr.topic-list-item a.title',
+                    '.latest-topic-list-item a.title',
+                    '.topic-list .main-link a.title',
+                ];
+
+                const hrefs = [];
+                const seen = new Set();
+
+                for (const selector of preciseSelectors) {
+                    for (const anchor of document.querySelectorAll(selector)) {
+                        const href = anchor.getAttribute('href') || '';
+                        if (!href || seen.has(href)) continue;
+                        seen.add(href);
+                        hrefs.push(href);
+                    }
+                }
+
+                if (hrefs.length === 0) {
+                    for (const anchor of document.querySelectorAll('a[href*="/t/"]')) {
+                        const href = anchor.getAttribute('href') || '';
+                        if (!href || seen.has(href)) continue;
+                        seen.add(href);
+                        hrefs.push(href);
+                    }
                 }
-                response = session.get(api_url, headers=headers, timeout=30)
-                text = response.text
-                try:
-                    data = response.json()
-                    return {'success': response.status_code == 200, 'status': response.status_code, 'data': data}
-                except Exception:
-                    return {'success': False, 'status': response.status_code, 'text': text[:500]}
-            finally:
-                session.close()
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+
+                return hrefs;
+            }"""
+        )
+        page_candidates = extract_topic_candidates(hrefs)
+        if not page_candidates:
+            await page.evaluate('window.scrollBy(0, window.innerHeight)')
+            await page.wait_for_timeout(1500)
+            hrefs = await page.evaluate(
+                """() => Array.from(document.querySelectorAll('a[href*="/t/"]'))
+                .map(a => a.getAttribute('href') || '')
+                """
+            )
+            page_candidates = extract_topic_candidates(hrefs)
+        return page_candidates
 
     async def _collect_discovery_debug(self, page, source_key: str, candidate_count: int) -> dict:
         """采集 discovery 页调试信息。"""
@@ -602,12 +886,255 @@ class LinuxDoReadPosts:
             if not (len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit()):
                 return TopicVisitResult(topic_id=topic_id, url=topic_url, status='unknown', error=f'unparsable timeline: {inner_text}')
 
-            pages_read = await self._scroll_to_read(page)
+            current_post, _, pages_read = await self._scroll_to_read(page)
             await page.wait_for_timeout(random.randint(500, 1200))
-            return TopicVisitResult(topic_id=topic_id, url=topic_url, status='valid', pages_read=max(1, pages_read))
+            return TopicVisitResult(
+                topic_id=topic_id,
+                url=topic_url,
+                status='valid',
+                pages_read=max(1, pages_read),
+                highest_post_number=max(int(parts[0]), current_post),
+            )
         except Exception as e:
             return TopicVisitResult(topic_id=topic_id, url=topic_url, status='error', error=classify_read_error(e))
 
+    @asynccontextmanager
+    async def _browser_scope(self, browser=None):
+        """使用传入的共享浏览器；没有时为本账号单独启动一个"""
+        if browser is not None:
+            yield browser
+            return
+        async with AsyncCamoufox(headless=False, humanize=True, locale='en-US') as own_browser:
+            yield own_browser
+
+    @asynccontextmanager
+    async def _page_slot(self):
+        """等待一个全局页面配额，用于账号的主页面"""
+        if self.page_slots is None:
+            yield
+            return
+        async with self.page_slots:
+            yield
+
+    async def _try_acquire_page_slot(self) -> bool:
+        """不等待地尝试获取一个页面配额，用于额外的阅读标签页"""
+        if self.page_slots is None:
+            return True
+        if self.page_slots.locked():
+            return False
+        await self.page_slots.acquire()
+        return True
+
+    def _release_page_slot(self) -> None:
+        if self.page_slots is not None:
+            self.page_slots.release()
+
+    def _record_visit(self, state: ReadRuntimeState, budget: ReadBudget, visit_result: TopicVisitResult) -> None:
+        """根据一次访问结果更新游标状态、共享预算与已读索引"""
+        if visit_result.status == 'valid':
+            state.invalid_streak = 0
+            state.last_success_topic_id = visit_result.topic_id
+            budget.pages_read += visit_result.pages_read
+            self.read_index.mark(visit_result.topic_id, visit_result.highest_post_number)
+        else:
+            state.invalid_streak += 1
+
+    @staticmethod
+    def _next_queued_topic(queues: list[deque], slot: int) -> tuple[int, tuple[int, str]] | None:
+        """取出标签页自己队列中的下一个 topic；自己的队列空了就从最长的队列尾部取一个"""
+        if queues[slot]:
+            return queues[slot].popleft()
+        longest = max(queues, key=len)
+        return longest.pop() if longest else None
+
+    @asynccontextmanager
+    async def _reading_tabs(self, page, read_tabs: int = 1):
+        """在已登录 context 中打开阅读标签页（含主页面），退出时关闭额外的标签页并归还页面配额"""
+        tabs = [page]
+        try:
+            for _ in range(1, max(1, min(read_tabs, MAX_READ_TABS))):
+                # 全局页面配额用完时不再开新标签页
+                if not await self._try_acquire_page_slot():
+                    break
+                try:
+                    tabs.append(await page.context.new_page())
+                except Exception as e:
+                    self._release_page_slot()
+                    print(f'⚠️ {self.username}: Failed to open extra reading tab: {e}')
+                    break
+            if len(tabs) > 1:
+                print(f'ℹ️ {self.username}: Reading with {len(tabs)} tabs in parallel')
+            yield tabs
+        finally:
+            for tab in tabs[1:]:
+                try:
+                    await tab.close()
+                except Exception:
+                    pass
+                self._release_page_slot()
+
+    async def _read_topics_in_tabs(
+        self,
+        page,
+        topics: list[tuple[int, str]],
+        state: ReadRuntimeState,
+        budget: ReadBudget,
+        read_tabs: int = 1,
+        tabs: list | None = None,
+    ) -> list[TopicVisitResult]:
+        """在同一个已登录 context 中用多个标签页并行阅读 topic
+
+        候选按轮转分配到每个标签页自己的队列；max_posts / max_topic_attempts / max_runtime_seconds
+        通过共享的 ReadBudget 与 state.attempted_count 在所有标签页之间生效。
+        返回的结果按候选顺序排列，与单标签页顺序阅读时一致。
+
+        Args:
+            tabs: 调用方已打开的标签页（跨多批候选复用）；为空时按 read_tabs 临时打开，读完即关闭
+        """
+        if tabs is None:
+            async with self._reading_tabs(page, min(read_tabs, len(topics))) as tabs:
+                return await self._read_topics_in_tabs(page, topics, state, budget, tabs=tabs)
+
+        tabs = tabs[: max(1, min(len(tabs), len(topics)))]
+        queues: list[deque] = [deque() for _ in tabs]
+        for seq, topic in enumerate(topics):
+            queues[seq % len(tabs)].append((seq, topic))
+
+        visits: dict[int, TopicVisitResult] = {}
+
+        async def read_queue(slot: int, tab) -> None:
+            while True:
+                # 检查预算与登记尝试之间没有 await，多个标签页不会超出 max_topic_attempts
+                if not budget.allows(state.attempted_count):
+                    return
+                item = self._next_queued_topic(queues, slot)
+                if item is None:
+                    return
+                seq, (topic_id, topic_url) = item
+                state.last_topic_id = topic_id
+                state.attempted_count += 1
+                visit_result = await self._visit_topic_url(tab, topic_id, topic_url)
+                visits[seq] = visit_result
+                self._record_visit(state, budget, visit_result)
+
+        await asyncio.gather(*(read_queue(slot, tab) for slot, tab in enumerate(tabs)))
+
+        if budget.runtime_exceeded:
+            print(f'⚠️ {self.username}: Reached runtime limit during candidate traversal')
+        return [visits[seq] for seq in sorted(visits)]
+
+    def _next_topic_window(self, state: ReadRuntimeState, base_topic_id: int, size: int) -> list[int]:
+        """生成一批待探测的 topic id（不移动 state 游标）
+
+        id 密度索引有数据时，在最大有效 id 附近按密度抽样（跳过已读的 topic）；否则从游标往后随机游走。
+        """
+        sampled = self.id_density.sample_window(
+            size, skip=lambda topic_id: topic_id in self.read_index or topic_id in self._probed_topic_ids
+        )
+        if sampled:
+            return sampled
+        cursor = ReadRuntimeState(last_topic_id=state.last_topic_id, invalid_streak=state.invalid_streak)
+        topic_ids: list[int] = []
+        for _ in range(size):
+            cursor.last_topic_id = self._next_topic_id(cursor, base_topic_id)
+            topic_ids.append(cursor.last_topic_id)
+        return topic_ids
+
+    def _apply_probe_results(
+        self, state: ReadRuntimeState, window: list[int], probes: dict[int, dict]
+    ) -> tuple[list[tuple[int, str]], list[int], bool]:
+        """按 id 顺序把探测结果合入游标状态
+
+        Returns:
+            (可阅读的 topic, HTTP 被挑战拦截需要交给浏览器的 id, 是否被限流)
+        """
+        readable: list[tuple[int, str]] = []
+        blocked: list[int] = []
+        rate_limited = False
+        for topic_id in window:
+            probe = probes.get(topic_id)
+            if probe is None:
+                continue
+            self._probed_topic_ids.add(topic_id)
+            if probe['status'] in ('valid', 'invalid'):
+                self.id_density.record(topic_id, probe['status'] == 'valid')
+            if probe['status'] == 'valid':
+                state.invalid_streak = 0
+                state.last_topic_id = max(state.last_topic_id, topic_id)
+                readable.append((topic_id, probe['url']))
+                self._last_discovery_meta[topic_id] = {
+                    'posts_count': probe['posts_count'],
+                    'highest_post_number': probe['highest_post_number'],
+                    'last_read_post_number': 0,
+                }
+            elif probe['status'] == 'invalid':
+                state.invalid_streak += 1
+                state.last_topic_id = max(state.last_topic_id, topic_id)
+            elif probe['status'] == 'challenge':
+                blocked.append(topic_id)
+            elif probe['status'] == 'rate_limited':
+                rate_limited = True
+        return readable, blocked, rate_limited
+
+    async def _read_by_id_probing(
+        self,
+        page,
+        base_topic_id: int,
+        state: ReadRuntimeState,
+        budget: ReadBudget,
+        read_tabs: int = 1,
+    ) -> list[TopicVisitResult]:
+        """ID fallback：先通过 /t/{id}.json 并发探测一批 id，只把有效的普通帖子交给浏览器阅读
+
+        HTTP 探测第一次被挑战拦截后，这批及之后所有的 id 都改为浏览器逐个打开（与旧版逐个访问一致），
+        不再继续发送会被拦截的探测请求。阅读标签页在所有批次之间复用。
+        探测次数上限为 max_topic_attempts * ID_PROBE_BUDGET_FACTOR，浏览器访问仍受共享预算限制。
+        """
+        results: list[TopicVisitResult] = []
+        max_probes = budget.max_topic_attempts * ID_PROBE_BUDGET_FACTOR
+        probed = 0
+        challenged = False
+        async with await LinuxDoApiClient.from_context(
+            page.context, page, max_concurrency=DEFAULT_PROBE_CONCURRENCY
+        ) as client, self._reading_tabs(page, read_tabs) as tabs:
+            while probed < max_probes and budget.allows(state.attempted_count):
+                window = self._next_topic_window(state, base_topic_id, min(ID_PROBE_WINDOW, max_probes - probed))
+                if challenged:
+                    probed += len(window)
+                    readable, blocked, rate_limited = [], window, False
+                    self._probed_topic_ids.update(window)
+                else:
+                    probes = await client.probe_topics(window, min_interval=DEFAULT_PROBE_INTERVAL)
+                    probed += max(1, len(probes))
+                    readable, blocked, rate_limited = self._apply_probe_results(state, window, probes)
+                    print(
+                        f'ℹ️ {self.username}: Probed topic IDs {window[0]}-{window[-1]}: '
+                        f'{len(readable)} readable, {len(blocked)} blocked, {len(probes)} checked'
+                    )
+                    if blocked:
+                        challenged = True
+                        print(
+                            f'⚠️ {self.username}: Topic probing hit a challenge, '
+                            f'opening the remaining IDs in the browser'
+                        )
+
+                readable.extend((topic_id, f'https://linux.do/t/topic/{topic_id}') for topic_id in blocked)
+                if readable:
+                    readable = rank_topic_candidates(readable, self._last_discovery_meta, self.read_index)
+                    # 阅读时游标会回到被阅读的 id，读完后恢复到已探测的位置
+                    probe_cursor = max(state.last_topic_id, max(topic_id for topic_id, _ in readable))
+                    visits = await self._read_topics_in_tabs(page, readable, state, budget, tabs=tabs)
+                    results.extend(visits)
+                    state.last_topic_id = max(state.last_topic_id, probe_cursor)
+                    # 被挑战拦截的 id 没有探测结果，用浏览器访问结果补记密度
+                    for visit in visits:
+                        if visit.topic_id in blocked and visit.status in ('valid', 'invalid'):
+                            self.id_density.record(visit.topic_id, visit.status == 'valid')
+                if rate_limited:
+                    print(f'⚠️ {self.username}: Topic probing rate limited, waiting {ID_PROBE_RATE_LIMIT_WAIT}s')
+                    await asyncio.sleep(ID_PROBE_RATE_LIMIT_WAIT)
+        return results
+
     async def _read_posts(
         self,
         page,
@@ -616,6 +1143,7 @@ class LinuxDoReadPosts:
         max_topic_attempts: int,
         max_runtime_seconds: int,
         enable_id_fallback: bool,
+        read_tabs: int = 1,
     ) -> tuple[ReadRuntimeState, list[TopicVisitResult], int, bool, dict[str, int]]:
         state = self._load_topic_state()
         state.attempted_count = 0
@@ -627,69 +1155,49 @@ class LinuxDoReadPosts:
         )
 
         results: list[TopicVisitResult] = []
-        read_pages = 0
-        started_at = time.time()
+        budget = ReadBudget(
+            max_posts=max_posts, max_topic_attempts=max_topic_attempts, max_runtime_seconds=max_runtime_seconds
+        )
         used_id_fallback = False
 
+        # 多发现一些候选，过滤掉已读完的 topic 后仍有足够的候选
         discovered_candidates, discovery_counts = await self._discover_topic_candidates(
-            page, max_candidates=max_topic_attempts
+            page, max_candidates=max_topic_attempts * 2
         )
-        if discovered_candidates:
+        self.id_density.observe(topic_id for topic_id, _ in discovered_candidates)
+        # 返回值保留原始发现数量，已读跳过的数量通过 self._last_skipped_read 单独报告
+        unread_candidates = self._prioritize_unread(discovered_candidates)
+        if unread_candidates:
             print(f'ℹ️ {self.username}: Reading discovered candidate topics first')
-            for topic_id, topic_url in discovered_candidates:
-                if read_pages >= max_posts or state.attempted_count >= max_topic_attempts:
-                    break
-                if time.time() - started_at >= max_runtime_seconds:
-                    print(f'⚠️ {self.username}: Reached runtime limit during candidate traversal')
-                    break
-
-                state.last_topic_id = topic_id
-                state.attempted_count += 1
-                visit_result = await self._visit_topic_url(page, topic_id, topic_url)
-                results.append(visit_result)
-
-                if visit_result.status == 'valid':
-                    state.invalid_streak = 0
-                    state.last_success_topic_id = topic_id
-                    read_pages += visit_result.pages_read
-                else:
-                    state.invalid_streak += 1
+            results.extend(
+                await self._read_topics_in_tabs(page, unread_candidates, state, budget, read_tabs=read_tabs)
+            )
 
         if not discovered_candidates and not enable_id_fallback:
             print(f'⚠️ {self.username}: No topic candidates discovered and ID fallback is disabled')
-            self._save_topic_state(state)
+            self._save_read_progress(state)
             return state, results, 0, False, discovery_counts
 
-        if discovered_candidates and read_pages > 0:
-            self._save_topic_state(state)
+        if not unread_candidates and not enable_id_fallback:
+            print(f'⚠️ {self.username}: All discovered topics are already read and ID fallback is disabled')
+            self._save_read_progress(state)
+            return state, results, len(discovered_candidates), False, discovery_counts
+
+        if unread_candidates and budget.pages_read > 0:
+            self._save_read_progress(state)
             return state, results, len(discovered_candidates), used_id_fallback, discovery_counts
 
-        if discovered_candidates and not enable_id_fallback:
+        if unread_candidates and not enable_id_fallback:
             print(f'⚠️ {self.username}: Discovered candidates produced no valid reads and ID fallback is disabled')
-            self._save_topic_state(state)
+            self._save_read_progress(state)
             return state, results, len(discovered_candidates), used_id_fallback, discovery_counts
 
-        while read_pages < max_posts and state.attempted_count < max_topic_attempts:
-            if time.time() - started_at >= max_runtime_seconds:
-                print(f'⚠️ {self.username}: Reached runtime limit')
-                break
-
-            used_id_fallback = True
-            next_topic_id = self._next_topic_id(state, base_topic_id)
-            state.last_topic_id = next_topic_id
-            state.attempted_count += 1
-
-            visit_result = await self._visit_topic(page, next_topic_id)
-            results.append(visit_result)
-
-            if visit_result.status == 'valid':
-                state.invalid_streak = 0
-                state.last_success_topic_id = next_topic_id
-                read_pages += visit_result.pages_read
-            else:
-                state.invalid_streak += 1
+        used_id_fallback = True
+        results.extend(await self._read_by_id_probing(page, base_topic_id, state, budget, read_tabs=read_tabs))
 
-        self._save_topic_state(state)
+        if budget.runtime_exceeded:
+            print(f'⚠️ {self.username}: Reached runtime limit')
+        self._save_read_progress(state)
         return state, results, len(discovered_candidates), used_id_fallback, discovery_counts
 
     async def run(
@@ -697,14 +1205,22 @@ class LinuxDoReadPosts:
         max_posts: int = DEFAULT_MAX_POSTS,
         max_topic_attempts: int = DEFAULT_MAX_TOPIC_ATTEMPTS,
         max_runtime_seconds: int = DEFAULT_MAX_RUNTIME_SECONDS,
+        browser=None,
     ) -> ReadAccountResult:
+        """执行读帖任务
+
+        Args:
+            browser: 共享的 Camoufox 浏览器；传入时只在其中新建一个独立 context，否则单独启动浏览器
+        """
         print(f'ℹ️ {self.username}: Starting Linux.do read posts task')
 
+        # 没有手动指定时，优先从 id 密度索引学到的区间开始，没有数据才随机取固定区间
         base_topic_id = get_int_env(
             'LINUXDO_BASE_TOPIC_ID',
-            random.randint(DEFAULT_BASE_TOPIC_ID_START, DEFAULT_BASE_TOPIC_ID_END),
+            self.id_density.suggested_base() or random.randint(DEFAULT_BASE_TOPIC_ID_START, DEFAULT_BASE_TOPIC_ID_END),
         )
         enable_id_fallback = get_bool_env('LINUXDO_ENABLE_ID_FALLBACK', False)
+        read_tabs = get_int_env('LINUXDO_READ_TABS', DEFAULT_READ_TABS)
 
         result = ReadAccountResult(
             username=self.username,
@@ -712,9 +1228,8 @@ class LinuxDoReadPosts:
             verification_status='failed',
         )
 
-        start_time = time.time()
-
-        async with AsyncCamoufox(headless=False, humanize=True, locale='en-US') as browser:
+        async with self._browser_scope(browser) as browser, self._page_slot():
+            start_time = time.time()
             storage_state = self.storage_state_path if os.path.exists(self.storage_state_path) else None
             if storage_state:
                 print(f'ℹ️ {self.username}: Restoring storage state from cache')
@@ -722,6 +1237,8 @@ class LinuxDoReadPosts:
                 print(f'ℹ️ {self.username}: No cache file found, starting fresh')
 
             context = await browser.new_context(storage_state=storage_state)
+            resource_guard = ResourceGuard('linuxdo', self.username)
+            await resource_guard.attach(context)
             page = await context.new_page()
 
             try:
@@ -748,14 +1265,19 @@ class LinuxDoReadPosts:
                     max_topic_attempts=max_topic_attempts,
                     max_runtime_seconds=max_runtime_seconds,
                     enable_id_fallback=enable_id_fallback,
+                    read_tabs=read_tabs,
                 )
                 result.discovered_candidates = discovered_candidates
+                result.skipped_read_topics = self._last_skipped_read
                 result.used_id_fallback = used_id_fallback
                 result.discovery_counts = discovery_counts
                 result.discovery_debug = dict(self._last_discovery_debug)
 
                 if enable_id_fallback and should_retry_from_base(
-                    state, base_topic_id, len([visit for visit in topic_visits if visit.status == 'valid'])
+                    state,
+                    base_topic_id,
+                    len([visit for visit in topic_visits if visit.status == 'valid']),
+                    id_density=self.id_density,
                 ):
                     print(
                         f'⚠️ {self.username}: Cached topic range appears unhealthy '
@@ -771,8 +1293,10 @@ class LinuxDoReadPosts:
                         max_topic_attempts=max_topic_attempts,
                         max_runtime_seconds=max_runtime_seconds,
                         enable_id_fallback=enable_id_fallback,
+                        read_tabs=read_tabs,
                     )
                     result.discovered_candidates = discovered_candidates
+                    result.skipped_read_topics = self._last_skipped_read
                     result.used_id_fallback = used_id_fallback
                     result.discovery_counts = discovery_counts
                     result.discovery_debug = dict(self._last_discovery_debug)
@@ -795,6 +1319,13 @@ class LinuxDoReadPosts:
                     result.overall_status = 'failed'
                     result.verification_status = 'failed'
                     result.error = 'No topic candidates were discovered from list pages'
+                elif result.skipped_read_topics >= result.discovered_candidates and not result.used_id_fallback:
+                    result.overall_status = 'failed'
+                    result.verification_status = 'failed'
+                    result.error = (
+                        f'All {result.discovered_candidates} discovered topic candidates were already read '
+                        f'(skipped_read={result.skipped_read_topics})'
+                    )
                 elif result.valid_topics == 0:
                     result.overall_status = 'failed'
                     result.verification_status = 'failed'
@@ -817,6 +1348,7 @@ class LinuxDoReadPosts:
                 return result
             finally:
                 result.duration_seconds = int(time.time() - start_time)
+                await resource_guard.print_report()
                 await page.close()
                 await context.close()
 
@@ -827,6 +1359,52 @@ def format_duration(duration_seconds: int) -> str:
     return f'{hours:02d}:{minutes:02d}:{seconds:02d}'
 
 
+async def run_accounts(
+    browser,
+    accounts: list[dict],
+    account_concurrency: int = DEFAULT_ACCOUNT_CONCURRENCY,
+    page_slots: asyncio.Semaphore | None = None,
+) -> list[ReadAccountResult]:
+    """在同一个浏览器中并发处理多个账号（每个账号独立 context），结果按账号顺序返回"""
+    account_slots = asyncio.Semaphore(max(1, account_concurrency))
+    id_density = TopicIdDensityIndex(os.path.join(TOPIC_STATE_DIR, ID_DENSITY_FILE)).load()
+
+    async def run_account(account: dict) -> ReadAccountResult:
+        async with account_slots:
+            print(f"\n{'=' * 50}")
+            print(f"📌 Processing: {account['username']}")
+            print(f"{'=' * 50}")
+
+            reader = LinuxDoReadPosts(
+                username=account['username'],
+                password=account['password'],
+                page_slots=page_slots,
+                id_density=id_density,
+            )
+            try:
+                result = await reader.run(
+                    max_posts=get_int_env('LINUXDO_MAX_POSTS', DEFAULT_MAX_POSTS),
+                    max_topic_attempts=get_int_env('LINUXDO_MAX_TOPIC_ATTEMPTS', DEFAULT_MAX_TOPIC_ATTEMPTS),
+                    max_runtime_seconds=get_int_env('LINUXDO_MAX_RUNTIME_SECONDS', DEFAULT_MAX_RUNTIME_SECONDS),
+                    browser=browser,
+                )
+            except Exception as e:
+                result = ReadAccountResult(
+                    username=account['username'],
+                    overall_status='infra_failed',
+                    verification_status='failed',
+                    error=classify_read_error(e),
+                )
+            print(
+                f"{account['username']} result: overall_status={result.overall_status}, "
+                f"verification_status={result.verification_status}, valid_topics={result.valid_topics}, "
+                f"pages_read={result.pages_read}, duration={format_duration(result.duration_seconds)}"
+            )
+            return result
+
+    return list(await asyncio.gather(*(run_account(account) for account in accounts)))
+
+
 async def main() -> int:
     load_dotenv(override=True)
 
@@ -840,23 +1418,17 @@ async def main() -> int:
 
     print(f'ℹ️ Found {len(accounts)} Linux.do account(s)')
     notifier = get_notifier()
-    results: list[ReadAccountResult] = []
-
-    for account in accounts:
-        print(f"\n{'=' * 50}")
-        print(f"📌 Processing: {account['username']}")
-        print(f"{'=' * 50}")
-
-        reader = LinuxDoReadPosts(username=account['username'], password=account['password'])
-        result = await reader.run(
-            max_posts=get_int_env('LINUXDO_MAX_POSTS', DEFAULT_MAX_POSTS),
-            max_topic_attempts=get_int_env('LINUXDO_MAX_TOPIC_ATTEMPTS', DEFAULT_MAX_TOPIC_ATTEMPTS),
-            max_runtime_seconds=get_int_env('LINUXDO_MAX_RUNTIME_SECONDS', DEFAULT_MAX_RUNTIME_SECONDS),
-        )
-        results.append(result)
-        print(
-            f"Result: overall_status={result.overall_status}, verification_status={result.verification_status}, "
-            f"valid_topics={result.valid_topics}, pages_read={result.pages_read}, duration={format_duration(result.duration_seconds)}"
+
+    account_concurrency = max(1, get_int_env('LINUXDO_ACCOUNT_CONCURRENCY', DEFAULT_ACCOUNT_CONCURRENCY))
+    max_open_pages = max(1, get_int_env('LINUXDO_MAX_OPEN_PAGES', DEFAULT_MAX_OPEN_PAGES))
+    print(f'ℹ️ Account concurrency: {account_concurrency}, max open pages: {max_open_pages}')
+
+    async with AsyncCamoufox(headless=False, humanize=True, locale='en-US') as browser:
+        results = await run_accounts(
+            browser,
+            accounts,
+            account_concurrency=account_concurrency,
+            page_slots=asyncio.Semaphore(max_open_pages),
         )
 
     notification_lines = [
@@ -884,7 +1456,8 @@ async def main() -> int:
             notification_lines.append(
                 f"⚠️ {result.username}: page actions completed but business result is {result.verification_status} "
                 f"({duration})\n"
-                f"   discovered={result.discovered_candidates}, attempted={result.topics_attempted}, "
+                f"   discovered={result.discovered_candidates}, skipped_read={result.skipped_read_topics}, "
+                f"attempted={result.topics_attempted}, "
                 f"valid={result.valid_topics}, invalid={result.invalid_topics}, unknown={result.unknown_topics}, "
                 f"errors={result.error_topics}, challenge={result.challenge_topics}, "
                 f"pages_read={result.pages_read}, last_topic_id={result.last_topic_id}, "
@@ -894,7 +1467,8 @@ async def main() -> int:
         else:
             notification_lines.append(
                 f"❌ {result.username}: {result.error or 'Unknown error'} ({duration})\n"
-                f"   discovered={result.discovered_candidates}, sources={result.discovery_counts}"
+                f"   discovered={result.discovered_candidates}, skipped_read={result.skipped_read_topics}, "
+                f"sources={result.discovery_counts}"
             )
 
     notification_lines.append('')
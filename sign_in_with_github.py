@@ -5,12 +5,13 @@
 
 import os
 
-from camoufox.async_api import AsyncCamoufox
 from playwright_captcha import CaptchaType, ClickSolver, FrameworkType
 
+from utils.browser_resources import ResourceGuard
 from utils.browser_utils import filter_cookies, save_page_content_to_file, take_screenshot
 from utils.config import ProviderConfig
 from utils.oauth_browser import (
+    OAuthBrowserSession,
     collect_browser_headers_if_needed,
     extract_oauth_query_params,
     read_api_user_from_local_storage,
@@ -51,6 +52,7 @@ class GitHubSignIn:
         auth_state: str,
         auth_cookies: list,
         cache_file_path: str = "",
+        browser_session: OAuthBrowserSession | None = None,
     ) -> tuple[bool, dict, dict | None]:
         """使用 GitHub 账号执行登录授权
 
@@ -69,25 +71,12 @@ class GitHubSignIn:
             f"ℹ️ {self.account_name}: Using client_id: {client_id}, auth_state: {auth_state}, cache_file: {cache_file_path}"
         )
 
-        async with AsyncCamoufox(
-            # persistent_context=True,
-            # user_data_dir=tmp_dir,
-            headless=False,
-            humanize=True,
-            locale="en-US",
-            os="macos",  # 强制使用 macOS 指纹，避免跨平台指纹不一致问题
-            config={
-                "forceScopeAccess": True,
-            },
-        ) as browser:
-            # 只有在缓存文件存在时才加载 storage_state
-            storage_state = cache_file_path if os.path.exists(cache_file_path) else None
-            if storage_state:
-                print(f"ℹ️ {self.account_name}: Found cache file, restore storage state")
-            else:
-                print(f"ℹ️ {self.account_name}: No cache file found, starting fresh")
+        # 未传入预启动的浏览器时在这里启动
+        if browser_session is None:
+            browser_session = OAuthBrowserSession(self.account_name, cache_file_path)
 
-            context = await browser.new_context(storage_state=storage_state)
+        async with browser_session:
+            context = await browser_session.get_context()
 
             # 设置从 auth_state 获取的 session cookies 到页面上下文
             if auth_cookies:
@@ -96,6 +85,8 @@ class GitHubSignIn:
             else:
                 print(f"ℹ️ {self.account_name}: No auth cookies to set")
 
+            resource_guard = ResourceGuard("github", self.account_name)
+            await resource_guard.attach(context)
             page = await context.new_page()
 
             async with ClickSolver(
@@ -368,5 +359,6 @@ class GitHubSignIn:
                     await take_screenshot(page, "github_page_navigation_error", self.account_name)
                     return False, {"error": "GitHub page navigation error"}, None
                 finally:
+                    await resource_guard.print_report()
                     await page.close()
                     await context.close()
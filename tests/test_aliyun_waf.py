@@ -0,0 +1,85 @@
+"""Tests for utils/aliyun_waf.py."""
+
+import pytest
+
+from utils import aliyun_waf
+from utils.aliyun_waf import ACW_SC_V2_MASK, compute_acw_sc_v2, extract_arg1, get_waf_cookies_with_http
+
+ARG1 = '0123456789ABCDEF0123456789ABCDEF01234567'
+
+
+class DummyResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.headers = {'content-type': 'text/html'}
+
+
+class DummyCookies(dict):
+    def set(self, name, value):
+        self[name] = value
+
+
+class DummySession:
+    def __init__(self, *args, **kwargs):
+        self.cookies = DummyCookies(acw_tc='tc-value')
+        self.responses = [
+            DummyResponse(f"<script>var arg1='{ARG1}';</script>"),
+            DummyResponse('<html>login</html>'),
+        ]
+
+    def get(self, url, headers=None, timeout=30):
+        self.request_headers = headers
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+class TestComputeAcwScV2:
+    def test_extract_arg1(self):
+        assert extract_arg1(f"var arg1='{ARG1}';") == ARG1
+        assert extract_arg1('<html>no challenge</html>') is None
+
+    def test_zero_permutation_returns_mask(self):
+        assert compute_acw_sc_v2('0' * 40) == ACW_SC_V2_MASK
+
+    def test_permutes_and_xors(self):
+        # arg1 第 15 位置换到首位，再与掩码首字节 0x30 异或
+        arg1 = '0' * 14 + 'f' + '0' * 25
+        assert compute_acw_sc_v2(arg1)[:2] == 'c0'
+
+    def test_rejects_unexpected_length(self):
+        with pytest.raises(ValueError):
+            compute_acw_sc_v2('abc')
+
+
+class TestGetWafCookiesWithHttp:
+    def test_solves_challenge(self, monkeypatch):
+        monkeypatch.setattr(aliyun_waf.curl_requests, 'Session', DummySession)
+        cookies = get_waf_cookies_with_http('test', 'https://example.com/login')
+        assert cookies == {'acw_tc': 'tc-value', 'acw_sc__v2': compute_acw_sc_v2(ARG1)}
+
+    def test_uses_profile_impersonate_and_headers(self, monkeypatch):
+        sessions = []
+
+        class RecordingSession(DummySession):
+            def __init__(self, *args, **kwargs):
+                super().__init__()
+                self.impersonate = kwargs.get('impersonate')
+                sessions.append(self)
+
+        monkeypatch.setattr(aliyun_waf.curl_requests, 'Session', RecordingSession)
+        headers = {'User-Agent': 'Mozilla/5.0 Firefox/140.0'}
+        assert get_waf_cookies_with_http('test', 'https://example.com/login', impersonate='firefox144', headers=headers)
+        assert sessions[0].impersonate == 'firefox144'
+        assert sessions[0].request_headers == headers
+
+    def test_unrecognized_challenge_returns_none(self, monkeypatch):
+        class ChallengeSession(DummySession):
+            def __init__(self, *args, **kwargs):
+                super().__init__()
+                self.responses = [DummyResponse('<html>new challenge</html>', status_code=405)]
+
+        monkeypatch.setattr(aliyun_waf.curl_requests, 'Session', ChallengeSession)
+        assert get_waf_cookies_with_http('test', 'https://example.com/login') is None
@@ -0,0 +1,171 @@
+"""Tests for utils/browser_readiness.py."""
+
+import asyncio
+import time
+
+from utils.browser_readiness import ReadinessStrategy, get_cf_page_state, wait_for_cookies, wait_until_ready
+from utils.config import ProviderConfig
+from utils.get_cf_clearance import wait_for_cf_clearance_manually
+
+
+class DummyContext:
+    def __init__(self, cookies=None):
+        self._cookies = dict(cookies or {})
+        self.calls = 0
+
+    async def cookies(self):
+        self.calls += 1
+        return [{'name': name, 'value': value} for name, value in self._cookies.items()]
+
+
+class DummyPage:
+    def __init__(self, state='complete'):
+        self.handlers = {}
+        self.state = state
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def fire(self, event):
+        for handler in list(self.handlers.get(event, [])):
+            handler(object())
+
+    async def evaluate(self, script, arg=None):
+        if self.state is None:
+            raise RuntimeError('Execution context was destroyed')
+        return self.state
+
+
+class TestWaitForCookies:
+    def test_resolves_on_response_event_before_poll_interval(self):
+        context = DummyContext({'__cf_bm': 'bm'})
+        page = DummyPage()
+
+        async def run():
+            async def set_cookie_later():
+                await asyncio.sleep(0.05)
+                context._cookies['cf_clearance'] = 'clear'
+                page.fire('response')
+
+            asyncio.create_task(set_cookie_later())
+            started = time.monotonic()
+            result = await wait_for_cookies(context, page, ['cf_clearance'], timeout=10000, poll_interval=10000)
+            return result, time.monotonic() - started
+
+        result, elapsed = asyncio.run(run())
+
+        assert result == {'cf_clearance': 'clear'}
+        assert elapsed < 1
+        assert all(not handlers for handlers in page.handlers.values())
+
+    def test_requires_all_names_unless_match_any(self):
+        context = DummyContext({'acw_tc': 'tc'})
+        page = DummyPage()
+
+        assert asyncio.run(wait_for_cookies(context, page, ['acw_tc', 'acw_sc__v2'], timeout=50, poll_interval=10)) is None
+        assert asyncio.run(
+            wait_for_cookies(context, page, ['acw_tc', 'acw_sc__v2'], timeout=50, match_any=True)
+        ) == {'acw_tc': 'tc'}
+
+    def test_stop_when_gives_up_early(self):
+        context = DummyContext()
+        page = DummyPage()
+
+        async def stop_when(cookies):
+            return True
+
+        async def run():
+            started = time.monotonic()
+            result = await wait_for_cookies(context, page, ['cf_clearance'], timeout=10000, stop_when=stop_when)
+            return result, time.monotonic() - started
+
+        result, elapsed = asyncio.run(run())
+
+        assert result is None
+        assert elapsed < 1
+
+
+class TestCfPageState:
+    def test_navigation_treated_as_loading(self):
+        assert asyncio.run(get_cf_page_state(DummyPage(state=None))) == 'loading'
+        assert asyncio.run(get_cf_page_state(DummyPage(state='challenge'))) == 'challenge'
+
+    def test_manual_wait_stops_when_page_stable_without_cookie(self):
+        context = DummyContext({'session': 'abc'})
+        page = DummyPage(state='complete')
+
+        async def run():
+            started = time.monotonic()
+            result = await wait_for_cf_clearance_manually(
+                context, page, 'acct', max_wait_time=10000, check_interval=20, max_loaded_checks_without_cf=2
+            )
+            return result, time.monotonic() - started
+
+        result, elapsed = asyncio.run(run())
+
+        assert result is False
+        assert elapsed < 1
+
+
+class SignalPage(DummyPage):
+    def __init__(self, response_delay=None, selector_delay=None):
+        super().__init__()
+        self.response_delay = response_delay
+        self.selector_delay = selector_delay
+        self.navigated = False
+
+    async def wait_for_event(self, event, predicate=None, timeout=None):
+        if self.response_delay is None:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError('response timeout')
+        await asyncio.sleep(self.response_delay)
+        return object()
+
+    async def wait_for_selector(self, selector, state='attached', timeout=None):
+        assert self.navigated
+        if self.selector_delay is None:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError('selector timeout')
+        await asyncio.sleep(self.selector_delay)
+        return object()
+
+    async def goto(self):
+        self.navigated = True
+
+
+class TestWaitUntilReady:
+    def test_first_signal_wins(self):
+        page = SignalPage(response_delay=0.01, selector_delay=5)
+        strategy = ReadinessStrategy(response_url='/api/status', selector='#traceid', timeout=10000)
+
+        async def run():
+            started = time.monotonic()
+            signal = await wait_until_ready(DummyContext(), page, strategy, trigger=page.goto)
+            return signal, time.monotonic() - started
+
+        signal, elapsed = asyncio.run(run())
+
+        assert signal == 'response'
+        assert elapsed < 1
+
+    def test_cookies_signal_and_timeout(self):
+        strategy = ReadinessStrategy(cookie_names=('acw_tc',), response_url='/api/status', timeout=10000)
+        assert asyncio.run(wait_until_ready(DummyContext({'acw_tc': 'tc'}), SignalPage(), strategy)) == 'cookies'
+
+        strategy = ReadinessStrategy(cookie_names=('acw_sc__v2',), selector='#app', timeout=50)
+        assert asyncio.run(wait_until_ready(DummyContext(), SignalPage(), strategy, trigger=SignalPage().goto)) is None
+
+    def test_provider_overrides(self):
+        waf = ProviderConfig(name='waf', origin='https://example.com', bypass_method='waf_cookies')
+        assert waf.get_readiness_strategy().cookie_names == ('acw_tc', 'acw_sc__v2')
+
+        custom = ProviderConfig.from_dict(
+            'custom', {'origin': 'https://example.com', 'readiness': {'selector': '#login', 'timeout': 5000}}
+        )
+        strategy = custom.get_readiness_strategy()
+        assert strategy.selector == '#login'
+        assert strategy.response_url == '/api/status'
+        assert strategy.timeout == 5000
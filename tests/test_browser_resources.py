@@ -0,0 +1,100 @@
+"""Tests for utils/browser_resources.py."""
+
+import asyncio
+
+from utils.browser_resources import FLOW_ALLOW_HOSTS, ResourceGuard, should_block_request
+
+
+class DummyRequest:
+    def __init__(self, url, resource_type, body_size=1000):
+        self.url = url
+        self.resource_type = resource_type
+        self.body_size = body_size
+
+    async def sizes(self):
+        return {'responseBodySize': self.body_size, 'responseHeadersSize': 24}
+
+
+class DummyRoute:
+    def __init__(self, request):
+        self.request = request
+        self.action = None
+
+    async def abort(self):
+        self.action = 'abort'
+
+    async def continue_(self):
+        self.action = 'continue'
+
+
+class DummyContext:
+    def __init__(self):
+        self.routes = []
+        self.handlers = {}
+        self.pages = []
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+
+class TestShouldBlockRequest:
+    def test_blocks_heavy_resources_and_trackers(self):
+        assert should_block_request('https://example.com/logo.png', 'image')
+        assert should_block_request('https://example.com/font.woff2', 'font')
+        assert should_block_request('https://www.googletagmanager.com/gtag/js', 'script')
+        assert not should_block_request('https://example.com/app.js', 'script')
+        assert not should_block_request('https://example.com/login', 'document')
+
+    def test_flow_allowlist(self):
+        allow = FLOW_ALLOW_HOSTS['aliyun_captcha']
+        assert not should_block_request('https://g.alicdn.com/captcha/slider.png', 'image', allow)
+        assert should_block_request('https://g.alicdn.com/captcha/slider.png', 'image')
+
+
+class TestResourceGuard:
+    def test_route_and_report(self):
+        async def run():
+            context = DummyContext()
+            guard = ResourceGuard('cf_clearance', 'acct', enabled=True)
+            await guard.attach(context)
+            _, handler = context.routes[0]
+
+            routes = [
+                DummyRoute(DummyRequest('https://example.com/', 'document')),
+                DummyRoute(DummyRequest('https://example.com/hero.jpg', 'image')),
+                DummyRoute(DummyRequest('https://challenges.cloudflare.com/turnstile.png', 'image')),
+            ]
+            for route in routes:
+                for on_request in context.handlers['request']:
+                    on_request(route.request)
+                await handler(route)
+                if route.action == 'continue':
+                    for on_finished in context.handlers['requestfinished']:
+                        on_finished(route.request)
+
+            return routes, await guard.print_report()
+
+        routes, report = asyncio.run(run())
+
+        assert [route.action for route in routes] == ['continue', 'abort', 'continue']
+        assert report['requests'] == 3
+        assert report['blocked'] == 1
+        assert report['bytes'] == 2048
+
+    def test_disabled_only_measures(self, monkeypatch):
+        monkeypatch.delenv('BROWSER_LIGHT_MODE', raising=False)
+
+        async def run():
+            context = DummyContext()
+            guard = ResourceGuard('linuxdo', 'acct')
+            await guard.attach(context)
+            return guard, context
+
+        guard, context = asyncio.run(run())
+
+        assert guard.enabled is False
+        assert context.routes == []
+        assert 'requestfinished' in context.handlers
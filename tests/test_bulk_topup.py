@@ -0,0 +1,151 @@
+"""Tests for bulk_topup.py."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+import bulk_topup
+from bulk_topup import inventory_key_hash, load_inventory, load_report, run_bulk_topup
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.topup_pipeline import AdaptiveTopupPacer
+
+
+def make_app_config() -> AppConfig:
+    return AppConfig(
+        providers={'test': ProviderConfig(name='test', origin='https://example.com')},
+        accounts=[
+            AccountConfig(provider='test', name='alice', cookies={'session': 's1'}, api_user='1'),
+            AccountConfig(provider='test', name='oauth-only'),
+        ],
+    )
+
+
+class TestLoadInventory:
+    def test_csv_and_dedupe(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'keys.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('provider,account,key\ntest,alice,K1\ntest,alice,K1\ntest,,K2\n')
+            assert load_inventory(path) == [{'provider': 'test', 'account': 'alice', 'key': 'K1'}]
+
+    def test_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'keys.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{"provider": "test", "account": "alice", "key": "K1"}\nnot json\n')
+            assert load_inventory(path) == [{'provider': 'test', 'account': 'alice', 'key': 'K1'}]
+
+
+class TestRunBulkTopup:
+    def test_redeems_and_reruns_idempotently(self, monkeypatch):
+        async def no_wait(self, account_name):
+            return None
+
+        monkeypatch.setattr(AdaptiveTopupPacer, 'wait', no_wait)
+        redeemed = []
+
+        def fake_topup(**kwargs):
+            redeemed.append(kwargs['key'])
+            if kwargs['key'] == 'USED':
+                return {'success': True, 'already_used': True, 'message': 'used'}
+            if kwargs['key'] == 'BAD':
+                return {'success': False, 'error': 'Topup failed: invalid(key: BAD)'}
+            return {'success': True, 'message': 'ok'}
+
+        monkeypatch.setattr(bulk_topup, 'topup', fake_topup)
+        rows = [
+            {'provider': 'test', 'account': 'alice', 'key': 'GOOD'},
+            {'provider': 'test', 'account': 'alice', 'key': 'USED'},
+            {'provider': 'test', 'account': 'alice', 'key': 'BAD'},
+            {'provider': 'test', 'account': 'oauth-only', 'key': 'X'},
+            {'provider': 'test', 'account': 'nobody', 'key': 'Y'},
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            report_file = os.path.join(tmpdir, 'report.json')
+            pacing_file = os.path.join(tmpdir, 'pacing.json')
+
+            counts = asyncio.run(
+                run_bulk_topup(rows, make_app_config(), {}, report_file, pacing_state_file=pacing_file)
+            )
+            assert counts['redeemed'] == 1
+            assert counts['already_used'] == 1
+            assert counts['failed'] == 1
+            assert counts['skipped'] == 2
+
+            report = load_report(report_file)
+            assert report[inventory_key_hash('test', 'GOOD')]['status'] == 'redeemed'
+            with open(report_file, encoding='utf-8') as f:
+                content = f.read()
+            assert 'GOOD' not in content
+            assert 'BAD' not in content
+
+            redeemed.clear()
+            counts = asyncio.run(
+                run_bulk_topup(rows, make_app_config(), report, report_file, pacing_state_file=pacing_file)
+            )
+            assert redeemed == ['BAD']
+            assert counts['done_before'] == 2
+
+    def test_accounts_share_provider_pacer_and_use_fingerprint(self, monkeypatch):
+        async def no_wait(self, account_name):
+            return None
+
+        monkeypatch.setattr(AdaptiveTopupPacer, 'wait', no_wait)
+        pacers = set()
+        sessions = []
+
+        def fake_topup(**kwargs):
+            if kwargs['key'] == 'SLOW':
+                return {'success': False, 'rate_limited': True, 'retry_after': None, 'error': 'HTTP 429'}
+            return {'success': True, 'message': 'ok'}
+
+        original_mark = AdaptiveTopupPacer.mark
+
+        def mark(self, result=None):
+            pacers.add(id(self))
+            original_mark(self, result)
+
+        class DummySession:
+            def __init__(self, impersonate=None, **kwargs):
+                sessions.append(impersonate)
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(AdaptiveTopupPacer, 'mark', mark)
+        monkeypatch.setattr(bulk_topup, 'topup', fake_topup)
+        monkeypatch.setattr(bulk_topup.curl_requests, 'Session', DummySession)
+        app_config = make_app_config()
+        app_config.accounts.append(AccountConfig(provider='test', name='bob', cookies={'session': 's2'}, api_user='2'))
+        rows = [
+            {'provider': 'test', 'account': 'alice', 'key': 'SLOW'},
+            {'provider': 'test', 'account': 'bob', 'key': 'FAST'},
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setattr(
+                bulk_topup.FingerprintProfileStore,
+                'profile',
+                lambda self, account_name, proxy_config: type(
+                    'Profile', (), {'impersonate': f'chrome-{account_name}', 'browser_headers': lambda self: None}
+                )(),
+            )
+            pacing_file = os.path.join(tmpdir, 'pacing.json')
+            asyncio.run(
+                run_bulk_topup(
+                    rows,
+                    app_config,
+                    {},
+                    os.path.join(tmpdir, 'report.json'),
+                    pacing_state_file=pacing_file,
+                    fingerprint_profiles_file=os.path.join(tmpdir, 'profiles.json'),
+                )
+            )
+
+            assert len(pacers) == 1
+            assert sorted(sessions) == ['chrome-alice', 'chrome-bob']
+            # bob 的成功不会覆盖 alice 学习到的限频间隔
+            assert AdaptiveTopupPacer('test', pacing_file).rate_limited_interval is not None
@@ -0,0 +1,42 @@
+"""Tests for utils/bypass_stats.py"""
+
+import os
+import tempfile
+
+from utils.bypass_stats import format_challenge_rate, load_bypass_stats, record_bypass_probe, record_solve_latency
+
+
+class TestBypassStats:
+    def test_record_probe(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats_file = os.path.join(tmpdir, "bypass_stats.json")
+
+            record_bypass_probe(stats_file, "anyrouter", None)
+            provider_stats = record_bypass_probe(stats_file, "anyrouter", "aliyun_waf")
+
+            assert provider_stats["probes"] == 2
+            assert provider_stats["challenges"] == 1
+            assert provider_stats["by_kind"] == {"aliyun_waf": 1}
+            assert load_bypass_stats(stats_file)["anyrouter"]["probes"] == 2
+
+    def test_record_solve_latency(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats_file = os.path.join(tmpdir, "bypass_stats.json")
+
+            record_bypass_probe(stats_file, "runawaytime", None)
+            record_solve_latency(stats_file, "runawaytime", 4000, True)
+            record_solve_latency(stats_file, "runawaytime", 9000, False)
+            solve_stats = record_solve_latency(stats_file, "runawaytime", 2000, True)
+
+            assert solve_stats["attempts"] == 3
+            assert solve_stats["solved"] == 2
+            assert solve_stats["avg_ms"] == 3000
+            assert solve_stats["last_ms"] == 2000
+            assert load_bypass_stats(stats_file)["runawaytime"]["probes"] == 1
+
+    def test_load_nonexistent_file(self):
+        assert load_bypass_stats("/nonexistent/path/bypass_stats.json") == {}
+
+    def test_format_challenge_rate(self):
+        assert format_challenge_rate({"probes": 4, "challenges": 1}) == "1/4 (25%)"
+        assert format_challenge_rate({}) == "0/0"
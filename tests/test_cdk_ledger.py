@@ -0,0 +1,97 @@
+"""Tests for utils/cdk_ledger.py"""
+
+import os
+import tempfile
+
+from utils.cdk_ledger import MAX_REDEEM_ATTEMPTS, CdkCipher, CdkLedger, open_cdk_ledger
+
+
+class TestCdkCipher:
+    def test_round_trip(self):
+        cipher = CdkCipher("secret")
+        token = cipher.encrypt("CDK-12345")
+        assert "CDK-12345" not in token
+        assert cipher.decrypt(token) == "CDK-12345"
+
+    def test_wrong_key_returns_none(self):
+        token = CdkCipher("secret").encrypt("CDK-12345")
+        assert CdkCipher("other").decrypt(token) is None
+
+
+class TestCdkLedger:
+    def test_pending_codes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, "cdk_ledger.jsonl")
+            ledger = CdkLedger(ledger_file, "b4u", "acct", "secret")
+            for code in ["a", "b", "c", "d"]:
+                ledger.record_acquired(code)
+            ledger.record_result("a", {"success": True})
+            ledger.record_result("b", {"success": True, "already_used": True})
+            ledger.record_result("c", {"success": False, "error": "HTTP 500"})
+
+            assert ledger.pending_codes() == ["c", "d"]
+            # 其他账号的记录互不影响
+            assert CdkLedger(ledger_file, "b4u", "other", "secret").pending_codes() == []
+
+            with open(ledger_file, encoding="utf-8") as f:
+                assert '"d"' not in f.read()
+
+    def test_gives_up_after_max_failures(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger = CdkLedger(os.path.join(tmpdir, "cdk_ledger.jsonl"), "b4u", "acct", "secret")
+            ledger.record_acquired("a")
+            for _ in range(MAX_REDEEM_ATTEMPTS):
+                ledger.record_result("a", {"success": False})
+            assert ledger.pending_codes() == []
+
+    def test_ignores_truncated_line(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, "cdk_ledger.jsonl")
+            ledger = CdkLedger(ledger_file, "b4u", "acct", "secret")
+            ledger.record_acquired("a")
+            with open(ledger_file, "a", encoding="utf-8") as f:
+                f.write('{"event": "acq')
+            assert ledger.pending_codes() == ["a"]
+
+    def test_rejected_code_is_terminal(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger = CdkLedger(os.path.join(tmpdir, "cdk_ledger.jsonl"), "b4u", "acct", "secret")
+            ledger.record_acquired("a")
+            ledger.record_result("a", {"success": False, "error": "invalid CDK", "terminal": True})
+            assert ledger.pending_codes() == []
+
+    def test_error_is_stored_without_plaintext_code(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, "cdk_ledger.jsonl")
+            ledger = CdkLedger(ledger_file, "b4u", "acct", "secret")
+            ledger.record_acquired("SECRETCODE123")
+            ledger.record_result(
+                "SECRETCODE123", {"success": False, "error": "Topup failed: HTTP 500(key: SECRETCODE123)"}
+            )
+            ledger.record_result(
+                "SECRETCODE123", {"success": False, "error": "SECRETCODE123 is invalid", "terminal": True}
+            )
+
+            with open(ledger_file, encoding="utf-8") as f:
+                raw = f.read()
+            assert "SECRETCODE123" not in raw
+            assert "Topup failed: HTTP 500" in raw
+
+    def test_key_mismatch_warns(self, capsys):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, "cdk_ledger.jsonl")
+            assert CdkLedger(ledger_file, "b4u", "acct", "secret").verify_key() is True
+            assert CdkLedger(ledger_file, "b4u", "acct", "secret").verify_key() is True
+            assert CdkLedger(ledger_file, "b4u", "acct", "changed").verify_key() is False
+            assert "key mismatch" in capsys.readouterr().out
+
+    def test_accounts_secret_is_not_used_as_key(self, monkeypatch):
+        monkeypatch.delenv("CDK_LEDGER_KEY", raising=False)
+        monkeypatch.setenv("ACCOUNTS", "[]")
+        assert open_cdk_ledger("/tmp/cdk_ledger.jsonl", "b4u", "acct") is None
+
+    def test_disabled_without_secret(self, monkeypatch):
+        monkeypatch.delenv("CDK_LEDGER_KEY", raising=False)
+        monkeypatch.delenv("ACCOUNTS", raising=False)
+        assert open_cdk_ledger("/tmp/cdk_ledger.jsonl", "b4u", "acct") is None
+        assert open_cdk_ledger(None, "b4u", "acct") is None
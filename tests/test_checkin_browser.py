@@ -0,0 +1,133 @@
+"""Tests for utils/checkin_browser.py."""
+
+from __future__ import annotations
+
+import asyncio
+
+from checkin import CheckIn
+from utils.checkin_browser import BrowserSessionBroker
+from utils.config import AccountConfig, ProviderConfig
+
+
+class DummyPage:
+    def __init__(self, responses: dict, local_status: str | None = None):
+        self.responses = responses
+        self.local_status = local_status
+        self.batches = []
+
+    async def evaluate(self, script: str, arg=None):
+        if arg is None:
+            return self.local_status
+        self.batches.append(sorted(arg.keys()))
+        return {name: self.responses[name] for name in arg}
+
+
+class DummyBrowser:
+    async def cookies(self):
+        return [{'name': 'session', 'value': 'abc'}]
+
+
+def make_broker(page: DummyPage) -> BrowserSessionBroker:
+    broker = BrowserSessionBroker('acct', 'acct', None, ProviderConfig(name='test', origin='https://example.com'))
+    broker.page = page
+    broker.browser = DummyBrowser()
+    return broker
+
+
+class TestBrowserSessionBroker:
+    def test_prefetch_batches_requests_into_one_evaluate(self):
+        page = DummyPage(
+            {
+                'auth_state': {'success': True, 'data': 'state-1'},
+                'user_info': {'success': True, 'data': {'quota': 1000000, 'used_quota': 500000}},
+            }
+        )
+        broker = make_broker(page)
+
+        async def run():
+            await broker.prefetch('auth_state', 'user_info')
+            return await broker.get_auth_state(), await broker.get_user_info(500000)
+
+        auth_state, user_info = asyncio.run(run())
+
+        assert page.batches == [['auth_state', 'user_info']]
+        assert auth_state == {'success': True, 'state': 'state-1', 'cookies': [{'name': 'session', 'value': 'abc'}]}
+        assert user_info['success'] is True
+        assert user_info['quota'] == 2.0
+        assert user_info['used_quota'] == 1.0
+
+    def test_user_info_failure_shape(self):
+        broker = make_broker(DummyPage({'user_info': {'success': False, 'message': 'blocked'}}))
+        result = asyncio.run(broker.get_user_info(500000))
+        assert result['success'] is False
+        assert result['error'].startswith('Failed to get user info')
+
+    def test_status_prefers_local_storage(self):
+        page = DummyPage({'status': {'success': True, 'data': {'from': 'api'}}}, local_status='{"from": "local"}')
+        assert asyncio.run(make_broker(page).get_status()) == {'from': 'local'}
+        assert page.batches == []
+
+    def test_status_falls_back_to_api(self):
+        page = DummyPage({'status': {'success': True, 'data': {'from': 'api'}}})
+        assert asyncio.run(make_broker(page).get_status()) == {'from': 'api'}
+
+
+class TestOAuthBrowserFallback:
+    def _checkin(self, tmp_path, page: DummyPage) -> CheckIn:
+        checkin = CheckIn(
+            'acct',
+            AccountConfig(),
+            ProviderConfig(name='test', origin='https://example.com'),
+            storage_state_dir=str(tmp_path),
+        )
+        broker = make_broker(page)
+        opened = []
+
+        class BrokerScope:
+            async def __aenter__(self):
+                opened.append(broker)
+                return broker
+
+            async def __aexit__(self, *args):
+                return None
+
+        checkin.browser_session_broker = lambda auth_cookies=None: BrokerScope()
+        checkin.opened_brokers = opened
+        return checkin
+
+    def test_client_id_and_auth_state_share_one_page(self, tmp_path):
+        page = DummyPage(
+            {
+                'status': {'success': True, 'data': {'linuxdo_oauth': True, 'linuxdo_client_id': 'cid'}},
+                'auth_state': {'success': True, 'data': 'state-1'},
+            }
+        )
+        checkin = self._checkin(tmp_path, page)
+
+        client_id, auth_state = asyncio.run(checkin.get_oauth_prerequisites_with_browser('linuxdo'))
+
+        assert len(checkin.opened_brokers) == 1
+        assert page.batches == [['auth_state', 'status']]
+        assert client_id == {'success': True, 'client_id': 'cid'}
+        assert auth_state['state'] == 'state-1'
+
+    def test_known_client_id_only_fetches_auth_state(self, tmp_path):
+        page = DummyPage({'auth_state': {'success': True, 'data': 'state-1'}})
+        checkin = self._checkin(tmp_path, page)
+        known = {'success': True, 'client_id': 'cid'}
+
+        client_id, auth_state = asyncio.run(checkin.get_oauth_prerequisites_with_browser('linuxdo', known))
+
+        assert client_id is known
+        assert page.batches == [['auth_state']]
+        assert auth_state['success'] is True
+
+    def test_fallback_only_after_lazy_bypass_is_spent(self, tmp_path):
+        checkin = self._checkin(tmp_path, DummyPage({}))
+        challenged = {'success': False, 'challenge': 'aliyun_waf'}
+
+        checkin._defer_bypass = True
+        assert checkin._should_fallback_to_browser(challenged) is False
+        checkin._lazy_bypass_upgrade = ({}, {})
+        assert checkin._should_fallback_to_browser(challenged) is True
+        assert checkin._should_fallback_to_browser({'success': False}) is False
@@ -60,6 +60,22 @@ class TestProviderConfig:
         config2 = ProviderConfig(name="test", origin="https://example.com", bypass_method="cf_clearance")
         assert config2.needs_waf_cookies() is False
 
+    def test_should_defer_bypass(self, monkeypatch):
+        monkeypatch.delenv("LAZY_BYPASS", raising=False)
+        config = ProviderConfig(name="test", origin="https://example.com", bypass_method="waf_cookies")
+        assert config.should_defer_bypass() is False
+
+        config2 = ProviderConfig(
+            name="test", origin="https://example.com", bypass_method="waf_cookies", lazy_bypass=True
+        )
+        assert config2.should_defer_bypass() is True
+
+        config3 = ProviderConfig(name="test", origin="https://example.com", lazy_bypass=True)
+        assert config3.should_defer_bypass() is False
+
+        monkeypatch.setenv("LAZY_BYPASS", "true")
+        assert config.should_defer_bypass() is True
+
     def test_needs_cf_clearance(self):
         config = ProviderConfig(name="test", origin="https://example.com", bypass_method="cf_clearance")
         assert config.needs_cf_clearance() is True
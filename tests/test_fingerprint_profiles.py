@@ -0,0 +1,92 @@
+"""Tests for utils/fingerprint_profiles.py."""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from utils.fingerprint_profiles import (
+    FingerprintProfileStore,
+    camoufox_fingerprint_options,
+    profile_key,
+)
+
+PROXY = {'server': 'http://proxy.example:8080', 'username': 'user', 'password': 'secret'}
+
+
+class DummyGenerator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, os_name):
+        self.calls.append(os_name)
+        return {'navigator': {'userAgent': f'Mozilla/5.0 Firefox/135.0 #{len(self.calls)}'}}
+
+
+class DummyPage:
+    async def evaluate(self, script):
+        return {'User-Agent': 'Mozilla/5.0 (Macintosh) Gecko/20100101 Firefox/144.0', '_isFirefox': True}
+
+
+class TestFingerprintProfiles:
+    def test_profile_key_separates_accounts_and_proxies(self):
+        assert profile_key('acct', PROXY) == profile_key('acct', dict(PROXY))
+        assert profile_key('acct', PROXY) != profile_key('acct', None)
+        assert profile_key('acct', PROXY) != profile_key('other', PROXY)
+        assert 'secret' not in profile_key('acct', PROXY)
+
+    def test_fingerprint_generated_once_and_reused_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fingerprint_profiles.json')
+            generator = DummyGenerator()
+
+            first = FingerprintProfileStore(path, generator).profile('acct', PROXY).camoufox_options()
+            second = FingerprintProfileStore(path, generator).profile('acct', PROXY).camoufox_options()
+
+            assert generator.calls == ['macos']
+            assert first == second
+            assert first['os'] == 'macos'
+            assert first['i_know_what_im_doing'] is True
+
+            FingerprintProfileStore(path, generator).profile('acct', None).camoufox_options()
+            assert len(generator.calls) == 2
+            with open(path, 'r', encoding='utf-8') as f:
+                assert len(json.load(f)) == 2
+
+    def test_generation_failure_falls_back_to_random_fingerprint(self):
+        def failing_generator(os_name):
+            raise RuntimeError('model unavailable')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fingerprint_profiles.json')
+            profile = FingerprintProfileStore(path, failing_generator).profile('acct', None)
+
+            assert profile.camoufox_options() == {'os': 'macos'}
+            assert not os.path.exists(path)
+        assert camoufox_fingerprint_options(None) == {'os': 'macos'}
+
+    def test_captured_headers_drive_http_identity(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fingerprint_profiles.json')
+            profile = FingerprintProfileStore(path, DummyGenerator()).profile('acct', PROXY)
+            assert profile.browser_headers() is None
+            assert profile.impersonate == 'firefox135'
+
+            headers = asyncio.run(profile.capture(DummyPage()))
+
+            assert headers == {'User-Agent': 'Mozilla/5.0 (Macintosh) Gecko/20100101 Firefox/144.0'}
+            reloaded = FingerprintProfileStore(path).profile('acct', PROXY)
+            assert reloaded.browser_headers() == headers
+            assert reloaded.impersonate == 'firefox144'
+
+    def test_record_headers_keeps_client_hints(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fingerprint_profiles.json')
+            store = FingerprintProfileStore(path, DummyGenerator())
+            store.profile('acct', None).record_headers(
+                {'User-Agent': 'Mozilla/5.0 Chrome/131.0.0.0 Safari/537.36', 'sec-ch-ua-mobile': '?0'}
+            )
+
+            reloaded = store.profile('acct', None)
+            assert reloaded.browser_headers()['sec-ch-ua-mobile'] == '?0'
+            assert reloaded.impersonate == 'chrome131'
@@ -1,6 +1,6 @@
 """Tests for utils/http_utils.py."""
 
-from utils.http_utils import classify_transport_error
+from utils.http_utils import classify_transport_error, detect_challenge
 
 
 class TestClassifyTransportError:
@@ -15,3 +15,32 @@ class TestClassifyTransportError:
     def test_classifies_dns(self):
         error = RuntimeError('Could not resolve host: example.com')
         assert classify_transport_error(error).startswith('DNS resolution failed:')
+
+
+class DummyResponse:
+    def __init__(self, status_code=200, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class TestDetectChallenge:
+    def test_json_response_is_not_challenge(self):
+        response = DummyResponse(200, '{"success": true}', {'content-type': 'application/json'})
+        assert detect_challenge(response) is None
+
+    def test_detects_aliyun_waf(self):
+        response = DummyResponse(200, "<script>var arg1='ABCDEF';</script>", {'content-type': 'text/html'})
+        assert detect_challenge(response) == 'aliyun_waf'
+
+    def test_detects_cloudflare(self):
+        response = DummyResponse(403, '<title>Just a moment...</title>', {'content-type': 'text/html'})
+        assert detect_challenge(response) == 'cloudflare'
+
+    def test_detects_generic_waf_status(self):
+        response = DummyResponse(403, '<html>Forbidden</html>', {'content-type': 'text/html'})
+        assert detect_challenge(response) == 'waf'
+
+    def test_plain_html_is_not_challenge(self):
+        response = DummyResponse(200, '<html>ok</html>', {'content-type': 'text/html'})
+        assert detect_challenge(response) is None
@@ -0,0 +1,146 @@
+"""Tests for utils/linuxdo_api.py."""
+
+import asyncio
+
+from utils.linuxdo_api import LinuxDoApiClient, classify_topic_probe, is_challenge_response, to_json_url
+
+
+class DummyResponse:
+    def __init__(self, data=None, status_code=200, text=''):
+        self.data = data
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        if self.data is None:
+            raise ValueError('not json')
+        return self.data
+
+
+class DummyCookies:
+    def __init__(self):
+        self.items = {}
+
+    def set(self, name, value, domain=None, path=None):
+        self.items[name] = (value, domain, path)
+
+
+class DummyAsyncSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.cookies = DummyCookies()
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get(self, url, headers=None, timeout=30):
+        self.requests.append((url, headers))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.responses[url]
+
+
+def topic_page(ids, more=None):
+    topic_list = {'topics': [{'id': i, 'slug': f't{i}', 'archetype': 'regular'} for i in ids]}
+    if more:
+        topic_list['more_topics_url'] = more
+    return DummyResponse({'topic_list': topic_list})
+
+
+class TestHelpers:
+    def test_to_json_url(self):
+        assert to_json_url('https://linux.do/latest') == 'https://linux.do/latest.json'
+        assert to_json_url('/latest?no_definitions=true&page=1') == 'https://linux.do/latest.json?no_definitions=true&page=1'
+        assert to_json_url('/top.json?page=2') == 'https://linux.do/top.json?page=2'
+
+    def test_is_challenge_response(self):
+        assert is_challenge_response(403, '<html><title>Just a moment...</title></html>')
+        assert is_challenge_response(503, '<html><body>blocked</body></html>')
+        assert not is_challenge_response(404, 'not found')
+
+
+class TestFetchTopicLists:
+    def test_paginates_concurrently_until_enough_topics(self):
+        session = DummyAsyncSession(
+            {
+                'https://linux.do/latest.json': topic_page([1, 2], more='/latest?page=1'),
+                'https://linux.do/new.json': topic_page([2, 3], more='/new?page=1'),
+                'https://linux.do/latest.json?page=1': topic_page([4, 5], more='/latest?page=2'),
+                'https://linux.do/new.json?page=1': topic_page([6], more='/new?page=2'),
+            }
+        )
+        client = LinuxDoApiClient(
+            cookies=[{'name': '_t', 'value': 'token', 'domain': '.linux.do'}], user_agent='UA', session=session
+        )
+
+        results = asyncio.run(
+            client.fetch_topic_lists(['https://linux.do/latest', 'https://linux.do/new'], max_topics=5)
+        )
+
+        assert session.peak == 2
+        assert len(session.requests) == 4
+        assert len(results['https://linux.do/latest']['pages']) == 2
+        assert len(results['https://linux.do/new']['pages']) == 2
+        assert session.cookies.items['_t'] == ('token', '.linux.do', '/')
+        assert session.requests[0][1]['user-agent'] == 'UA'
+
+    def test_challenge_marks_source(self):
+        session = DummyAsyncSession(
+            {
+                'https://linux.do/latest.json': DummyResponse(
+                    status_code=403, text='<html><title>Just a moment...</title></html>'
+                ),
+                'https://linux.do/top.json': topic_page([7]),
+            }
+        )
+        client = LinuxDoApiClient(session=session)
+
+        results = asyncio.run(
+            client.fetch_topic_lists(['https://linux.do/latest', 'https://linux.do/top'], max_topics=10)
+        )
+
+        assert results['https://linux.do/latest']['success'] is False
+        assert results['https://linux.do/latest']['challenge'] is True
+        assert results['https://linux.do/top']['success'] is True
+        assert len(session.requests) == 2
+
+
+class TestProbeTopics:
+    def test_classify_topic_probe(self):
+        valid = classify_topic_probe(
+            5, {'status': 200, 'data': {'id': 5, 'slug': 'hi', 'archetype': 'regular', 'highest_post_number': 9}}
+        )
+        assert valid['status'] == 'valid'
+        assert valid['url'] == 'https://linux.do/t/hi/5'
+        assert valid['highest_post_number'] == 9
+
+        assert classify_topic_probe(5, {'status': 200, 'data': {'id': 5, 'visible': False}})['status'] == 'invalid'
+        assert classify_topic_probe(5, {'status': 200, 'data': {'id': 5, 'archetype': 'private_message'}})[
+            'status'
+        ] == 'invalid'
+        assert classify_topic_probe(5, {'status': 404, 'data': {'errors': ['not found']}})['status'] == 'invalid'
+        assert classify_topic_probe(5, {'status': 429, 'data': {}})['status'] == 'rate_limited'
+        assert classify_topic_probe(5, {'status': 403, 'challenge': True})['status'] == 'challenge'
+        assert classify_topic_probe(5, {'success': False, 'error': 'timeout'})['status'] == 'error'
+
+    def test_probes_concurrently_and_stops_on_challenge(self):
+        responses = {
+            f'https://linux.do/t/{i}.json': DummyResponse({'id': i, 'slug': f't{i}', 'archetype': 'regular'})
+            for i in range(1, 4)
+        }
+        responses['https://linux.do/t/4.json'] = DummyResponse(status_code=404, data={'errors': ['not found']})
+        responses['https://linux.do/t/5.json'] = DummyResponse(
+            status_code=403, text='<html><title>Just a moment...</title></html>'
+        )
+        responses.update(
+            {f'https://linux.do/t/{i}.json': DummyResponse({'id': i, 'archetype': 'regular'}) for i in range(6, 20)}
+        )
+        session = DummyAsyncSession(responses)
+        client = LinuxDoApiClient(session=session)
+
+        results = asyncio.run(client.probe_topics(list(range(1, 20)), max_in_flight=1, min_interval=0))
+
+        assert [results[i]['status'] for i in range(1, 6)] == ['valid', 'valid', 'valid', 'invalid', 'challenge']
+        assert len(session.requests) == 5
@@ -0,0 +1,80 @@
+"""Tests for utils/linuxdo_id_density.py."""
+
+import os
+import random
+import tempfile
+
+from linuxdo_read_posts import LinuxDoReadPosts, ReadRuntimeState, should_retry_from_base
+from utils.linuxdo_id_density import TopicIdDensityIndex
+
+
+class TestTopicIdDensityIndex:
+    def test_record_tracks_density_and_max_valid_id(self):
+        index = TopicIdDensityIndex('unused.json', bucket_size=100)
+        index.record(1_050, True)
+        index.record(1_060, False)
+        index.record(1_070, False)
+        index.observe([1_500, 900])
+
+        assert index.buckets == {10: [1, 3]}
+        assert index.density(10) == 2 / 5
+        assert index.density(11) == 0.5
+        assert index.max_valid_id == 1_500
+
+    def test_sample_window_prefers_dense_ranges_near_max(self):
+        index = TopicIdDensityIndex('unused.json', bucket_size=100, span_buckets=5)
+        index.max_valid_id = 1_050
+        for topic_id in range(900, 1_000):
+            index.record(topic_id, False)
+        for topic_id in range(800, 900):
+            index.record(topic_id, topic_id % 2 == 0)
+
+        window = index.sample_window(20, skip=lambda topic_id: topic_id == 1_000, rng=random.Random(7))
+
+        assert window == sorted(window)
+        assert len(window) == 20
+        assert all(600 <= topic_id <= 1_050 for topic_id in window)
+        assert 1_000 not in window
+        assert len([topic_id for topic_id in window if 900 <= topic_id < 1_000]) <= 2
+
+    def test_empty_index_samples_nothing(self):
+        index = TopicIdDensityIndex('unused.json')
+        assert index.sample_window(10) == []
+        assert index.suggested_base() is None
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'density.json')
+            index = TopicIdDensityIndex(path)
+            index.record(1_234_567, True)
+            index.record(1_234_999, False)
+            index.save()
+
+            loaded = TopicIdDensityIndex(path).load()
+            assert loaded.max_valid_id == 1_234_567
+            assert loaded.buckets == {1_234: [1, 2]}
+            assert loaded.suggested_base() == 1_185_000
+
+    def test_retry_from_base_uses_learned_max_id(self):
+        index = TopicIdDensityIndex('unused.json')
+        index.observe([1_300_000])
+        state = ReadRuntimeState(last_topic_id=1_200_000)
+
+        assert should_retry_from_base(state, base_topic_id=1_000_000, valid_topics=0) is True
+        assert should_retry_from_base(state, base_topic_id=1_000_000, valid_topics=0, id_density=index) is False
+        state.last_topic_id = 1_300_001
+        assert should_retry_from_base(state, base_topic_id=1_000_000, valid_topics=0, id_density=index) is True
+
+    def test_reader_window_samples_and_skips_read_topics(self, tmp_path):
+        index = TopicIdDensityIndex(str(tmp_path / 'density.json'), bucket_size=10, span_buckets=1)
+        index.observe([1_009])
+        reader = LinuxDoReadPosts(
+            'user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path), id_density=index
+        )
+        reader.read_index.mark(1_003, 1)
+        reader._probed_topic_ids.add(1_004)
+
+        window = reader._next_topic_window(ReadRuntimeState(last_topic_id=5), base_topic_id=5, size=4)
+
+        assert len(window) == 4
+        assert set(window) <= {1_000, 1_001, 1_002, 1_005, 1_006, 1_007, 1_008, 1_009}
@@ -0,0 +1,69 @@
+"""Tests for utils/linuxdo_read_index.py."""
+
+import json
+import os
+import tempfile
+
+from linuxdo_read_posts import extract_topic_meta_from_api
+from utils.linuxdo_read_index import ReadTopicIndex
+
+
+class TestReadTopicIndex:
+    def test_mark_keeps_sorted_and_highest_post(self):
+        index = ReadTopicIndex('unused.json')
+        index.mark(30, 5)
+        index.mark(10, 2)
+        index.mark(30, 3)
+        index.mark(20, 0)
+
+        assert index.ids == [10, 20, 30]
+        assert index.get(30) == 5
+        assert index.get(20) == 1
+        assert 40 not in index
+
+    def test_round_trip_uses_delta_encoding(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'read_index.json')
+            index = ReadTopicIndex(path)
+            for topic_id, post in [(1_000_100, 7), (1_000_000, 3), (1_000_105, 1)]:
+                index.mark(topic_id, post)
+            index.save()
+
+            with open(path, 'r', encoding='utf-8') as f:
+                assert json.load(f)['ids'] == [1_000_000, 100, 5]
+
+            loaded = ReadTopicIndex(path).load()
+            assert loaded.ids == [1_000_000, 1_000_100, 1_000_105]
+            assert loaded.posts == [3, 7, 1]
+
+    def test_max_topics_drops_oldest(self):
+        index = ReadTopicIndex('unused.json', max_topics=2)
+        for topic_id in (3, 1, 2):
+            index.mark(topic_id, 1)
+        assert index.ids == [2, 3]
+
+    def test_filter_candidates_prefers_unread_then_partial(self):
+        index = ReadTopicIndex('unused.json')
+        index.mark(1, 10)
+        index.mark(2, 4)
+        index.mark(3, 2)
+        candidates = [(1, 'u1'), (2, 'u2'), (3, 'u3'), (4, 'u4')]
+        meta = {1: {'highest_post_number': 10}, 2: {'highest_post_number': 9}}
+
+        ordered, skipped = index.filter_candidates(candidates, meta)
+
+        assert ordered == [(4, 'u4'), (2, 'u2'), (3, 'u3')]
+        assert skipped == 1
+
+    def test_extract_topic_meta_from_api(self):
+        payload = {
+            'topic_list': {
+                'topics': [
+                    {'id': 5, 'posts_count': 12, 'highest_post_number': 14, 'last_read_post_number': 3},
+                    {'id': 6},
+                ]
+            }
+        }
+        meta = extract_topic_meta_from_api(payload)
+        assert meta[5] == {'posts_count': 12, 'highest_post_number': 14, 'last_read_post_number': 3}
+        assert meta[6]['highest_post_number'] == 0
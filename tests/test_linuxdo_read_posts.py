@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import shutil
 import uuid
 from pathlib import Path
 
+import linuxdo_read_posts
 from linuxdo_read_posts import (
     LinuxDoReadPosts,
     ReadRuntimeState,
@@ -201,3 +203,505 @@ class TestExtractTopicCandidatesFromApi:
         }
         candidates = extract_topic_candidates_from_api(payload)
         assert candidates == [(123, 'https://linux.do/t/hello-world/123')]
+
+
+class TestDiscoverTopicCandidates:
+    def test_api_pages_merged_and_dom_used_only_for_challenges(self, monkeypatch, tmp_path):
+        api_results = {
+            'https://linux.do/latest': {
+                'success': True,
+                'status': 200,
+                'pages': [
+                    {'topic_list': {'topics': [{'id': 1, 'slug': 'a'}, {'id': 2, 'slug': 'b'}]}},
+                    {'topic_list': {'topics': [{'id': 2, 'slug': 'b'}, {'id': 3, 'slug': 'c'}]}},
+                ],
+            },
+            'https://linux.do/new': {'success': False, 'status': 403, 'challenge': True, 'pages': []},
+            'https://linux.do/top': {'success': False, 'status': 500, 'error': 'boom', 'pages': []},
+        }
+
+        class DummyClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return None
+
+            async def fetch_topic_lists(self, list_urls, max_topics):
+                return api_results
+
+        async def from_context(context, page=None):
+            return DummyClient()
+
+        monkeypatch.setattr(linuxdo_read_posts.LinuxDoApiClient, 'from_context', staticmethod(from_context))
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        dom_calls = []
+
+        async def via_dom(page, candidate_page):
+            dom_calls.append(candidate_page)
+            return [(4, 'https://linux.do/t/d/4')]
+
+        async def collect_debug(page, source_key, candidate_count):
+            return {'candidate_count': candidate_count}
+
+        monkeypatch.setattr(reader, '_discover_topic_candidates_via_dom', via_dom)
+        monkeypatch.setattr(reader, '_collect_discovery_debug', collect_debug)
+
+        class DummyPage:
+            context = None
+
+        candidates, counts = asyncio.run(reader._discover_topic_candidates(DummyPage(), max_candidates=10))
+
+        assert [topic_id for topic_id, _ in candidates] == [1, 2, 3, 4]
+        assert counts == {'latest': 3, 'new': 1, 'top': 0}
+        assert dom_calls == ['https://linux.do/new']
+        assert reader._last_discovery_debug['latest']['api_pages'] == 2
+
+
+class TestReadTopicsInTabs:
+    def _reader(self, monkeypatch, tmp_path, pages_per_topic=2, delays=None):
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        visited = []
+        delays = delays or {}
+
+        async def visit(page, topic_id, topic_url):
+            visited.append((page.name, topic_id))
+            await asyncio.sleep(delays.get(topic_id, 0.01))
+            return linuxdo_read_posts.TopicVisitResult(
+                topic_id=topic_id, url=topic_url, status='valid', pages_read=pages_per_topic, highest_post_number=3
+            )
+
+        monkeypatch.setattr(reader, '_visit_topic_url', visit)
+        return reader, visited
+
+    def _context_page(self):
+        class DummyPage:
+            def __init__(self, name, context):
+                self.name = name
+                self.context = context
+                self.closed = False
+
+            async def close(self):
+                self.closed = True
+
+        class DummyContext:
+            def __init__(self):
+                self.pages = []
+
+            async def new_page(self):
+                page = DummyPage(f'tab{len(self.pages) + 1}', self)
+                self.pages.append(page)
+                return page
+
+        context = DummyContext()
+        return DummyPage('tab0', context), context
+
+    def test_results_keep_candidate_order_and_extra_tabs_closed(self, monkeypatch, tmp_path):
+        reader, visited = self._reader(monkeypatch, tmp_path, delays={1: 0.05})
+        page, context = self._context_page()
+        topics = [(i, f'https://linux.do/t/t/{i}') for i in range(1, 7)]
+        state = ReadRuntimeState()
+        budget = linuxdo_read_posts.ReadBudget(max_posts=100, max_topic_attempts=10, max_runtime_seconds=60)
+
+        results = asyncio.run(reader._read_topics_in_tabs(page, topics, state, budget, read_tabs=3))
+
+        assert [visit.topic_id for visit in results] == [1, 2, 3, 4, 5, 6]
+        assert {name for name, _ in visited} == {'tab0', 'tab1', 'tab2'}
+        assert all(tab.closed for tab in context.pages)
+        assert budget.pages_read == 12
+        assert state.attempted_count == 6
+        assert reader.read_index.get(4) == 3
+
+    def test_limits_are_shared_across_tabs(self, monkeypatch, tmp_path):
+        reader, visited = self._reader(monkeypatch, tmp_path)
+        page, _ = self._context_page()
+        topics = [(i, f'https://linux.do/t/t/{i}') for i in range(1, 21)]
+        state = ReadRuntimeState()
+        budget = linuxdo_read_posts.ReadBudget(max_posts=100, max_topic_attempts=5, max_runtime_seconds=60)
+
+        results = asyncio.run(reader._read_topics_in_tabs(page, topics, state, budget, read_tabs=4))
+
+        assert len(results) == 5
+        assert len(visited) == 5
+        assert state.attempted_count == 5
+
+    def test_runtime_limit_stops_all_tabs(self, monkeypatch, tmp_path):
+        reader, visited = self._reader(monkeypatch, tmp_path)
+        page, _ = self._context_page()
+        topics = [(i, f'https://linux.do/t/t/{i}') for i in range(1, 5)]
+        budget = linuxdo_read_posts.ReadBudget(max_posts=100, max_topic_attempts=10, max_runtime_seconds=0)
+
+        results = asyncio.run(reader._read_topics_in_tabs(page, topics, ReadRuntimeState(), budget, read_tabs=2))
+
+        assert results == []
+        assert budget.runtime_exceeded is True
+
+    def test_extra_tabs_respect_global_page_slots(self, monkeypatch, tmp_path):
+        reader, visited = self._reader(monkeypatch, tmp_path)
+        page, context = self._context_page()
+        topics = [(i, f'https://linux.do/t/t/{i}') for i in range(1, 7)]
+        budget = linuxdo_read_posts.ReadBudget(max_posts=100, max_topic_attempts=10, max_runtime_seconds=60)
+
+        async def scenario():
+            # 主页面占用一个配额，只剩一个给额外标签页
+            reader.page_slots = asyncio.Semaphore(2)
+            await reader.page_slots.acquire()
+            results = await reader._read_topics_in_tabs(page, topics, ReadRuntimeState(), budget, read_tabs=4)
+            return results, reader.page_slots.locked()
+
+        results, locked = asyncio.run(scenario())
+
+        assert len(results) == 6
+        assert len(context.pages) == 1
+        assert {name for name, _ in visited} == {'tab0', 'tab1'}
+        assert locked is False
+
+
+class TestRunAccounts:
+    def test_runs_accounts_concurrently_and_keeps_order(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        running = {'now': 0, 'peak': 0}
+        seen_browsers = []
+
+        async def fake_run(self, max_posts, max_topic_attempts, max_runtime_seconds, browser=None):
+            seen_browsers.append(browser)
+            running['now'] += 1
+            running['peak'] = max(running['peak'], running['now'])
+            await asyncio.sleep(0.02 if self.username == 'a' else 0.01)
+            running['now'] -= 1
+            if self.username == 'c':
+                raise RuntimeError('Failed to connect to browser')
+            return linuxdo_read_posts.ReadAccountResult(
+                username=self.username, overall_status='uncertain', verification_status='uncertain'
+            )
+
+        monkeypatch.setattr(LinuxDoReadPosts, 'run', fake_run)
+        accounts = [{'username': name, 'password': 'x'} for name in ('a', 'b', 'c')]
+        browser = object()
+
+        results = asyncio.run(linuxdo_read_posts.run_accounts(browser, accounts, account_concurrency=2))
+
+        assert [result.username for result in results] == ['a', 'b', 'c']
+        assert running['peak'] == 2
+        assert all(seen is browser for seen in seen_browsers)
+        assert results[2].overall_status == 'infra_failed'
+        assert results[2].error.startswith('Provider unreachable')
+
+
+class TestScrollToRead:
+    def test_runs_scroll_loop_in_single_evaluate(self, tmp_path):
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+
+        class DummyPage:
+            def __init__(self):
+                self.calls = []
+
+            async def evaluate(self, script, arg=None):
+                self.calls.append((script, arg))
+                return {'current': 12, 'total': 12, 'pages_read': 9}
+
+        page = DummyPage()
+        assert asyncio.run(reader._scroll_to_read(page)) == (12, 12, 9)
+        assert len(page.calls) == 1
+        assert 'MutationObserver' in page.calls[0][0]
+        assert page.calls[0][1] == linuxdo_read_posts.SCROLL_READER_OPTIONS
+
+    def test_evaluate_failure_returns_zero_progress(self, tmp_path):
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+
+        class DummyPage:
+            async def evaluate(self, script, arg=None):
+                raise RuntimeError('Execution context was destroyed')
+
+        assert asyncio.run(reader._scroll_to_read(DummyPage())) == (0, 0, 0)
+
+
+class TestIsLoggedIn:
+    class DummyContext:
+        def __init__(self):
+            self.cleared = False
+
+        async def cookies(self):
+            return []
+
+        async def clear_cookies(self):
+            self.cleared = True
+
+    class DummyPage:
+        def __init__(self, context, url='about:blank', fetched=None):
+            self.context = context
+            self.url = url
+            self.fetched = fetched
+            self.gotos = []
+
+        async def goto(self, url, wait_until=None):
+            self.gotos.append(url)
+            self.url = url
+
+        async def evaluate(self, script, arg=None):
+            return self.fetched
+
+    def _patch_api(self, monkeypatch, response):
+        class DummyClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return None
+
+            async def get_json(self, url, referer=None):
+                assert url == '/session/current.json'
+                return response
+
+        async def from_context(context, page=None, **kwargs):
+            return DummyClient()
+
+        monkeypatch.setattr(linuxdo_read_posts.LinuxDoApiClient, 'from_context', staticmethod(from_context))
+
+    def _reader(self, tmp_path, username='Alice'):
+        return LinuxDoReadPosts(username, 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+
+    def test_api_session_matching_account_without_navigation(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': True, 'status': 200, 'data': {'current_user': {'username': 'alice'}}})
+        reader = self._reader(tmp_path)
+        page = self.DummyPage(self.DummyContext())
+
+        assert asyncio.run(reader._is_logged_in(page)) is True
+        assert reader.logged_in_username == 'alice'
+        assert page.gotos == []
+
+    def test_other_account_clears_cookies(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': True, 'status': 200, 'data': {'current_user': {'username': 'bob'}}})
+        reader = self._reader(tmp_path)
+        context = self.DummyContext()
+
+        assert asyncio.run(reader._is_logged_in(self.DummyPage(context))) is False
+        assert context.cleared is True
+
+    def test_not_logged_in_response(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': False, 'status': 404, 'data': {'errors': ['not_logged_in']}})
+        reader = self._reader(tmp_path)
+
+        assert asyncio.run(reader._is_logged_in(self.DummyPage(self.DummyContext()))) is False
+
+    def test_challenge_falls_back_to_page_fetch(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': False, 'status': 403, 'challenge': True, 'text': '<html>'})
+        reader = self._reader(tmp_path)
+        page = self.DummyPage(
+            self.DummyContext(), fetched={'status': 200, 'data': {'current_user': {'username': 'Alice'}}}
+        )
+
+        assert asyncio.run(reader._is_logged_in(page)) is True
+        assert page.gotos == ['https://linux.do/']
+
+    def test_rate_limited_api_falls_back_to_page_fetch(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': False, 'status': 429, 'data': {'errors': ['rate limited']}})
+        reader = self._reader(tmp_path)
+        page = self.DummyPage(
+            self.DummyContext(), fetched={'status': 200, 'data': {'current_user': {'username': 'Alice'}}}
+        )
+
+        assert asyncio.run(reader._is_logged_in(page)) is True
+        assert page.gotos == ['https://linux.do/']
+
+    def test_server_error_on_both_paths_uses_dom_check(self, monkeypatch, tmp_path):
+        self._patch_api(monkeypatch, {'success': False, 'status': 502, 'data': {'errors': ['bad gateway']}})
+        reader = self._reader(tmp_path)
+        page = self.DummyPage(self.DummyContext(), fetched={'status': 503, 'data': {}})
+        dom_checks = []
+
+        async def via_dom(page):
+            dom_checks.append(page)
+            return True
+
+        monkeypatch.setattr(reader, '_is_logged_in_via_dom', via_dom)
+
+        assert asyncio.run(reader._is_logged_in(page)) is True
+        assert dom_checks == [page]
+
+    def test_parse_current_session_only_trusts_not_logged_in_responses(self):
+        parse = LinuxDoReadPosts._parse_current_session
+
+        assert parse(404, {'errors': ['not_logged_in']}, via='api')['success'] is True
+        assert parse(403, {'errors': ['not_logged_in']}, via='api')['success'] is True
+        assert parse(403, {'errors': ['forbidden']}, via='api')['success'] is False
+        assert parse(429, {}, via='api')['success'] is False
+        assert parse(500, {}, via='api')['success'] is False
+
+
+class TestReadByIdProbing:
+    def test_only_valid_probes_reach_the_browser(self, monkeypatch, tmp_path):
+        probe_windows = []
+
+        class DummyClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return None
+
+            async def probe_topics(self, topic_ids, min_interval=0):
+                probe_windows.append(list(topic_ids))
+                return {
+                    topic_id: {
+                        'status': 'valid' if topic_id % 3 == 0 else 'invalid',
+                        'url': f'https://linux.do/t/t/{topic_id}',
+                        'posts_count': 4,
+                        'highest_post_number': 4,
+                    }
+                    for topic_id in topic_ids
+                }
+
+        async def from_context(context, page=None, **kwargs):
+            return DummyClient()
+
+        monkeypatch.setattr(linuxdo_read_posts.LinuxDoApiClient, 'from_context', staticmethod(from_context))
+        monkeypatch.setattr(linuxdo_read_posts.random, 'randint', lambda a, b: a)
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        opened = []
+
+        async def visit(page, topic_id, topic_url):
+            opened.append(topic_id)
+            return linuxdo_read_posts.TopicVisitResult(
+                topic_id=topic_id, url=topic_url, status='valid', pages_read=1, highest_post_number=4
+            )
+
+        monkeypatch.setattr(reader, '_visit_topic_url', visit)
+
+        class DummyPage:
+            context = None
+
+        state = ReadRuntimeState(last_topic_id=100)
+        budget = linuxdo_read_posts.ReadBudget(max_posts=5, max_topic_attempts=5, max_runtime_seconds=60)
+        results = asyncio.run(reader._read_by_id_probing(DummyPage(), 100, state, budget))
+
+        assert probe_windows[0] == list(range(101, 121))
+        assert opened == [102, 105, 108, 111, 114]
+        assert len(results) == 5
+        assert state.last_topic_id == 120
+        assert state.attempted_count == 5
+
+    def test_challenge_switches_to_browser_and_reuses_tabs(self, monkeypatch, tmp_path):
+        probe_windows = []
+
+        class DummyClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return None
+
+            async def probe_topics(self, topic_ids, min_interval=0):
+                probe_windows.append(list(topic_ids))
+                # 第一个 id 正常，之后的请求都命中挑战页
+                return {
+                    topic_id: {'status': 'challenge' if index else 'invalid', 'url': None}
+                    for index, topic_id in enumerate(topic_ids)
+                }
+
+        async def from_context(context, page=None, **kwargs):
+            return DummyClient()
+
+        monkeypatch.setattr(linuxdo_read_posts.LinuxDoApiClient, 'from_context', staticmethod(from_context))
+        monkeypatch.setattr(linuxdo_read_posts.random, 'randint', lambda a, b: a)
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        opened = []
+
+        async def visit(page, topic_id, topic_url):
+            opened.append(topic_id)
+            return linuxdo_read_posts.TopicVisitResult(topic_id=topic_id, url=topic_url, status='invalid')
+
+        monkeypatch.setattr(reader, '_visit_topic_url', visit)
+
+        class DummyTab:
+            def __init__(self, context):
+                self.context = context
+                self.closed = False
+
+            async def close(self):
+                self.closed = True
+
+        class DummyContext:
+            def __init__(self):
+                self.pages = []
+
+            async def new_page(self):
+                self.pages.append(DummyTab(self))
+                return self.pages[-1]
+
+        context = DummyContext()
+        state = ReadRuntimeState(last_topic_id=100)
+        budget = linuxdo_read_posts.ReadBudget(max_posts=5, max_topic_attempts=30, max_runtime_seconds=60)
+        asyncio.run(reader._read_by_id_probing(DummyTab(context), 100, state, budget, read_tabs=2))
+
+        assert len(probe_windows) == 1
+        # 被拦截的 102-120 与之后的批次都由浏览器打开，受 max_topic_attempts 限制
+        assert sorted(opened)[:19] == list(range(102, 121))
+        assert len(opened) == len(set(opened)) == 30
+        assert len(context.pages) == 1
+        assert context.pages[0].closed is True
+
+
+class TestRankTopicCandidates:
+    def test_more_unread_posts_per_second_ranks_first(self):
+        index = linuxdo_read_posts.ReadTopicIndex('unused.json')
+        index.mark(2, 290)
+        candidates = [(1, 'u1'), (2, 'u2'), (3, 'u3'), (4, 'u4')]
+        meta = {
+            1: {'highest_post_number': 3},
+            2: {'highest_post_number': 300},
+            3: {'highest_post_number': 120},
+        }
+
+        ranked = linuxdo_read_posts.rank_topic_candidates(candidates, meta, index)
+
+        # 3 有 120 个未读楼层；2 只剩 10 个；4 没有楼层信息，按中位数（10）估计；1 只有 3 楼
+        assert [topic_id for topic_id, _ in ranked] == [3, 2, 4, 1]
+
+    def test_estimate_topic_value_caps_scroll_time(self):
+        pages, seconds = linuxdo_read_posts.estimate_topic_value(1000)
+        assert pages == 1000
+        assert seconds == linuxdo_read_posts.TOPIC_NAVIGATION_SECONDS + 25 * 1.5
+
+        pages, seconds = linuxdo_read_posts.estimate_topic_value(0)
+        assert pages == 1
+        assert seconds == linuxdo_read_posts.TOPIC_NAVIGATION_SECONDS + 2 * 1.5
+
+    def test_prioritize_unread_skips_read_and_ranks(self, tmp_path):
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        reader._last_discovery_meta = {
+            1: {'posts_count': 5, 'highest_post_number': 5, 'last_read_post_number': 5},
+            2: {'posts_count': 2, 'highest_post_number': 2, 'last_read_post_number': 0},
+            3: {'posts_count': 80, 'highest_post_number': 80, 'last_read_post_number': 0},
+        }
+
+        ranked = reader._prioritize_unread([(1, 'u1'), (2, 'u2'), (3, 'u3')])
+
+        assert ranked == [(3, 'u3'), (2, 'u2')]
+
+    def test_all_read_candidates_keep_discovered_count(self, tmp_path, monkeypatch):
+        reader = LinuxDoReadPosts('user', 'pass', storage_state_dir=str(tmp_path), topic_state_dir=str(tmp_path))
+        candidates = [(1, 'u1'), (2, 'u2')]
+
+        async def discover(page, max_candidates):
+            reader._last_discovery_meta = {
+                1: {'posts_count': 5, 'highest_post_number': 5, 'last_read_post_number': 5},
+                2: {'posts_count': 3, 'highest_post_number': 3, 'last_read_post_number': 3},
+            }
+            return candidates, {'latest': 2}
+
+        async def read_topics(*args, **kwargs):
+            raise AssertionError('already-read topics should not be opened')
+
+        monkeypatch.setattr(reader, '_discover_topic_candidates', discover)
+        monkeypatch.setattr(reader, '_read_topics_in_tabs', read_topics)
+
+        _, results, discovered, used_id_fallback, counts = asyncio.run(
+            reader._read_posts(object(), 100, 10, 10, 60, enable_id_fallback=False)
+        )
+
+        assert results == []
+        assert discovered == 2
+        assert reader._last_skipped_read == 2
+        assert used_id_fallback is False
+        assert counts == {'latest': 2}
@@ -4,7 +4,12 @@ from __future__ import annotations
 
 import asyncio
 
-from utils.oauth_browser import extract_oauth_query_params, should_treat_redirect_timeout_as_success
+from utils import oauth_browser
+from utils.oauth_browser import (
+    OAuthBrowserSession,
+    extract_oauth_query_params,
+    should_treat_redirect_timeout_as_success,
+)
 
 
 class DummyPage:
@@ -43,3 +48,63 @@ class TestShouldTreatRedirectTimeoutAsSuccess:
     def test_true_when_api_user_exists(self):
         page = DummyPage('https://other.example.com/intermediate', api_user=123)
         assert asyncio.run(should_treat_redirect_timeout_as_success(page, 'https://example.com'))
+
+
+class DummyContext:
+    def __init__(self, events: list):
+        self.events = events
+
+    async def close(self):
+        self.events.append('context_closed')
+
+
+class DummyBrowser:
+    def __init__(self, events: list):
+        self.events = events
+
+    async def new_context(self, storage_state=None):
+        self.events.append(('new_context', storage_state))
+        return DummyContext(self.events)
+
+
+def make_dummy_camoufox(events: list, launch_delay: float = 0):
+    class DummyCamoufox:
+        def __init__(self, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            await asyncio.sleep(launch_delay)
+            events.append('launched')
+            return DummyBrowser(events)
+
+        async def __aexit__(self, *args):
+            events.append('browser_closed')
+
+    return DummyCamoufox
+
+
+class TestOAuthBrowserSession:
+    def test_context_ready_and_closed(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(oauth_browser, 'AsyncCamoufox', make_dummy_camoufox(events))
+
+        async def run():
+            async with OAuthBrowserSession('acct', '/nonexistent/state.json') as session:
+                context = await session.get_context()
+                assert isinstance(context, DummyContext)
+
+        asyncio.run(run())
+        assert events == ['launched', ('new_context', None), 'context_closed', 'browser_closed']
+
+    def test_aclose_cancels_pending_launch(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(oauth_browser, 'AsyncCamoufox', make_dummy_camoufox(events, launch_delay=10))
+
+        async def run():
+            session = OAuthBrowserSession('acct').start()
+            await asyncio.sleep(0)
+            await session.aclose()
+
+        asyncio.run(run())
+        assert 'launched' not in events
+        assert 'context_closed' not in events
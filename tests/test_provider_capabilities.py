@@ -0,0 +1,78 @@
+"""Tests for utils/provider_capabilities.py"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from utils.constants import QUOTA_DIVISOR
+from utils.provider_capabilities import ProviderCapabilityCache
+
+ORIGIN = "https://example.com"
+
+
+class TestProviderCapabilityCache:
+    def test_fetches_and_caches_on_miss(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProviderCapabilityCache(os.path.join(tmpdir, "caps.json"))
+            calls = []
+
+            def fetch():
+                calls.append(1)
+                return {"success": True, "data": {"linuxdo_oauth": True, "linuxdo_client_id": "abc"}}
+
+            first = asyncio.run(cache.resolve(ORIGIN, fetch))
+            second = asyncio.run(cache.resolve(ORIGIN, fetch))
+
+            assert first["data"]["linuxdo_client_id"] == "abc"
+            assert second["cached"] is True
+            assert len(calls) == 1
+
+    def test_failed_fetch_is_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProviderCapabilityCache(os.path.join(tmpdir, "caps.json"))
+            result = asyncio.run(cache.resolve(ORIGIN, lambda: {"success": False, "error": "HTTP 503"}))
+            assert result["success"] is False
+            assert cache.get(ORIGIN) == (None, False)
+
+    def test_stale_entry_served_and_refreshed_in_background(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, "caps.json")
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({ORIGIN: {"fetched_at": 0, "status": {"quota_per_unit": 1000}}}, f)
+            cache = ProviderCapabilityCache(cache_file)
+
+            async def run():
+                result = await cache.resolve(ORIGIN, lambda: {"success": True, "data": {"quota_per_unit": 2000}})
+                await cache.wait_for_refresh()
+                return result
+
+            result = asyncio.run(run())
+            assert result["data"]["quota_per_unit"] == 1000
+            status, fresh = cache.get(ORIGIN)
+            assert status["quota_per_unit"] == 2000
+            assert fresh is True
+
+    def test_quota_divisor_and_check_in_flag(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProviderCapabilityCache(os.path.join(tmpdir, "caps.json"))
+            assert cache.get_quota_divisor(ORIGIN) == QUOTA_DIVISOR
+            assert cache.is_check_in_enabled(ORIGIN) is True
+
+            cache.put(ORIGIN, {"quota_per_unit": 250000, "checkin_enabled": False})
+            assert cache.get_quota_divisor(ORIGIN) == 250000
+            assert cache.is_check_in_enabled(ORIGIN) is False
+
+    def test_cache_file_read_once_per_instance(self, monkeypatch):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProviderCapabilityCache(os.path.join(tmpdir, "caps.json"))
+            cache.put(ORIGIN, {"quota_per_unit": 250000})
+            cache = ProviderCapabilityCache(cache.cache_file)
+            reads = []
+            read_file = cache._read_file
+            monkeypatch.setattr(cache, "_read_file", lambda: reads.append(1) or read_file())
+
+            for _ in range(3):
+                assert cache.get_quota_divisor(ORIGIN) == 250000
+                assert cache.is_check_in_enabled(ORIGIN) is True
+            assert len(reads) == 1
@@ -0,0 +1,125 @@
+"""Tests for utils/proxy_egress.py."""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import pytest
+
+from utils import proxy_egress
+from utils.proxy_egress import ProxyEgressCache, egress_launch_options, proxy_key
+
+PROXY = {'server': 'http://proxy.example:8080', 'username': 'user', 'password': 'secret'}
+GEO = {'timezone': 'Asia/Tokyo', 'geolocation:latitude': 35.6, 'geolocation:longitude': 139.7}
+
+
+@pytest.fixture(autouse=True)
+def clear_run_cache(monkeypatch):
+    monkeypatch.setattr(proxy_egress, '_run_cache', {})
+
+
+class CountingResolver:
+    def __init__(self, ip='203.0.113.7'):
+        self.ip = ip
+        self.calls = 0
+
+    def __call__(self, proxy_config):
+        self.calls += 1
+        return {'ip': self.ip, 'geo': dict(GEO)}
+
+
+class TestProxyEgressCache:
+    def test_resolved_once_per_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            resolver = CountingResolver()
+            cache = ProxyEgressCache(os.path.join(tmpdir, 'proxy_egress.json'), resolver=resolver)
+
+            async def run():
+                return await cache.resolve(PROXY), await cache.resolve(dict(PROXY))
+
+            first, second = asyncio.run(run())
+
+            assert resolver.calls == 1
+            assert first == second
+            assert first['ip'] == '203.0.113.7'
+            with open(os.path.join(tmpdir, 'proxy_egress.json'), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            assert list(saved) == [proxy_key(PROXY)]
+            assert 'secret' not in json.dumps(saved)
+
+    def test_file_cache_respects_ttl_across_runs(self, monkeypatch):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'proxy_egress.json')
+            resolver = CountingResolver()
+            asyncio.run(ProxyEgressCache(path, ttl=3600, resolver=resolver).resolve(PROXY))
+
+            # 新的一次运行：进程内缓存为空，文件缓存仍在有效期内
+            monkeypatch.setattr(proxy_egress, '_run_cache', {})
+            asyncio.run(ProxyEgressCache(path, ttl=3600, resolver=resolver).resolve(PROXY))
+            assert resolver.calls == 1
+
+            monkeypatch.setattr(proxy_egress, '_run_cache', {})
+            later = time.time() + 7200
+            monkeypatch.setattr(proxy_egress.time, 'time', lambda: later)
+            asyncio.run(ProxyEgressCache(path, ttl=3600, resolver=resolver).resolve(PROXY))
+            assert resolver.calls == 2
+
+    def test_no_proxy_and_failures(self):
+        def failing(proxy_config):
+            raise RuntimeError('proxy down')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProxyEgressCache(os.path.join(tmpdir, 'proxy_egress.json'), resolver=failing)
+            assert asyncio.run(cache.resolve(None)) is None
+            assert asyncio.run(cache.resolve(PROXY)) is None
+
+
+class TestEgressLaunchOptions:
+    def test_precomputed_geo_replaces_geoip(self):
+        egress = {'ip': '203.0.113.7', 'geo': dict(GEO)}
+        options = egress_launch_options(PROXY, egress, config={'forceScopeAccess': True})
+
+        assert options['geoip'] is False
+        assert options['config']['timezone'] == 'Asia/Tokyo'
+        assert options['config']['webrtc:ipv4'] == '203.0.113.7'
+        assert options['config']['forceScopeAccess'] is True
+        assert options['firefox_user_prefs'] == {'network.dns.disableIPv6': True}
+
+    def test_locale_follows_egress_unless_caller_sets_it(self):
+        geo = {**GEO, 'locale:language': 'ja', 'locale:region': 'JP'}
+        egress = {'ip': '203.0.113.7', 'geo': geo}
+
+        config = egress_launch_options(PROXY, egress)['config']
+        assert config['locale:language'] == 'ja'
+        assert config['locale:region'] == 'JP'
+
+        # 调用方显式设置的时区 / 语言区域优先，经纬度仍以出口为准
+        caller = {'locale:language': 'en', 'timezone': 'UTC', 'geolocation:latitude': 0}
+        config = egress_launch_options(PROXY, egress, config=caller)['config']
+        assert config['locale:language'] == 'en'
+        assert config['locale:region'] == 'JP'
+        assert config['timezone'] == 'UTC'
+        assert config['geolocation:latitude'] == 35.6
+
+    def test_resolver_keeps_locale_keys(self, monkeypatch):
+        import camoufox.geolocation
+        import camoufox.ip
+
+        class DummyGeolocation:
+            def as_config(self):
+                return {**GEO, 'locale:language': 'ja', 'locale:region': 'JP', 'locale:script': 'Jpan', 'x': 1}
+
+        monkeypatch.setattr(camoufox.ip, 'public_ip', lambda proxy: '203.0.113.7')
+        monkeypatch.setattr(camoufox.geolocation, 'get_geolocation', lambda ip: DummyGeolocation())
+
+        resolved = proxy_egress._resolve_with_camoufox(PROXY)
+
+        assert resolved['ip'] == '203.0.113.7'
+        assert resolved['geo'] == {**GEO, 'locale:language': 'ja', 'locale:region': 'JP', 'locale:script': 'Jpan'}
+
+    def test_fallbacks(self):
+        assert egress_launch_options(None, None) == {'geoip': False}
+        assert egress_launch_options(PROXY, None, config={'a': 1}) == {'geoip': True, 'config': {'a': 1}}
+        assert egress_launch_options(PROXY, {'ip': '2001:db8::1', 'geo': {}})['config'] == {'webrtc:ipv6': '2001:db8::1'}
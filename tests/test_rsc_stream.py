@@ -0,0 +1,298 @@
+"""Tests for utils/rsc_stream.py."""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from checkin import CheckIn
+from utils import get_cdk
+from utils.config import AccountConfig, ProviderConfig
+from utils.get_cdk import (
+    B4U_DEFAULT_ACTIONS,
+    B4U_DEFAULT_ROUTER_STATE_TREE,
+    _resolve_b4u_actions,
+    get_b4u_cdk,
+    match_b4u_actions,
+)
+from utils.rsc_stream import (
+    RscFlightParser,
+    discover_server_actions,
+    extract_router_state_tree,
+    extract_server_actions,
+    load_server_actions,
+    parse_rsc_text,
+    post_server_action,
+    save_server_actions,
+)
+
+STATUS_ID = 'a' * 40
+DRAW_ID = 'b' * 40
+
+LUCKYDRAW_TREE = [
+    '',
+    {'children': ['(dashboard)', {'children': ['luckydraw', {'children': ['__PAGE__', {}]}]}]},
+    '$undefined',
+    '$undefined',
+    True,
+]
+
+
+def flight_push(build_id, tree=LUCKYDRAW_TREE):
+    """页面内联的 flight 数据脚本"""
+    row = '0:' + json.dumps({'b': build_id, 'f': [[tree, None, None]]}) + '\n'
+    return f'<script>self.__next_f.push([1,{json.dumps(row)}])</script>'
+
+
+class DummyResponse:
+    def __init__(self, body=b'', status_code=200, headers=None, chunk_size=3):
+        self.body = body
+        self.text = body.decode('utf-8') if isinstance(body, bytes) else body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            self.chunks_read += 1
+            yield self.body[i : i + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class DummySession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=30):
+        self.requests.append(('GET', url, headers))
+        return self.responses[url]
+
+    def post(self, url, headers=None, data=None, timeout=30, stream=False):
+        self.requests.append(('POST', url, headers))
+        return self.responses[headers['next-action']]
+
+
+class TestRscFlightParser:
+    def test_rows_decoded_across_arbitrary_chunks(self):
+        body = '0:["$@1",["abc",null]]\n1:{"success":true,"redemptionCode":"CODE-中文"}\n2:3\n'.encode('utf-8')
+        parser = RscFlightParser()
+        rows = []
+        for i in range(len(body)):
+            rows.extend(parser.feed(body[i : i + 1]))
+        rows.extend(parser.close())
+
+        assert [row.id for row in rows] == ['0', '1', '2']
+        assert rows[0].value == ['$@1', ['abc', None]]
+        assert rows[1].value['redemptionCode'] == 'CODE-中文'
+        assert rows[2].value == 3
+
+    def test_row_yielded_before_stream_ends(self):
+        parser = RscFlightParser()
+        assert parser.feed(b'1:{"success":') == []
+        rows = parser.feed(b'true}\n2:')
+        assert len(rows) == 1 and rows[0].value == {'success': True}
+
+    def test_length_prefixed_text_row_may_contain_newlines(self):
+        text = 'line1\nline2'
+        body = f'3:T{len(text.encode()):x},{text}4:"ok"\n'.encode('utf-8')
+        rows = parse_rsc_text(body.decode('utf-8'))
+
+        assert rows['3'].tag == 'T'
+        assert rows['3'].value == text
+        assert rows['4'].value == 'ok'
+
+    def test_tagged_and_unterminated_rows(self):
+        rows = parse_rsc_text('0:I["chunk",[]]\n1:E{"digest":"x"}\n2:0')
+
+        assert rows['0'].tag == 'I'
+        assert rows['1'].tag == 'E' and rows['1'].value == {'digest': 'x'}
+        assert rows['2'].value == 0
+
+
+class TestServerActions:
+    def test_extract_server_actions_by_name(self):
+        js = (
+            f'(0,n.createServerReference)("{STATUS_ID}",n.callServer,void 0,n.findSourceMapURL,"getLuckyDrawStatus");'
+            f'(0,n.createServerReference)("{DRAW_ID}",n.callServer,void 0,n.findSourceMapURL,"performLuckyDraw");'
+            f'(0,n.createServerReference)("{"c" * 40}",n.callServer)'
+        )
+        actions = extract_server_actions(js)
+
+        assert actions == {'getLuckyDrawStatus': STATUS_ID, 'performLuckyDraw': DRAW_ID}
+        assert match_b4u_actions(actions) == {'status': STATUS_ID, 'draw': DRAW_ID}
+        assert match_b4u_actions({'performLuckyDraw': DRAW_ID}) is None
+
+    def test_discover_server_actions_scans_page_chunks(self):
+        page_url = 'https://example.com/luckydraw'
+        html = (
+            '<script src="/_next/static/chunks/main-1.js"></script>'
+            '<script src="/_next/static/chunks/app/luckydraw/page-2.js"></script>'
+            '<script>self.__next_f.push([1,"{\\"b\\":\\"build-123\\"}"])</script>'
+        )
+        chunk = f'createServerReference)("{DRAW_ID}",s.callServer,void 0,s.findSourceMapURL,"drawPrize")'
+        session = DummySession(
+            {
+                page_url: DummyResponse(html.encode()),
+                'https://example.com/_next/static/chunks/main-1.js': DummyResponse(b'console.log(1)'),
+                'https://example.com/_next/static/chunks/app/luckydraw/page-2.js': DummyResponse(chunk.encode()),
+            }
+        )
+
+        deploy_id, actions = discover_server_actions(session, page_url, page_hint='luckydraw')
+
+        assert deploy_id == 'build-123'
+        assert actions == {'drawPrize': DRAW_ID}
+        assert session.requests[1][1].endswith('page-2.js')
+
+    def test_match_b4u_actions_prefers_status_and_skips_read_only_draw(self):
+        actions = {
+            'getDrawCount': 'c' * 40,
+            'getLuckyDrawStatus': STATUS_ID,
+            'getDrawHistory': 'd' * 40,
+            'performLuckyDraw': DRAW_ID,
+        }
+        assert match_b4u_actions(actions) == {'status': STATUS_ID, 'draw': DRAW_ID}
+        assert match_b4u_actions({'getLuckyDrawStatus': STATUS_ID, 'getDrawHistory': DRAW_ID}) is None
+
+    def test_extract_router_state_tree(self):
+        html = flight_push('build-1')
+
+        assert extract_router_state_tree(html, 'https://tw.b4u.qzz.io/luckydraw') == B4U_DEFAULT_ROUTER_STATE_TREE
+        assert extract_router_state_tree('<html></html>', 'https://tw.b4u.qzz.io/luckydraw') is None
+
+    def _luckydraw_session(self, build_id, status_body=b'0:["$@1",["abc",null]]\n1:3\n', tree=LUCKYDRAW_TREE):
+        page_url = 'https://tw.b4u.qzz.io/luckydraw'
+        html = (
+            '<script src="/_next/static/chunks/app/luckydraw/page-2.js"></script>'
+            + flight_push(build_id, tree)
+        )
+        chunk = (
+            f'createServerReference)("{STATUS_ID}",s.callServer,void 0,s.findSourceMapURL,"getLuckyDrawStatus");'
+            f'createServerReference)("{DRAW_ID}",s.callServer,void 0,s.findSourceMapURL,"performLuckyDraw")'
+        )
+        return DummySession(
+            {
+                page_url: DummyResponse(html.encode()),
+                'https://tw.b4u.qzz.io/_next/static/chunks/app/luckydraw/page-2.js': DummyResponse(chunk.encode()),
+                STATUS_ID: DummyResponse(status_body),
+            }
+        )
+
+    def test_resolve_b4u_actions_reuses_cache_for_same_deploy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, 'server_actions.json')
+            cached = {'status': 'e' * 40, 'draw': 'f' * 40}
+            save_server_actions(cache_file, 'https://tw.b4u.qzz.io/luckydraw', 'build-1', cached)
+            session = self._luckydraw_session('build-1')
+
+            actions, router_state_tree, discovered = _resolve_b4u_actions(session, {}, 'acct', cache_file=cache_file)
+
+            assert actions == cached
+            assert router_state_tree == B4U_DEFAULT_ROUTER_STATE_TREE
+            assert discovered is False
+            assert [request[1] for request in session.requests] == ['https://tw.b4u.qzz.io/luckydraw']
+
+    def test_resolve_b4u_actions_rediscovers_and_validates_on_new_deploy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, 'server_actions.json')
+            save_server_actions(
+                cache_file, 'https://tw.b4u.qzz.io/luckydraw', 'build-1', {'status': 'e' * 40, 'draw': 'f' * 40}
+            )
+            # 新部署的路由树变化时使用页面中的值，而不是内置值
+            tree = ['', {'children': ['luckydraw', {'children': ['__PAGE__', {}]}]}, None, None, True]
+            session = self._luckydraw_session('build-2', tree=tree)
+            expected_tree = extract_router_state_tree(flight_push('build-2', tree), 'https://tw.b4u.qzz.io/luckydraw')
+
+            actions, router_state_tree, discovered = _resolve_b4u_actions(session, {}, 'acct', cache_file=cache_file)
+
+            assert actions == {'status': STATUS_ID, 'draw': DRAW_ID}
+            assert router_state_tree == expected_tree != B4U_DEFAULT_ROUTER_STATE_TREE
+            assert discovered is True
+            # 只用只读的 status action 校验，不会调用 draw
+            assert [request[0] for request in session.requests] == ['GET', 'GET', 'POST']
+            assert session.requests[2][2]['next-action'] == STATUS_ID
+            assert session.requests[2][2]['next-router-state-tree'] == expected_tree
+            cached = load_server_actions(cache_file)['https://tw.b4u.qzz.io/luckydraw']
+            assert cached['deploy_id'] == 'build-2'
+            assert cached['actions'] == actions
+            assert cached['router_state_tree'] == expected_tree
+
+    def test_resolve_b4u_actions_falls_back_without_caching_invalid_mapping(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, 'server_actions.json')
+            save_server_actions(
+                cache_file, 'https://tw.b4u.qzz.io/luckydraw', 'build-1', {'status': STATUS_ID, 'draw': DRAW_ID}
+            )
+            session = self._luckydraw_session('build-2', status_body=b'0:["$@1",["abc",null]]\n1:{"items":[]}\n')
+
+            actions, _, discovered = _resolve_b4u_actions(session, {}, 'acct', cache_file=cache_file)
+            assert actions == B4U_DEFAULT_ACTIONS
+            assert discovered is True
+            assert load_server_actions(cache_file)['https://tw.b4u.qzz.io/luckydraw']['deploy_id'] == 'build-1'
+
+            session = DummySession({'https://tw.b4u.qzz.io/luckydraw': DummyResponse(b'', status_code=503)})
+            actions, router_state_tree, _ = _resolve_b4u_actions(
+                session, {}, 'acct', force=True, cache_file=cache_file
+            )
+            assert actions == B4U_DEFAULT_ACTIONS
+            assert router_state_tree == B4U_DEFAULT_ROUTER_STATE_TREE
+            # 回退到内置 id 时不覆盖缓存
+            assert load_server_actions(cache_file)['https://tw.b4u.qzz.io/luckydraw']['deploy_id'] == 'build-1'
+
+
+class TestPostServerAction:
+    def test_stops_reading_after_wanted_row(self):
+        body = b'0:["$@1",["abc",null]]\n1:2\n' + b'2:"padding"\n' * 50
+        response = DummyResponse(body, chunk_size=8)
+        session = DummySession({STATUS_ID: response})
+
+        result = post_server_action(session, 'https://example.com/luckydraw', {}, STATUS_ID, '[]', stop_at='1')
+
+        assert result.rows['1'].value == 2
+        assert response.chunks_read < len(body) // 8
+        assert response.closed
+        assert session.requests[0][2]['next-action'] == STATUS_ID
+
+    def test_action_not_found(self):
+        response = DummyResponse(b'Server action not found.', headers={'x-nextjs-action-not-found': '1'})
+        session = DummySession({STATUS_ID: response})
+
+        result = post_server_action(session, 'https://example.com/luckydraw', {}, STATUS_ID, '[]')
+
+        assert result.action_not_found
+        assert result.rows == {}
+        assert response.closed
+
+
+class TestB4uCdk:
+    def test_unnamed_accounts_use_separate_fingerprint_profiles(self, tmp_path, monkeypatch):
+        profile_keys = []
+
+        async def fake_cf_clearance(url, account_name, proxy_config, stats_file, fingerprint_profile):
+            profile_keys.append((account_name, fingerprint_profile.key))
+            raise RuntimeError('stop')
+
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('storage-states')
+        monkeypatch.setattr(get_cdk, 'get_cf_clearance', fake_cf_clearance)
+
+        async def run(index):
+            account_config = AccountConfig(provider='b4u', extra={'get_cdk_cookies': {'session': 's'}})
+            CheckIn(
+                account_config.get_display_name(index),
+                account_config,
+                ProviderConfig(name='b4u', origin='https://b4u.example'),
+                storage_state_dir=str(tmp_path / 'states'),
+            )
+            return [item async for item in get_b4u_cdk(account_config)]
+
+        for index in range(2):
+            assert asyncio.run(run(index)) == [(False, {'error': 'Failed to get cf_clearance: stop'})]
+
+        assert [name for name, _ in profile_keys] == ['b4u 1', 'b4u 2']
+        assert profile_keys[0][1] != profile_keys[1][1]
@@ -0,0 +1,269 @@
+"""Tests for utils/step_graph.py."""
+
+import asyncio
+
+import pytest
+
+from utils.get_cdk import build_fuli_wheel_steps
+from utils.step_graph import Step, StepGraph, run_paced
+from utils.topup_pipeline import run_cdk_pipeline
+
+
+async def collect(graph):
+    return [item async for item in graph.stream()]
+
+
+class TestStepGraph:
+    def test_independent_steps_run_concurrently(self):
+        events = []
+
+        def make_step(name, depends_on=()):
+            async def run(ctx):
+                events.append(f'start:{name}')
+                await asyncio.sleep(0.01)
+                events.append(f'end:{name}')
+                ctx.emit(name)
+                return name.upper()
+
+            return Step(name, run, depends_on)
+
+        async def run_graph():
+            graph = StepGraph([make_step('a'), make_step('b'), make_step('c', depends_on=('a', 'b'))])
+            return await collect(graph)
+
+        emitted = asyncio.run(run_graph())
+
+        assert events[:2] == ['start:a', 'start:b']
+        assert events.index('start:c') > events.index('end:a')
+        assert events.index('start:c') > events.index('end:b')
+        assert emitted[-1] == 'c'
+
+    def test_dependency_results_available(self):
+        async def first(ctx):
+            return 3
+
+        async def second(ctx):
+            ctx.emit(ctx.results['first'] * 2)
+
+        emitted = asyncio.run(collect(StepGraph([Step('second', second, ('first',)), Step('first', first)])))
+
+        assert emitted == [6]
+
+    def test_error_after_emitted_items(self):
+        async def ok(ctx):
+            ctx.emit('partial')
+
+        async def boom(ctx):
+            raise RuntimeError('boom')
+
+        emitted = []
+
+        async def run_graph():
+            async for item in StepGraph([Step('ok', ok), Step('boom', boom, ('ok',))]).stream():
+                emitted.append(item)
+
+        with pytest.raises(RuntimeError, match='boom'):
+            asyncio.run(run_graph())
+        assert emitted == ['partial']
+
+    def test_early_stop_waits_for_in_flight_steps_and_keeps_unconsumed(self):
+        finished = []
+
+        async def slow(ctx):
+            ctx.emit('first')
+            await asyncio.sleep(0.02)
+            ctx.emit('late')
+            finished.append('slow')
+
+        async def later(ctx):
+            finished.append('later')
+
+        async def run_graph():
+            graph = StepGraph([Step('slow', slow), Step('later', later, ('slow',))])
+            stream = graph.stream()
+            first = await stream.__anext__()
+            await stream.aclose()
+            return graph, first
+
+        graph, first = asyncio.run(run_graph())
+
+        assert first == 'first'
+        # 在途步骤完成，未开始的步骤不再启动，未被取走的结果保留
+        assert finished == ['slow']
+        assert graph.unconsumed == ['late']
+
+    def test_invalid_graphs(self):
+        async def noop(ctx):
+            return None
+
+        with pytest.raises(ValueError, match='unknown'):
+            StepGraph([Step('a', noop, ('missing',))])
+        with pytest.raises(ValueError, match='Cycle'):
+            StepGraph([Step('a', noop, ('b',)), Step('b', noop, ('a',))])
+
+
+class TestRunPaced:
+    def test_in_flight_limit_and_stop(self):
+        in_flight = 0
+        peak = 0
+        started = []
+
+        async def run():
+            stop = asyncio.Event()
+
+            async def call(index):
+                nonlocal in_flight, peak
+                started.append(index)
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                if index == 3:
+                    stop.set()
+                return index
+
+            return await run_paced(call, 10, max_in_flight=2, stop=stop)
+
+        results = asyncio.run(run())
+
+        assert peak == 2
+        assert results == started
+        assert len(started) < 10
+
+    def test_ready_gates_each_start(self):
+        events = []
+
+        async def run():
+            consumed = asyncio.Event()
+
+            async def ready():
+                events.append('ready')
+                if events.count('ready') > 1:
+                    await consumed.wait()
+
+            async def call(index):
+                events.append(index)
+                await asyncio.sleep(0.01)
+                events.append(f'consumed-{index}')
+                consumed.set()
+
+            return await run_paced(call, 2, max_in_flight=2, ready=ready)
+
+        asyncio.run(run())
+
+        # max_in_flight 允许两个在途，但第二次启动要等 ready() 放行
+        assert events.index(1) > events.index('consumed-0')
+
+    def test_exception_stops_new_calls(self):
+        started = []
+
+        async def call(index):
+            started.append(index)
+            raise RuntimeError('spin failed')
+
+        with pytest.raises(RuntimeError, match='spin failed'):
+            asyncio.run(run_paced(call, 5))
+        assert started == [0]
+
+
+class DummyResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class DummyAsyncSession:
+    def __init__(self, wheel_remaining=3):
+        self.requests = []
+        self.in_flight_gets = 0
+        self.peak_gets = 0
+        self.wheel_remaining = wheel_remaining
+
+    async def get(self, url, headers=None, timeout=30):
+        self.requests.append(('GET', url))
+        self.in_flight_gets += 1
+        self.peak_gets = max(self.peak_gets, self.in_flight_gets)
+        await asyncio.sleep(0.01)
+        self.in_flight_gets -= 1
+        if url.endswith('/api/checkin/status'):
+            return DummyResponse({'checked': False})
+        return DummyResponse({'remaining': self.wheel_remaining})
+
+    async def post(self, url, headers=None, timeout=30):
+        self.requests.append(('POST', url))
+        if url.endswith('/api/checkin'):
+            return DummyResponse({'success': True, 'code': 'CHECKIN-CODE'})
+        self.wheel_remaining -= 1
+        spin_number = sum(1 for method, path in self.requests if path.endswith('/api/wheel'))
+        await asyncio.sleep(0.01)
+        return DummyResponse({'success': True, 'code': f'WHEEL-{spin_number}', 'remaining': self.wheel_remaining})
+
+
+class TestFuliWheelSteps:
+    def test_status_reads_concurrent_and_codes_streamed(self):
+        session = DummyAsyncSession(wheel_remaining=3)
+
+        async def run():
+            steps = build_fuli_wheel_steps(
+                session, {}, 'acct', origin='https://fuli.example', spin_interval=0
+            )
+            return await collect(StepGraph(steps))
+
+        emitted = asyncio.run(run())
+
+        assert session.peak_gets == 2
+        assert emitted[0] == (True, {'code': 'CHECKIN-CODE'})
+        assert [item[1]['code'] for item in emitted[1:]] == ['WHEEL-1', 'WHEEL-2', 'WHEEL-3']
+        # 签到完成后才开始转盘
+        methods = [(method, url.rsplit('/', 1)[-1]) for method, url in session.requests]
+        assert methods.index(('POST', 'checkin')) < methods.index(('POST', 'wheel'))
+
+    def test_early_stop_records_in_flight_spins(self):
+        session = DummyAsyncSession(wheel_remaining=10)
+        acquired = []
+
+        async def run():
+            steps = build_fuli_wheel_steps(
+                session,
+                {},
+                'acct',
+                origin='https://fuli.example',
+                spin_interval=0,
+                on_acquired=lambda success, data: acquired.append(data['code']),
+            )
+            stream = StepGraph(steps).stream()
+            taken = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return taken
+
+        taken = asyncio.run(run())
+        spins = sum(1 for method, url in session.requests if method == 'POST' and url.endswith('/api/wheel'))
+
+        assert taken == [(True, {'code': 'CHECKIN-CODE'}), (True, {'code': 'WHEEL-1'})]
+        # 调用方还拿着 WHEEL-1 时不会启动下一次转盘
+        assert spins == 1
+        assert acquired == ['CHECKIN-CODE', 'WHEEL-1']
+
+    def test_pipeline_draws_at_most_one_ahead_of_topup(self):
+        session = DummyAsyncSession(wheel_remaining=10)
+        handled = []
+
+        async def handle(success, data):
+            handled.append(data['code'])
+            await asyncio.sleep(0.05)
+            return data['code'] != 'WHEEL-2'
+
+        async def run():
+            steps = build_fuli_wheel_steps(session, {}, 'acct', origin='https://fuli.example', spin_interval=0)
+            return await run_cdk_pipeline(StepGraph(steps).stream(), handle)
+
+        leftovers = asyncio.run(run())
+        spins = sum(1 for method, url in session.requests if method == 'POST' and url.endswith('/api/wheel'))
+
+        assert handled == ['CHECKIN-CODE', 'WHEEL-1', 'WHEEL-2']
+        # 充值 WHEEL-2 失败时只多转了一次
+        assert spins == 3
+        assert leftovers == [(True, {'code': 'WHEEL-3'})]
@@ -0,0 +1,311 @@
+"""Tests for utils/topup_pipeline.py."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from utils import checkin_http
+from utils.cdk_ledger import CdkLedger
+from utils.config import AccountConfig, ProviderConfig
+from utils.topup import is_rate_limit_message, parse_retry_after
+from utils.topup_pipeline import (
+    ADAPTIVE_INITIAL_INTERVAL,
+    ADAPTIVE_MIN_INTERVAL,
+    AdaptiveTopupPacer,
+    TopupPacer,
+    load_topup_pacing,
+    run_cdk_pipeline,
+)
+
+
+def sync_cdks(items: list, pulled: list):
+    for item in items:
+        pulled.append(item)
+        yield item
+
+
+async def async_cdks(items: list, pulled: list):
+    for item in items:
+        pulled.append(item)
+        yield item
+
+
+class TestRunCdkPipeline:
+    @pytest.mark.parametrize('factory', [sync_cdks, async_cdks])
+    def test_processes_items_in_order(self, factory):
+        items = [(True, {'code': 'a'}), (True, {'code': 'b'}), (True, {'code': 'c'})]
+        handled = []
+
+        async def handle(success, data):
+            handled.append(data['code'])
+            return True
+
+        asyncio.run(run_cdk_pipeline(factory(items, []), handle))
+        assert handled == ['a', 'b', 'c']
+
+    @pytest.mark.parametrize('factory', [sync_cdks, async_cdks])
+    def test_stops_after_failure(self, factory):
+        items = [(True, {'code': str(i)}) for i in range(10)]
+        pulled = []
+        handled = []
+
+        async def handle(success, data):
+            handled.append(data['code'])
+            return data['code'] != '1'
+
+        leftovers = asyncio.run(run_cdk_pipeline(factory(items, pulled), handle))
+        assert handled == ['0', '1']
+        # 最多领先一次获取，多获取的结果交还调用方
+        assert len(pulled) <= 3
+        assert leftovers == pulled[2:]
+
+    @pytest.mark.parametrize('factory', [sync_cdks, async_cdks])
+    def test_producer_stays_one_draw_ahead(self, factory):
+        items = [(True, {'code': str(i)}) for i in range(5)]
+        pulled = []
+        ahead = []
+
+        async def handle(success, data):
+            await asyncio.sleep(0.02)
+            ahead.append(len(pulled) - (int(data['code']) + 1))
+            return True
+
+        asyncio.run(run_cdk_pipeline(factory(items, pulled), handle))
+        assert max(ahead) <= 1
+        assert len(pulled) == 5
+
+    def test_producer_error_is_raised(self):
+        def broken():
+            yield True, {'code': 'a'}
+            raise RuntimeError('boom')
+
+        async def handle(success, data):
+            return True
+
+        with pytest.raises(RuntimeError, match='boom'):
+            asyncio.run(run_cdk_pipeline(broken(), handle))
+
+
+class TestTopupPacer:
+    def test_first_topup_has_no_delay(self):
+        pacer = TopupPacer(60)
+        assert pacer.delay() == 0
+
+    def test_delay_after_mark(self):
+        pacer = TopupPacer(60)
+        pacer.mark()
+        assert 59 < pacer.delay() <= 60
+
+    def test_zero_interval(self):
+        pacer = TopupPacer(0)
+        pacer.mark()
+        assert pacer.delay() == 0
+
+
+class TestAdaptiveTopupPacer:
+    def test_starts_aggressive_and_backs_off(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_file = os.path.join(tmpdir, 'topup_pacing.json')
+            pacer = AdaptiveTopupPacer('b4u', state_file)
+            assert pacer.interval == ADAPTIVE_INITIAL_INTERVAL
+
+            pacer.mark({'success': False, 'rate_limited': True, 'retry_after': None})
+            assert pacer.interval == ADAPTIVE_INITIAL_INTERVAL * 2
+
+            pacer.mark({'success': False, 'rate_limited': True, 'retry_after': 120})
+            assert pacer.interval == 120
+
+            # 下次运行使用学习到的间隔
+            assert AdaptiveTopupPacer('b4u', state_file).interval == 120
+            assert load_topup_pacing(state_file)['b4u']['rate_limited_interval'] == ADAPTIVE_INITIAL_INTERVAL * 2
+
+    def test_provider_interval_caps_backoff(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_file = os.path.join(tmpdir, 'topup_pacing.json')
+            pacer = AdaptiveTopupPacer('b4u', state_file, max_interval=60)
+            # 不从配置的固定间隔开始
+            assert pacer.interval == ADAPTIVE_INITIAL_INTERVAL
+
+            for _ in range(10):
+                pacer.mark({'success': False, 'rate_limited': True, 'retry_after': None})
+            assert pacer.interval == 60
+
+            # provider 明确要求更久时仍然遵守
+            pacer.mark({'success': False, 'rate_limited': True, 'retry_after': 300})
+            assert pacer.interval == 300
+            assert AdaptiveTopupPacer('b4u', state_file, max_interval=60).interval == 60
+            assert AdaptiveTopupPacer('b4u', state_file, max_interval=3600).interval == 300
+            assert AdaptiveTopupPacer('b4u', state_file, max_interval=0).max_interval == ADAPTIVE_MIN_INTERVAL
+
+    def test_speeds_up_after_successes_but_not_below_rate_limited_interval(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pacer = AdaptiveTopupPacer('runawaytime', os.path.join(tmpdir, 'topup_pacing.json'))
+            pacer.mark({'success': False, 'rate_limited': True})
+            for _ in range(30):
+                pacer.mark({'success': True})
+            assert pacer.interval > pacer.rate_limited_interval
+            assert pacer.interval < ADAPTIVE_INITIAL_INTERVAL * 2
+
+
+class TestRateLimitDetection:
+    def test_is_rate_limit_message(self):
+        assert is_rate_limit_message('兑换过于频繁，请稍后再试') is True
+        assert is_rate_limit_message('Too frequent, slow down') is True
+        assert is_rate_limit_message('兑换码无效') is False
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after('30') == 30
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+        assert parse_retry_after(None) is None
+
+
+class TestExecuteTopup:
+    def _run(self, monkeypatch, cdks: list, topup_results: list) -> dict:
+        monkeypatch.setattr(checkin_http, 'topup', lambda **kwargs: topup_results.pop(0))
+        provider_config = ProviderConfig(
+            name='test', origin='https://example.com', get_cdk=lambda account: iter(cdks), topup_interval=0
+        )
+        account_config = AccountConfig(provider='test')
+        return asyncio.run(
+            checkin_http.execute_topup('acct', provider_config, account_config, {}, {}, 1)
+        )
+
+    def test_counts_successful_topups(self, monkeypatch):
+        result = self._run(
+            monkeypatch,
+            [(True, {'code': 'a'}), (True, {'code': ''}), (True, {'code': 'b'})],
+            [{'success': True}, {'success': True, 'already_used': True}],
+        )
+        assert result == {'success': True, 'topup_count': 2, 'topup_success_count': 2, 'error': ''}
+
+    def test_stops_on_topup_failure(self, monkeypatch):
+        result = self._run(
+            monkeypatch,
+            [(True, {'code': 'a'}), (True, {'code': 'b'}), (True, {'code': 'c'})],
+            [{'success': True}, {'success': False, 'error': 'invalid'}],
+        )
+        assert result == {'success': False, 'topup_count': 2, 'topup_success_count': 1, 'error': 'invalid'}
+
+    def test_stops_on_cdk_failure(self, monkeypatch):
+        result = self._run(monkeypatch, [(False, {'error': 'no cdk'}), (True, {'code': 'a'})], [])
+        assert result == {'success': False, 'topup_count': 0, 'topup_success_count': 0, 'error': 'no cdk'}
+
+    def test_retries_rate_limited_cdk_with_adaptive_pacer(self, monkeypatch):
+        async def no_wait(self, account_name):
+            return None
+
+        monkeypatch.setattr(AdaptiveTopupPacer, 'wait', no_wait)
+        topup_results = [{'success': False, 'rate_limited': True, 'retry_after': 1}, {'success': True}]
+        monkeypatch.setattr(checkin_http, 'topup', lambda **kwargs: topup_results.pop(0))
+        provider_config = ProviderConfig(
+            name='test', origin='https://example.com', get_cdk=lambda account: iter([(True, {'code': 'a'})])
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = asyncio.run(
+                checkin_http.execute_topup(
+                    'acct',
+                    provider_config,
+                    AccountConfig(provider='test'),
+                    {},
+                    {},
+                    1,
+                    pacing_state_file=os.path.join(tmpdir, 'topup_pacing.json'),
+                )
+            )
+
+        assert result == {'success': True, 'topup_count': 1, 'topup_success_count': 1, 'error': ''}
+
+    def test_redeems_pending_ledger_codes_first(self, monkeypatch):
+        monkeypatch.setenv('CDK_LEDGER_KEY', 'secret')
+        redeemed = []
+
+        def fake_topup(**kwargs):
+            redeemed.append(kwargs['key'])
+            if kwargs['key'] == 'new-2':
+                return {'success': False, 'error': 'boom'}
+            return {'success': True, 'already_used': kwargs['key'] == 'old'}
+
+        monkeypatch.setattr(checkin_http, 'topup', fake_topup)
+
+        def get_cdk(account):
+            yield True, {'code': 'new-1'}
+            yield True, {'code': 'new-2'}
+
+        provider_config = ProviderConfig(name='test', origin='https://example.com', get_cdk=get_cdk, topup_interval=0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, 'cdk_ledger.jsonl')
+            CdkLedger(ledger_file, 'test', 'acct', 'secret').record_acquired('old')
+
+            result = asyncio.run(
+                checkin_http.execute_topup(
+                    'acct', provider_config, AccountConfig(provider='test'), {}, {}, 1, ledger_file=ledger_file
+                )
+            )
+
+            assert redeemed == ['old', 'new-1', 'new-2']
+            assert result['topup_count'] == 3
+            assert result['topup_success_count'] == 2
+            # 失败的 CDK 留在账本中，下次运行重试
+            assert CdkLedger(ledger_file, 'test', 'acct', 'secret').pending_codes() == ['new-2']
+
+
+class TestPendingLedgerFailure:
+    def test_pending_failure_does_not_block_new_cdks(self, monkeypatch):
+        monkeypatch.setenv('CDK_LEDGER_KEY', 'secret')
+        redeemed = []
+
+        def fake_topup(**kwargs):
+            redeemed.append(kwargs['key'])
+            if kwargs['key'] == 'stale':
+                return {'success': False, 'error': 'invalid CDK', 'terminal': True}
+            return {'success': True}
+
+        monkeypatch.setattr(checkin_http, 'topup', fake_topup)
+        provider_config = ProviderConfig(
+            name='test',
+            origin='https://example.com',
+            get_cdk=lambda account: iter([(True, {'code': 'fresh'})]),
+            topup_interval=0,
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_file = os.path.join(tmpdir, 'cdk_ledger.jsonl')
+            CdkLedger(ledger_file, 'test', 'acct', 'secret').record_acquired('stale')
+
+            result = asyncio.run(
+                checkin_http.execute_topup(
+                    'acct', provider_config, AccountConfig(provider='test'), {}, {}, 1, ledger_file=ledger_file
+                )
+            )
+
+            assert redeemed == ['stale', 'fresh']
+            assert result['success'] is True
+            assert result['error'] == ''
+            assert result['topup_count'] == 2
+            assert result['topup_success_count'] == 1
+            # 被明确拒绝的 CDK 不再重试
+            assert CdkLedger(ledger_file, 'test', 'acct', 'secret').pending_codes() == []
+
+
+class TestCreateCdkGenerator:
+    def test_passes_hook_only_when_supported(self):
+        calls = []
+
+        def with_hook(account, on_acquired=None):
+            calls.append(on_acquired)
+            return iter([])
+
+        def without_hook(account):
+            calls.append('plain')
+            return iter([])
+
+        hook = object()
+        checkin_http.create_cdk_generator(with_hook, None, hook)
+        checkin_http.create_cdk_generator(without_hook, None, hook)
+        assert calls == [hook, 'plain']
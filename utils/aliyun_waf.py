@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+阿里云 WAF acw_sc__v2 挑战的纯 Python 求解
+
+挑战页中的 arg1 经过固定的位置置换 + 异或掩码即可得到 acw_sc__v2，
+无需启动浏览器；挑战页格式变化时返回 None，由调用方回退到浏览器。
+"""
+
+from __future__ import annotations
+
+import re
+
+from curl_cffi import requests as curl_requests
+
+from utils.http_utils import detect_challenge
+from utils.safe_logging import mask_secret
+
+# 挑战脚本中的置换表（1-based）与异或掩码
+ACW_SC_V2_POS_LIST = [
+    15, 35, 29, 24, 33, 16, 1, 38, 10, 9, 19, 31, 40, 27, 22, 23, 25, 13, 6, 11,
+    39, 18, 20, 8, 14, 21, 32, 26, 2, 30, 7, 4, 17, 5, 3, 28, 34, 37, 12, 36,
+]
+ACW_SC_V2_MASK = '3000176000856006061501533003690027800375'
+
+WAF_COOKIE_NAMES = ('acw_tc', 'cdn_sec_tc', 'acw_sc__v2')
+
+_ARG1_PATTERN = re.compile(r"var\s+arg1\s*=\s*['\"]([0-9A-Fa-f]{40})['\"]")
+
+
+def extract_arg1(html: str) -> str | None:
+    """从挑战页中提取 arg1，格式不符时返回 None"""
+    if not html:
+        return None
+    match = _ARG1_PATTERN.search(html)
+    return match.group(1) if match else None
+
+
+def compute_acw_sc_v2(arg1: str) -> str:
+    """根据 arg1 计算 acw_sc__v2
+
+    Args:
+        arg1: 挑战页中的 40 位十六进制字符串
+
+    Returns:
+        acw_sc__v2 cookie 值
+    """
+    if len(arg1) != len(ACW_SC_V2_POS_LIST):
+        raise ValueError(f'Unexpected arg1 length: {len(arg1)}')
+
+    output = [''] * len(ACW_SC_V2_POS_LIST)
+    for index, char in enumerate(arg1):
+        for position, target in enumerate(ACW_SC_V2_POS_LIST):
+            if target == index + 1:
+                output[position] = char
+    unboxed = ''.join(output)
+
+    result = []
+    for i in range(0, min(len(unboxed), len(ACW_SC_V2_MASK)), 2):
+        value = int(unboxed[i : i + 2], 16) ^ int(ACW_SC_V2_MASK[i : i + 2], 16)
+        result.append(f'{value:02x}')
+    return ''.join(result)
+
+
+def get_waf_cookies_with_http(
+    account_name: str,
+    url: str,
+    proxy: dict | None = None,
+    impersonate: str = 'firefox135',
+    headers: dict | None = None,
+) -> dict | None:
+    """通过两次 HTTP 请求获取阿里云 WAF cookies
+
+    Args:
+        account_name: 账号名称（用于日志）
+        url: 触发挑战的页面地址（通常是登录页）
+        proxy: curl_cffi 代理配置
+        impersonate: curl_cffi 浏览器指纹，应与后续请求使用的指纹档案一致（WAF cookies 与指纹绑定）
+        headers: 请求头（指纹档案记录的 User-Agent / Client Hints）
+
+    Returns:
+        WAF cookies 字典；挑战格式无法识别或校验失败时返回 None
+    """
+    print(f'ℹ️ {account_name}: Solving Aliyun WAF challenge over HTTP')
+    session = curl_requests.Session(impersonate=impersonate, proxy=proxy, timeout=30)
+    try:
+        response = session.get(url, headers=headers, timeout=30)
+        arg1 = extract_arg1(response.text)
+        if not arg1:
+            waf_cookies = _collect_waf_cookies(session)
+            if response.status_code == 200 and waf_cookies and not detect_challenge(response):
+                print(f'ℹ️ {account_name}: No acw_sc__v2 challenge served, using {list(waf_cookies.keys())}')
+                return waf_cookies
+            print(f'⚠️ {account_name}: Aliyun WAF challenge format not recognized (HTTP {response.status_code})')
+            return None
+
+        acw_sc_v2 = compute_acw_sc_v2(arg1)
+        session.cookies.set('acw_sc__v2', acw_sc_v2)
+
+        verify_response = session.get(url, headers=headers, timeout=30)
+        if extract_arg1(verify_response.text):
+            print(f'⚠️ {account_name}: Computed acw_sc__v2 was rejected by WAF')
+            return None
+
+        waf_cookies = _collect_waf_cookies(session)
+        waf_cookies['acw_sc__v2'] = acw_sc_v2
+        for name, value in waf_cookies.items():
+            print(f'  📚 Cookie: {name} (value: {mask_secret(value)})')
+        print(f'✅ {account_name}: Aliyun WAF challenge solved over HTTP: {list(waf_cookies.keys())}')
+        return waf_cookies
+    except Exception as e:
+        print(f'⚠️ {account_name}: Error occurred while solving Aliyun WAF challenge over HTTP: {e}')
+        return None
+    finally:
+        session.close()
+
+
+def _collect_waf_cookies(session: curl_requests.Session) -> dict:
+    """从 session 中取出 WAF 相关 cookies"""
+    waf_cookies = {}
+    for name in WAF_COOKIE_NAMES:
+        value = session.cookies.get(name)
+        if value:
+            waf_cookies[name] = value
+    return waf_cookies
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+浏览器就绪检测
+
+用事件代替固定 sleep：页面每次收到响应 / 导航时检查 context cookies，目标 cookie 出现后立即返回；
+同时按较长的间隔兜底轮询（JS 写入的 cookie 不一定伴随网络事件）。超时只作为上限。
+
+ReadinessStrategy 描述 provider 页面的就绪条件（cookie / 响应 URL / 选择器），任一满足即返回。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable
+
+# 触发 cookie 检查的页面事件
+COOKIE_CHANGE_EVENTS = ('response', 'framenavigated', 'load')
+
+# Cloudflare 挑战页特征
+CF_CHALLENGE_TITLES = ('Just a moment',)
+CF_CHALLENGE_MARKERS = ('Checking your browser',)
+
+_CF_PAGE_STATE_SCRIPT = """(args) => {
+    const [titles, markers] = args;
+    const title = document.title || '';
+    const text = document.body ? (document.body.innerText || '') : '';
+    if (titles.some((t) => title.includes(t)) || markers.some((m) => text.includes(m))) {
+        return 'challenge';
+    }
+    return document.readyState === 'complete' ? 'complete' : 'loading';
+}"""
+
+
+async def wait_for_cookies(
+    context,
+    page,
+    names: list[str] | tuple[str, ...],
+    timeout: int = 30000,
+    poll_interval: int = 1000,
+    match_any: bool = False,
+    stop_when: Callable[[dict], Awaitable[bool]] | None = None,
+) -> dict | None:
+    """等待指定 cookie 出现
+
+    Args:
+        context: 浏览器 context（提供 cookies()）
+        page: 页面实例，用于监听响应 / 导航事件
+        names: 目标 cookie 名称
+        timeout: 最长等待时间（毫秒）
+        poll_interval: 没有页面事件时的兜底检查间隔（毫秒）
+        match_any: True 时任一 cookie 出现即返回，否则需要全部出现
+        stop_when: 每次检查时调用，参数为当前全部 cookies，返回 True 时提前放弃
+
+    Returns:
+        {name: value}（仅包含目标 cookie）；超时或提前放弃时返回 None
+    """
+    wanted = list(dict.fromkeys(names))
+    changed = asyncio.Event()
+
+    def on_event(*_args) -> None:
+        changed.set()
+
+    for event in COOKIE_CHANGE_EVENTS:
+        page.on(event, on_event)
+
+    deadline = time.monotonic() + timeout / 1000
+    try:
+        while True:
+            changed.clear()
+            cookies = await get_cookie_dict(context)
+            found = {name: cookies[name] for name in wanted if name in cookies}
+            if found and (match_any or len(found) == len(wanted)):
+                return found
+
+            if stop_when is not None and await stop_when(cookies):
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=min(poll_interval / 1000, remaining))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for event in COOKIE_CHANGE_EVENTS:
+            try:
+                page.remove_listener(event, on_event)
+            except Exception:
+                pass
+
+
+async def get_cookie_dict(context) -> dict:
+    """context 中的全部 cookies：{name: value}"""
+    cookies = {}
+    for cookie in await context.cookies():
+        name = cookie.get('name')
+        value = cookie.get('value')
+        if name and value is not None:
+            cookies[name] = value
+    return cookies
+
+
+async def get_cf_page_state(page) -> str:
+    """根据标题和页面文本判断 Cloudflare 页面状态
+
+    Returns:
+        "challenge"（挑战页）、"complete"（已加载完成）或 "loading"（加载中 / 正在导航）
+    """
+    try:
+        return await page.evaluate(_CF_PAGE_STATE_SCRIPT, [list(CF_CHALLENGE_TITLES), list(CF_CHALLENGE_MARKERS)])
+    except Exception:
+        # 导航过程中执行上下文会被销毁
+        return 'loading'
+
+
+@dataclass
+class ReadinessStrategy:
+    """页面就绪条件，任一条件满足即视为就绪；timeout 只是上限
+
+    Attributes:
+        cookie_names: 这些 cookie 全部出现
+        response_url: 收到 URL 中包含该字符串的响应
+        selector: 元素达到 selector_state
+        selector_state: attached / detached / visible / hidden
+        timeout: 最长等待时间（毫秒）
+    """
+
+    cookie_names: tuple[str, ...] = ()
+    response_url: str | None = None
+    selector: str | None = None
+    selector_state: str = 'attached'
+    timeout: int = 15000
+
+    def merge(self, overrides: dict | None) -> 'ReadinessStrategy':
+        """用 provider 配置中的 readiness 字段覆盖默认值"""
+        if not overrides:
+            return self
+        return replace(
+            self,
+            cookie_names=tuple(overrides.get('cookie_names', self.cookie_names)),
+            response_url=overrides.get('response_url', self.response_url),
+            selector=overrides.get('selector', self.selector),
+            selector_state=overrides.get('selector_state', self.selector_state),
+            timeout=int(overrides.get('timeout', self.timeout)),
+        )
+
+
+async def wait_until_ready(
+    context,
+    page,
+    strategy: ReadinessStrategy,
+    trigger: Callable[[], Awaitable] | None = None,
+) -> str | None:
+    """等待页面满足就绪条件
+
+    Args:
+        context: 浏览器 context（提供 cookies()）
+        page: 页面实例
+        strategy: 就绪条件
+        trigger: 监听就绪条件后执行的动作（例如 page.goto），确保不会错过导航过程中的响应
+
+    Returns:
+        满足的条件（"cookies" / "response" / "selector"）；超时返回 None
+    """
+    waiters: dict[asyncio.Task, str] = {}
+    if strategy.cookie_names:
+        waiters[
+            asyncio.create_task(wait_for_cookies(context, page, strategy.cookie_names, timeout=strategy.timeout))
+        ] = 'cookies'
+    if strategy.response_url:
+        response_url = strategy.response_url
+        waiters[
+            asyncio.create_task(
+                page.wait_for_event(
+                    'response', predicate=lambda response: response_url in response.url, timeout=strategy.timeout
+                )
+            )
+        ] = 'response'
+
+    try:
+        if trigger is not None:
+            # 让监听任务先注册事件，再执行导航
+            await asyncio.sleep(0)
+            await trigger()
+        if strategy.selector:
+            # 选择器在导航之后再等待，避免命中上一个页面的元素
+            waiters[
+                asyncio.create_task(
+                    page.wait_for_selector(strategy.selector, state=strategy.selector_state, timeout=strategy.timeout)
+                )
+            ] = 'selector'
+
+        pending = set(waiters)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                if waiters[task] == 'cookies' and task.result() is None:
+                    continue
+                return waiters[task]
+        return None
+    finally:
+        for task in waiters:
+            task.cancel()
+        if waiters:
+            await asyncio.gather(*waiters, return_exceptions=True)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+浏览器资源拦截（轻量页面模式）
+
+自动化流程只读取 cookies、localStorage 和少量 DOM，图片 / 字体 / 媒体以及第三方统计脚本都不需要加载。
+ResourceGuard 在 context 上注册路由拦截这些请求；每个流程有自己的放行列表（验证码组件所在的域名必须放行）。
+无论是否开启拦截，都会统计页面请求数、传输字节与加载耗时，便于对比开启前后的效果。
+
+通过 BROWSER_LIGHT_MODE=true 开启拦截。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from urllib.parse import urlparse
+
+from utils.runtime_flags import browser_light_mode_enabled
+
+# 拦截的资源类型（Playwright resource_type）
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+# 拦截的第三方统计 / 广告 / 监控域名（包含子域名）
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'clarity.ms',
+    'hotjar.com',
+    'sentry.io',
+    'cloudflareinsights.com',
+    'plausible.io',
+    'umami.is',
+    'hm.baidu.com',
+    'cnzz.com',
+    'facebook.net',
+    'segment.com',
+)
+
+# 各流程放行的域名（包含子域名），这些域名下的任何资源都不拦截
+FLOW_ALLOW_HOSTS = {
+    'cf_clearance': ('challenges.cloudflare.com',),
+    'waf': ('alicdn.com', 'aliyuncs.com'),
+    'aliyun_captcha': ('alicdn.com', 'aliyuncs.com', 'aliyun.com'),
+    'github': ('octocaptcha.com', 'arkoselabs.com', 'funcaptcha.com', 'challenges.cloudflare.com'),
+    'linuxdo': ('challenges.cloudflare.com',),
+}
+
+
+def _host_matches(host: str, domains: tuple[str, ...] | list[str]) -> bool:
+    return any(host == domain or host.endswith(f'.{domain}') for domain in domains)
+
+
+def should_block_request(url: str, resource_type: str, allow_hosts: tuple[str, ...] | list[str] = ()) -> bool:
+    """判断请求是否应被拦截
+
+    Args:
+        url: 请求地址
+        resource_type: Playwright 资源类型（document / script / image / ...）
+        allow_hosts: 放行的域名
+
+    Returns:
+        True 表示拦截
+    """
+    host = (urlparse(url).hostname or '').lower()
+    if not host or resource_type == 'document':
+        return False
+    if _host_matches(host, allow_hosts):
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return _host_matches(host, BLOCKED_HOSTS)
+
+
+class ResourceGuard:
+    """为一个浏览器 context 注册资源拦截并统计页面资源"""
+
+    def __init__(
+        self,
+        flow: str,
+        account_name: str,
+        enabled: bool | None = None,
+        allow_hosts: tuple[str, ...] = (),
+    ):
+        """
+        Args:
+            flow: 流程名称，用于选择放行列表和日志
+            account_name: 账号名称（用于日志）
+            enabled: 是否拦截，默认读取 BROWSER_LIGHT_MODE
+            allow_hosts: 额外放行的域名
+        """
+        self.flow = flow
+        self.account_name = account_name
+        self.enabled = browser_light_mode_enabled() if enabled is None else enabled
+        self.allow_hosts = tuple(FLOW_ALLOW_HOSTS.get(flow, ())) + tuple(allow_hosts)
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.load_ms: int | None = None
+        self._started_at: float | None = None
+        self._size_tasks: set[asyncio.Task] = set()
+
+    async def attach(self, context) -> None:
+        """注册路由拦截与统计监听；之后打开的页面都会生效"""
+        if self.enabled:
+            await context.route('**/*', self._handle_route)
+        context.on('request', self._on_request)
+        context.on('requestfinished', self._on_request_finished)
+        context.on('page', self.watch_page)
+        for page in getattr(context, 'pages', []) or []:
+            self.watch_page(page)
+
+    def watch_page(self, page) -> None:
+        """记录页面首次 load 事件的耗时"""
+        page.on('load', self._on_load)
+
+    async def _handle_route(self, route) -> None:
+        request = route.request
+        if should_block_request(request.url, request.resource_type, self.allow_hosts):
+            self.blocked += 1
+            await route.abort()
+            return
+        await route.continue_()
+
+    def _on_request(self, request) -> None:
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        self.requests += 1
+
+    def _on_load(self, *_args) -> None:
+        if self.load_ms is None and self._started_at is not None:
+            self.load_ms = int((time.monotonic() - self._started_at) * 1000)
+
+    def _on_request_finished(self, request) -> None:
+        task = asyncio.ensure_future(self._add_request_size(request))
+        self._size_tasks.add(task)
+        task.add_done_callback(self._size_tasks.discard)
+
+    async def _add_request_size(self, request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes += int(sizes.get('responseBodySize', 0) or 0) + int(sizes.get('responseHeadersSize', 0) or 0)
+
+    def report(self) -> dict:
+        """当前统计：{"flow", "light_mode", "requests", "blocked", "bytes", "load_ms"}"""
+        return {
+            'flow': self.flow,
+            'light_mode': self.enabled,
+            'requests': self.requests,
+            'blocked': self.blocked,
+            'bytes': self.bytes,
+            'load_ms': self.load_ms,
+        }
+
+    async def print_report(self) -> dict:
+        """等待未完成的字节统计后输出报告"""
+        if self._size_tasks:
+            await asyncio.gather(*self._size_tasks, return_exceptions=True)
+        report = self.report()
+        load = f"{report['load_ms'] / 1000:.1f}s" if report['load_ms'] is not None else 'n/a'
+        print(
+            f"ℹ️ {self.account_name}: {self.flow} page resources "
+            f"(light mode: {'on' if self.enabled else 'off'}): {report['requests']} requests, "
+            f"{report['bytes'] / 1024:.0f} KB, {report['blocked']} blocked, load {load}"
+        )
+        return report
@@ -8,6 +8,8 @@ import random
 from datetime import datetime
 from urllib.parse import urlparse
 
+from utils.browser_readiness import ReadinessStrategy, wait_until_ready
+
 
 def parse_cookies(cookies_data) -> dict:
     """解析 cookies 数据
@@ -199,14 +201,16 @@ async def save_page_content_to_file(
         print(f"⚠️ {account_name}: Failed to save HTML: {e}")
 
 
-async def aliyun_captcha_check(page, account_name: str) -> bool:
+async def aliyun_captcha_check(page, account_name: str, readiness: ReadinessStrategy | None = None) -> bool:
     """阿里云验证码检查和处理
 
-    检查页面是否有阿里云验证码（通过 traceid 检测），如果有则尝试自动滑动验证
+    检查页面是否有阿里云验证码（通过 traceid 检测），如果有则尝试自动滑动验证；
+    滑动后等到验证码消失或命中 readiness.response_url 即返回（最多 20 秒）
 
     Args:
         page: Camoufox/Playwright 页面对象
         account_name: 账号名称（用于日志输出）
+        readiness: provider 的就绪条件，使用其中的 response_url
 
     Returns:
         bool: 验证码处理是否成功（无验证码或验证通过返回 True，验证失败返回 False）
@@ -256,8 +260,18 @@ async def aliyun_captcha_check(page, account_name: str) -> bool:
                     await page.mouse.up()
                     await take_screenshot(page, "aliyun_captcha_slider_completed", account_name)
 
-                    # Wait for page to be fully loaded
-                    await page.wait_for_timeout(20000)
+                    # 等待验证码消失或页面请求 provider 接口
+                    signal = await wait_until_ready(
+                        page.context,
+                        page,
+                        ReadinessStrategy(
+                            response_url=readiness.response_url if readiness else None,
+                            selector="#traceid",
+                            selector_state="detached",
+                            timeout=20000,
+                        ),
+                    )
+                    print(f"ℹ️ {account_name}: Page after slider ready by {signal or 'timeout'}")
 
                     await take_screenshot(page, "aliyun_captcha_slider_result", account_name)
                     return True
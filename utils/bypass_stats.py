@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Bypass 统计模块
+
+记录每个 provider 在 lazy bypass 模式下实际命中挑战页的频率，以及浏览器求解挑战的耗时
+"""
+
+import json
+import os
+from datetime import datetime
+
+BYPASS_STATS_FILE = "bypass_stats.json"
+
+
+def load_bypass_stats(stats_file: str) -> dict:
+    """加载 bypass 统计
+
+    Args:
+        stats_file: 统计文件路径
+
+    Returns:
+        {provider: {"probes": int, "challenges": int, "by_kind": {kind: int}, "last_challenge_at": str}}
+    """
+    try:
+        if os.path.exists(stats_file):
+            with open(stats_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+    except Exception as e:
+        print(f"Warning: Failed to load bypass stats: {e}")
+    return {}
+
+
+def save_bypass_stats(stats_file: str, stats: dict) -> None:
+    """保存 bypass 统计
+
+    Args:
+        stats_file: 统计文件路径
+        stats: 统计数据
+    """
+    try:
+        with open(stats_file, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Warning: Failed to save bypass stats: {e}")
+
+
+def record_bypass_probe(stats_file: str, provider_name: str, challenge: str | None) -> dict:
+    """记录一次 lazy bypass 直连尝试
+
+    Args:
+        stats_file: 统计文件路径
+        provider_name: provider 名称
+        challenge: 命中的挑战类型，未命中则为 None
+
+    Returns:
+        该 provider 更新后的统计
+    """
+    stats = load_bypass_stats(stats_file)
+    provider_stats = stats.setdefault(provider_name, {"probes": 0, "challenges": 0, "by_kind": {}})
+    provider_stats["probes"] = int(provider_stats.get("probes", 0)) + 1
+
+    if challenge:
+        provider_stats["challenges"] = int(provider_stats.get("challenges", 0)) + 1
+        by_kind = provider_stats.setdefault("by_kind", {})
+        by_kind[challenge] = int(by_kind.get(challenge, 0)) + 1
+        provider_stats["last_challenge_at"] = datetime.now().isoformat()
+
+    save_bypass_stats(stats_file, stats)
+    return provider_stats
+
+
+def record_solve_latency(stats_file: str, provider_name: str, elapsed_ms: int, solved: bool) -> dict:
+    """记录一次浏览器挑战求解的耗时
+
+    Args:
+        stats_file: 统计文件路径
+        provider_name: provider 名称（或站点 host）
+        elapsed_ms: 本次求解耗时（毫秒）
+        solved: 是否拿到了目标 cookie
+
+    Returns:
+        该 provider 更新后的求解统计 {"attempts", "solved", "avg_ms", "last_ms", "last_solved_at"}
+    """
+    stats = load_bypass_stats(stats_file)
+    provider_stats = stats.setdefault(provider_name, {})
+    solve_stats = provider_stats.setdefault("solve", {"attempts": 0, "solved": 0, "avg_ms": 0, "last_ms": 0})
+    solve_stats["attempts"] = int(solve_stats.get("attempts", 0)) + 1
+    solve_stats["last_ms"] = int(elapsed_ms)
+
+    if solved:
+        solved_count = int(solve_stats.get("solved", 0)) + 1
+        # 平均耗时只统计成功的求解
+        solve_stats["avg_ms"] = int((int(solve_stats.get("avg_ms", 0)) * (solved_count - 1) + elapsed_ms) / solved_count)
+        solve_stats["solved"] = solved_count
+        solve_stats["last_solved_at"] = datetime.now().isoformat()
+
+    save_bypass_stats(stats_file, stats)
+    return solve_stats
+
+
+def format_challenge_rate(provider_stats: dict) -> str:
+    """格式化挑战命中率，例如 "2/10 (20%)" """
+    probes = int(provider_stats.get("probes", 0))
+    challenges = int(provider_stats.get("challenges", 0))
+    if probes <= 0:
+        return "0/0"
+    return f"{challenges}/{probes} ({challenges * 100 // probes}%)"
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+CDK 账本
+
+获取到的 CDK 先追加写入账本（加密保存），充值后再追加兑换结果；
+进程在获取与充值之间被中断、或充值失败提前停止时，下次运行可以先兑换账本中未完成的 CDK。
+
+账本为 JSONL 追加写入，每行一个事件：
+- acquired: 新获取的 CDK（code 为加密后的值，code_hash 用于关联后续事件）
+- redeemed / already_used: 已兑换 / 已被使用，不再处理
+- rejected: provider 明确拒绝（例如无效 CDK），不再重试
+- failed: 临时失败（限频 / 网络 / 5xx），超过 MAX_REDEEM_ATTEMPTS 次后放弃
+- key_check: 密钥校验值，用于发现 CDK_LEDGER_KEY 被更换
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime
+
+CDK_LEDGER_FILE = 'cdk_ledger.jsonl'
+
+# 单个 CDK 最多兑换失败次数，超过后不再重试
+MAX_REDEEM_ATTEMPTS = 3
+
+_NONCE_SIZE = 16
+_TAG_SIZE = 16
+
+
+def get_ledger_secret() -> str | None:
+    """账本加密密钥，只使用 CDK_LEDGER_KEY
+
+    不从 ACCOUNTS 派生：修改账号配置会让已保存的 CDK 全部无法解密。
+    """
+    return os.getenv('CDK_LEDGER_KEY') or None
+
+
+class CdkCipher:
+    """基于 HMAC-SHA256 的流加密（仅使用标准库），带完整性校验"""
+
+    def __init__(self, secret: str):
+        master = hashlib.sha256(secret.encode('utf-8')).digest()
+        self._enc_key = hmac.new(master, b'cdk-ledger-enc', hashlib.sha256).digest()
+        self._mac_key = hmac.new(master, b'cdk-ledger-mac', hashlib.sha256).digest()
+        self._hash_key = hmac.new(master, b'cdk-ledger-hash', hashlib.sha256).digest()
+
+    def _keystream(self, nonce: bytes, length: int) -> bytes:
+        blocks = []
+        for counter in range((length + 31) // 32):
+            blocks.append(hmac.new(self._enc_key, nonce + counter.to_bytes(4, 'big'), hashlib.sha256).digest())
+        return b''.join(blocks)[:length]
+
+    def encrypt(self, plaintext: str) -> str:
+        data = plaintext.encode('utf-8')
+        nonce = os.urandom(_NONCE_SIZE)
+        ciphertext = bytes(a ^ b for a, b in zip(data, self._keystream(nonce, len(data))))
+        tag = hmac.new(self._mac_key, nonce + ciphertext, hashlib.sha256).digest()[:_TAG_SIZE]
+        return base64.urlsafe_b64encode(nonce + ciphertext + tag).decode('ascii')
+
+    def decrypt(self, token: str) -> str | None:
+        """解密，密钥不匹配或数据被篡改时返回 None"""
+        try:
+            raw = base64.urlsafe_b64decode(token.encode('ascii'))
+        except Exception:
+            return None
+        if len(raw) < _NONCE_SIZE + _TAG_SIZE:
+            return None
+        nonce, ciphertext, tag = raw[:_NONCE_SIZE], raw[_NONCE_SIZE:-_TAG_SIZE], raw[-_TAG_SIZE:]
+        expected = hmac.new(self._mac_key, nonce + ciphertext, hashlib.sha256).digest()[:_TAG_SIZE]
+        if not hmac.compare_digest(tag, expected):
+            return None
+        data = bytes(a ^ b for a, b in zip(ciphertext, self._keystream(nonce, len(ciphertext))))
+        return data.decode('utf-8', errors='replace')
+
+    def code_hash(self, code: str) -> str:
+        return hmac.new(self._hash_key, code.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+    def key_check(self) -> str:
+        """密钥校验值（不泄露密钥本身）"""
+        return hmac.new(self._hash_key, b'cdk-ledger-key-check', hashlib.sha256).hexdigest()[:16]
+
+
+class CdkLedger:
+    """单个 provider + 账号的 CDK 账本视图"""
+
+    def __init__(self, ledger_file: str, provider: str, account: str, secret: str):
+        self.ledger_file = ledger_file
+        self.provider = provider
+        self.account = account
+        self.cipher = CdkCipher(secret)
+
+    def _append(self, record: dict) -> None:
+        record = {'provider': self.provider, 'account': self.account, **record}
+        try:
+            with open(self.ledger_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f'Warning: Failed to write CDK ledger: {e}')
+
+    def _load_events(self) -> list[dict]:
+        events = []
+        try:
+            if not os.path.exists(self.ledger_file):
+                return events
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 进程中断可能留下不完整的最后一行
+                        continue
+                    if event.get('provider') == self.provider and event.get('account') == self.account:
+                        events.append(event)
+        except Exception as e:
+            print(f'Warning: Failed to load CDK ledger: {e}')
+        return events
+
+    def record_acquired(self, code: str) -> None:
+        """记录新获取的 CDK"""
+        self._append(
+            {
+                'event': 'acquired',
+                'code_hash': self.cipher.code_hash(code),
+                'code': self.cipher.encrypt(code),
+                'acquired_at': datetime.now().isoformat(),
+            }
+        )
+
+    def record_result(self, code: str, result: dict) -> None:
+        """根据 topup() 结果记录兑换状态"""
+        if result.get('already_used'):
+            event = 'already_used'
+        elif result.get('success'):
+            event = 'redeemed'
+        elif result.get('terminal'):
+            event = 'rejected'
+        else:
+            event = 'failed'
+        record = {'event': event, 'code_hash': self.cipher.code_hash(code), 'at': datetime.now().isoformat()}
+        if event in ('failed', 'rejected') and result.get('error'):
+            # topup() 的错误信息带有 "(key: <CDK>)"，写入前去掉明文 CDK
+            record['error'] = str(result['error']).replace(f'(key: {code})', '').replace(code, '<cdk>')
+        self._append(record)
+
+    def verify_key(self) -> bool:
+        """校验当前密钥与账本中记录的是否一致；首次使用时写入校验值
+
+        不一致时大声告警：旧密钥加密的 CDK 无法解密，只能放弃。
+        """
+        expected = self.cipher.key_check()
+        stored = [event.get('key_check') for event in self._load_events() if event.get('event') == 'key_check']
+        if not stored:
+            self._append({'event': 'key_check', 'key_check': expected, 'at': datetime.now().isoformat()})
+            return True
+        if stored[-1] == expected:
+            return True
+        print(
+            f'❌ {self.account}: CDK ledger key mismatch for {self.provider} - CDK_LEDGER_KEY changed, '
+            'CDKs saved with the previous key cannot be decrypted and will be skipped'
+        )
+        self._append({'event': 'key_check', 'key_check': expected, 'at': datetime.now().isoformat()})
+        return False
+
+    def pending_codes(self) -> list[str]:
+        """未兑换完成的 CDK（按获取顺序）"""
+        codes: dict[str, str | None] = {}
+        finished: set[str] = set()
+        failures: dict[str, int] = {}
+
+        for event in self._load_events():
+            code_hash = event.get('code_hash')
+            if not code_hash:
+                continue
+            kind = event.get('event')
+            if kind == 'acquired':
+                codes.setdefault(code_hash, self.cipher.decrypt(event.get('code', '')))
+            elif kind in ('redeemed', 'already_used', 'rejected'):
+                finished.add(code_hash)
+            elif kind == 'failed':
+                failures[code_hash] = failures.get(code_hash, 0) + 1
+
+        pending = []
+        for code_hash, code in codes.items():
+            if code_hash in finished or failures.get(code_hash, 0) >= MAX_REDEEM_ATTEMPTS:
+                continue
+            if code is None:
+                # 密钥变化导致无法解密，只能放弃
+                continue
+            pending.append(code)
+        return pending
+
+
+def open_cdk_ledger(ledger_file: str | None, provider: str, account: str) -> CdkLedger | None:
+    """打开账本；未配置文件或没有可用密钥时返回 None（不记录）"""
+    if not ledger_file:
+        return None
+    secret = get_ledger_secret()
+    if not secret:
+        print(f'⚠️ {account}: CDK ledger disabled (set CDK_LEDGER_KEY to keep unredeemed CDKs across runs)')
+        return None
+    ledger = CdkLedger(ledger_file, provider, account, secret)
+    ledger.verify_key()
+    return ledger
@@ -11,11 +11,16 @@ from typing import TYPE_CHECKING
 
 from camoufox.async_api import AsyncCamoufox
 
+from utils.browser_readiness import wait_until_ready
+from utils.browser_resources import FLOW_ALLOW_HOSTS, ResourceGuard
 from utils.browser_utils import aliyun_captcha_check, take_screenshot
+from utils.fingerprint_profiles import camoufox_fingerprint_options
+from utils.proxy_egress import camoufox_geo_options
 from utils.safe_logging import mask_secret
 
 if TYPE_CHECKING:
     from utils.config import ProviderConfig
+    from utils.fingerprint_profiles import FingerprintProfile
 
 
 async def get_waf_cookies_with_browser(
@@ -23,12 +28,14 @@ async def get_waf_cookies_with_browser(
     safe_account_name: str,
     camoufox_proxy_config: dict | None,
     provider_config: 'ProviderConfig',
+    fingerprint_profile: 'FingerprintProfile | None' = None,
 ) -> dict | None:
     print(
         f"ℹ️ {account_name}: Starting browser to get WAF cookies "
         f"(using proxy: {'true' if camoufox_proxy_config else 'false'})"
     )
 
+    geo_options = await camoufox_geo_options(camoufox_proxy_config)
     with tempfile.TemporaryDirectory(prefix=f'camoufox_{safe_account_name}_waf_') as tmp_dir:
         print(f'ℹ️ {account_name}: Using temporary directory: {tmp_dir}')
         async with AsyncCamoufox(
@@ -37,25 +44,30 @@ async def get_waf_cookies_with_browser(
             headless=False,
             humanize=True,
             locale='en-US',
-            geoip=True if camoufox_proxy_config else False,
             proxy=camoufox_proxy_config,
-            os='macos',
+            **geo_options,
+            **camoufox_fingerprint_options(fingerprint_profile),
         ) as browser:
+            resource_guard = ResourceGuard('waf', account_name)
+            await resource_guard.attach(browser)
             page = await browser.new_page()
 
             try:
                 print(f'ℹ️ {account_name}: Access login page to get initial cookies')
-                await page.goto(provider_config.get_login_url(), wait_until='networkidle')
-
-                try:
-                    await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                except Exception:
-                    await page.wait_for_timeout(3000)
+                readiness = provider_config.get_readiness_strategy()
+                signal = await wait_until_ready(
+                    browser,
+                    page,
+                    readiness,
+                    trigger=lambda: page.goto(provider_config.get_login_url(), wait_until='commit'),
+                )
+                print(f"ℹ️ {account_name}: Login page ready by {signal or 'timeout'}")
 
                 if provider_config.aliyun_captcha:
-                    captcha_check = await aliyun_captcha_check(page, account_name)
-                    if captcha_check:
-                        await page.wait_for_timeout(3000)
+                    await aliyun_captcha_check(page, account_name, readiness)
+
+                if fingerprint_profile is not None:
+                    await fingerprint_profile.capture(page)
 
                 cookies = await browser.cookies()
                 waf_cookies = {}
@@ -78,6 +90,7 @@ async def get_waf_cookies_with_browser(
                 print(f'❌ {account_name}: Error occurred while getting WAF cookies: {e}')
                 return None
             finally:
+                await resource_guard.print_report()
                 await page.close()
 
 
@@ -86,12 +99,14 @@ async def get_aliyun_captcha_cookies_with_browser(
     safe_account_name: str,
     camoufox_proxy_config: dict | None,
     provider_config: 'ProviderConfig',
+    fingerprint_profile: 'FingerprintProfile | None' = None,
 ) -> dict | None:
     print(
         f"ℹ️ {account_name}: Starting browser to get Aliyun captcha cookies "
         f"(using proxy: {'true' if camoufox_proxy_config else 'false'})"
     )
 
+    geo_options = await camoufox_geo_options(camoufox_proxy_config)
     with tempfile.TemporaryDirectory(prefix=f'camoufox_{safe_account_name}_aliyun_captcha_') as tmp_dir:
         print(f'ℹ️ {account_name}: Using temporary directory: {tmp_dir}')
         async with AsyncCamoufox(
@@ -100,26 +115,26 @@ async def get_aliyun_captcha_cookies_with_browser(
             headless=False,
             humanize=True,
             locale='en-US',
-            geoip=True if camoufox_proxy_config else False,
             proxy=camoufox_proxy_config,
-            os='macos',
+            **geo_options,
+            **camoufox_fingerprint_options(fingerprint_profile),
         ) as browser:
+            resource_guard = ResourceGuard('aliyun_captcha', account_name)
+            await resource_guard.attach(browser)
             page = await browser.new_page()
 
             try:
                 print(f'ℹ️ {account_name}: Access login page to get initial cookies')
-                await page.goto(provider_config.get_login_url(), wait_until='networkidle')
-
-                try:
-                    await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                except Exception:
-                    await page.wait_for_timeout(3000)
-
-                    try:
-                        await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                    except Exception:
-                        await page.wait_for_timeout(3000)
+                signal = await wait_until_ready(
+                    browser,
+                    page,
+                    provider_config.get_readiness_strategy(),
+                    trigger=lambda: page.goto(provider_config.get_login_url(), wait_until='commit'),
+                )
+                print(f"ℹ️ {account_name}: Login page ready by {signal or 'timeout'}")
 
+                # 超时或验证码元素出现时确认验证码是否仍然存在
+                if signal in (None, 'selector'):
                     traceid_after = None
                     try:
                         traceid_after = await page.evaluate(
@@ -145,6 +160,9 @@ async def get_aliyun_captcha_cookies_with_browser(
 
                     print(f'✅ {account_name}: Captcha verification successful, traceid cleared')
 
+                if fingerprint_profile is not None:
+                    await fingerprint_profile.capture(page)
+
                 cookies = await browser.cookies()
                 aliyun_captcha_cookies = {}
                 print(f'ℹ️ {account_name}: Aliyun Captcha cookies')
@@ -171,64 +189,241 @@ async def get_aliyun_captcha_cookies_with_browser(
                 print(f'❌ {account_name}: Error occurred while getting Aliyun Captcha cookies, {e}')
                 return None
             finally:
+                await resource_guard.print_report()
                 await page.close()
 
 
+# 在页面内并发执行多个同源 API 请求，单个请求失败不影响其他请求
+_BATCH_FETCH_SCRIPT = """async (requests) => {
+    const entries = await Promise.all(Object.entries(requests).map(async ([name, url]) => {
+        try {
+            const response = await fetch(url, { credentials: 'include' });
+            try {
+                return [name, await response.json()];
+            } catch (e) {
+                return [name, { success: false, message: `HTTP ${response.status}: invalid JSON response` }];
+            }
+        } catch (e) {
+            return [name, { success: false, message: e.message }];
+        }
+    }));
+    return Object.fromEntries(entries);
+}"""
+
+
+class BrowserSessionBroker:
+    """单账号浏览器会话代理
+
+    只打开一个页面并通过 WAF，之后把任意数量的同源 API 请求合并到一次 page.evaluate 中执行，
+    用于 HTTP 被拦截时的浏览器兜底：一次导航代替每个接口各启动一次浏览器。
+    """
+
+    def __init__(
+        self,
+        account_name: str,
+        safe_account_name: str,
+        camoufox_proxy_config: dict | None,
+        provider_config: 'ProviderConfig',
+        auth_cookies: list[dict] | None = None,
+        fingerprint_profile: 'FingerprintProfile | None' = None,
+    ):
+        self.account_name = account_name
+        self.safe_account_name = safe_account_name
+        self.camoufox_proxy_config = camoufox_proxy_config
+        self.provider_config = provider_config
+        self.auth_cookies = auth_cookies or []
+        self.fingerprint_profile = fingerprint_profile
+        self.browser = None
+        self.page = None
+        self._tmp_dir: tempfile.TemporaryDirectory | None = None
+        self._camoufox: AsyncCamoufox | None = None
+        self._responses: dict[str, dict] = {}
+        self._resource_guard: ResourceGuard | None = None
+
+    async def __aenter__(self) -> 'BrowserSessionBroker':
+        print(
+            f"ℹ️ {self.account_name}: Starting browser session broker "
+            f"(using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
+        )
+        geo_options = await camoufox_geo_options(self.camoufox_proxy_config)
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix=f'camoufox_{self.safe_account_name}_broker_')
+        print(f'ℹ️ {self.account_name}: Using temporary directory: {self._tmp_dir.name}')
+        try:
+            self._camoufox = AsyncCamoufox(
+                user_data_dir=self._tmp_dir.name,
+                persistent_context=True,
+                headless=False,
+                humanize=True,
+                locale='en-US',
+                proxy=self.camoufox_proxy_config,
+                **geo_options,
+                **camoufox_fingerprint_options(self.fingerprint_profile),
+            )
+            self.browser = await self._camoufox.__aenter__()
+            if self.auth_cookies:
+                await self.browser.add_cookies(self.auth_cookies)
+            self._resource_guard = ResourceGuard(
+                'login',
+                self.account_name,
+                allow_hosts=FLOW_ALLOW_HOSTS['aliyun_captcha'] if self.provider_config.aliyun_captcha else (),
+            )
+            await self._resource_guard.attach(self.browser)
+            self.page = await self.browser.new_page()
+
+            print(f'ℹ️ {self.account_name}: Opening login page')
+            readiness = self.provider_config.get_readiness_strategy()
+            signal = await wait_until_ready(
+                self.browser,
+                self.page,
+                readiness,
+                trigger=lambda: self.page.goto(self.provider_config.get_login_url(), wait_until='commit'),
+            )
+            print(f"ℹ️ {self.account_name}: Login page ready by {signal or 'timeout'}")
+
+            if self.provider_config.aliyun_captcha:
+                await aliyun_captcha_check(self.page, self.account_name, readiness)
+            if self.fingerprint_profile is not None:
+                await self.fingerprint_profile.capture(self.page)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        try:
+            if self._resource_guard is not None:
+                await self._resource_guard.print_report()
+                self._resource_guard = None
+            if self.page is not None:
+                await self.page.close()
+        except Exception:
+            pass
+        finally:
+            self.page = None
+            camoufox, self._camoufox = self._camoufox, None
+            try:
+                if camoufox is not None:
+                    await camoufox.__aexit__(*args)
+            finally:
+                if self._tmp_dir is not None:
+                    self._tmp_dir.cleanup()
+                    self._tmp_dir = None
+
+    def _api_urls(self) -> dict[str, str]:
+        return {
+            'status': self.provider_config.get_status_url(),
+            'auth_state': self.provider_config.get_auth_state_url(),
+            'user_info': self.provider_config.get_user_info_url(),
+        }
+
+    async def fetch_json(self, requests: dict[str, str]) -> dict[str, dict]:
+        """在一次 page.evaluate 中批量请求同源 API
+
+        Args:
+            requests: {名称: URL}
+
+        Returns:
+            {名称: 响应 JSON}，请求失败时为 {"success": False, "message": ...}
+        """
+        if not requests:
+            return {}
+        print(f'ℹ️ {self.account_name}: Fetching {list(requests.keys())} in one batched page.evaluate')
+        responses = await self.page.evaluate(_BATCH_FETCH_SCRIPT, requests)
+        return responses or {}
+
+    async def prefetch(self, *names: str) -> None:
+        """预先批量请求 status / auth_state / user_info，后续 get_* 直接使用结果"""
+        urls = self._api_urls()
+        pending = {name: urls[name] for name in names if name in urls and name not in self._responses}
+        self._responses.update(await self.fetch_json(pending))
+
+    async def _response(self, name: str) -> dict | None:
+        if name not in self._responses:
+            await self.prefetch(name)
+        return self._responses.get(name)
+
+    async def get_status(self) -> dict | None:
+        """获取站点状态，优先读取 localStorage.status"""
+        try:
+            status_str = await self.page.evaluate("() => localStorage.getItem('status')")
+            if status_str:
+                print(f'✅ {self.account_name}: Got status from localStorage')
+                return json.loads(status_str)
+        except Exception as e:
+            print(f'⚠️ {self.account_name}: Error reading status from localStorage: {e}')
+
+        response = await self._response('status')
+        if response and response.get('success') and isinstance(response.get('data'), dict):
+            print(f'✅ {self.account_name}: Got status from API')
+            return response['data']
+
+        print(f'⚠️ {self.account_name}: No status found in localStorage')
+        return None
+
+    async def get_auth_state(self) -> dict:
+        """获取 OAuth 认证状态与 cookies"""
+        try:
+            response = await self._response('auth_state')
+            if response and 'data' in response:
+                cookies = await self.browser.cookies()
+                return {
+                    'success': True,
+                    'state': response.get('data'),
+                    'cookies': cookies,
+                }
+
+            return {'success': False, 'error': f'Failed to get state, \n{json.dumps(response, indent=2)}'}
+        except Exception as e:
+            print(f'❌ {self.account_name}: Failed to get state, {e}')
+            await take_screenshot(self.page, 'auth_url_error', self.account_name)
+            return {'success': False, 'error': 'Failed to get state'}
+
+    async def get_user_info(self, quota_divisor: int | float) -> dict:
+        """获取用户余额信息"""
+        try:
+            response = await self._response('user_info')
+            if response and 'data' in response:
+                user_data = response.get('data') or {}
+                quota = round(user_data.get('quota', 0) / quota_divisor, 2)
+                used_quota = round(user_data.get('used_quota', 0) / quota_divisor, 2)
+                bonus_quota = round(user_data.get('bonus_quota', 0) / quota_divisor, 2)
+                print(
+                    f'✅ {self.account_name}: Current balance: ${quota}, Used: ${used_quota}, Bonus: ${bonus_quota}'
+                )
+                return {
+                    'success': True,
+                    'quota': quota,
+                    'used_quota': used_quota,
+                    'bonus_quota': bonus_quota,
+                    'display': f'Current balance: ${quota}, Used: ${used_quota}, Bonus: ${bonus_quota}',
+                }
+
+            return {'success': False, 'error': f'Failed to get user info, \n{json.dumps(response, indent=2)}'}
+        except Exception as e:
+            print(f'❌ {self.account_name}: Failed to get user info, {e}')
+            await take_screenshot(self.page, 'user_info_error', self.account_name)
+            return {'success': False, 'error': 'Failed to get user info'}
+
+
 async def get_status_with_browser(
     account_name: str,
     safe_account_name: str,
     camoufox_proxy_config: dict | None,
     provider_config: 'ProviderConfig',
+    fingerprint_profile: 'FingerprintProfile | None' = None,
 ) -> dict | None:
-    print(
-        f"ℹ️ {account_name}: Starting browser to get status "
-        f"(using proxy: {'true' if camoufox_proxy_config else 'false'})"
-    )
-
-    with tempfile.TemporaryDirectory(prefix=f'camoufox_{safe_account_name}_status_') as tmp_dir:
-        print(f'ℹ️ {account_name}: Using temporary directory: {tmp_dir}')
-        async with AsyncCamoufox(
-            user_data_dir=tmp_dir,
-            persistent_context=True,
-            headless=False,
-            humanize=True,
-            locale='en-US',
-            geoip=True if camoufox_proxy_config else False,
-            proxy=camoufox_proxy_config,
-            os='macos',
-        ) as browser:
-            page = await browser.new_page()
-
-            try:
-                print(f'ℹ️ {account_name}: Access status page to get status from localStorage')
-                await page.goto(provider_config.get_login_url(), wait_until='networkidle')
-
-                try:
-                    await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                except Exception:
-                    await page.wait_for_timeout(3000)
-
-                if provider_config.aliyun_captcha:
-                    captcha_check = await aliyun_captcha_check(page, account_name)
-                    if captcha_check:
-                        await page.wait_for_timeout(3000)
-
-                try:
-                    status_str = await page.evaluate("() => localStorage.getItem('status')")
-                    if status_str:
-                        print(f'✅ {account_name}: Got status from localStorage')
-                        return json.loads(status_str)
-
-                    print(f'⚠️ {account_name}: No status found in localStorage')
-                    return None
-                except Exception as e:
-                    print(f'⚠️ {account_name}: Error reading status from localStorage: {e}')
-                    return None
-            except Exception as e:
-                print(f'❌ {account_name}: Error occurred while getting status: {e}')
-                return None
-            finally:
-                await page.close()
+    try:
+        async with BrowserSessionBroker(
+            account_name,
+            safe_account_name,
+            camoufox_proxy_config,
+            provider_config,
+            fingerprint_profile=fingerprint_profile,
+        ) as broker:
+            return await broker.get_status()
+    except Exception as e:
+        print(f'❌ {account_name}: Error occurred while getting status: {e}')
+        return None
 
 
 async def get_auth_state_with_browser(
@@ -236,70 +431,20 @@ async def get_auth_state_with_browser(
     safe_account_name: str,
     camoufox_proxy_config: dict | None,
     provider_config: 'ProviderConfig',
+    fingerprint_profile: 'FingerprintProfile | None' = None,
 ) -> dict:
-    print(
-        f"ℹ️ {account_name}: Starting browser to get auth state "
-        f"(using proxy: {'true' if camoufox_proxy_config else 'false'})"
-    )
-
-    with tempfile.TemporaryDirectory(prefix=f'camoufox_{safe_account_name}_auth_') as tmp_dir:
-        print(f'ℹ️ {account_name}: Using temporary directory: {tmp_dir}')
-        async with AsyncCamoufox(
-            user_data_dir=tmp_dir,
-            persistent_context=True,
-            headless=False,
-            humanize=True,
-            locale='en-US',
-            geoip=True if camoufox_proxy_config else False,
-            proxy=camoufox_proxy_config,
-            os='macos',
-        ) as browser:
-            page = await browser.new_page()
-
-            try:
-                print(f'ℹ️ {account_name}: Opening login page')
-                await page.goto(provider_config.get_login_url(), wait_until='networkidle')
-
-                try:
-                    await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                except Exception:
-                    await page.wait_for_timeout(3000)
-
-                if provider_config.aliyun_captcha:
-                    captcha_check = await aliyun_captcha_check(page, account_name)
-                    if captcha_check:
-                        await page.wait_for_timeout(3000)
-
-                response = await page.evaluate(
-                    f"""async () => {{
-                        try{{
-                            const response = await fetch('{provider_config.get_auth_state_url()}');
-                            const data = await response.json();
-                            return data;
-                        }}catch(e){{
-                            return {{
-                                success: false,
-                                message: e.message
-                            }};
-                        }}
-                    }}"""
-                )
-
-                if response and 'data' in response:
-                    cookies = await browser.cookies()
-                    return {
-                        'success': True,
-                        'state': response.get('data'),
-                        'cookies': cookies,
-                    }
-
-                return {'success': False, 'error': f'Failed to get state, \n{json.dumps(response, indent=2)}'}
-            except Exception as e:
-                print(f'❌ {account_name}: Failed to get state, {e}')
-                await take_screenshot(page, 'auth_url_error', account_name)
-                return {'success': False, 'error': 'Failed to get state'}
-            finally:
-                await page.close()
+    try:
+        async with BrowserSessionBroker(
+            account_name,
+            safe_account_name,
+            camoufox_proxy_config,
+            provider_config,
+            fingerprint_profile=fingerprint_profile,
+        ) as broker:
+            return await broker.get_auth_state()
+    except Exception as e:
+        print(f'❌ {account_name}: Failed to get state, {e}')
+        return {'success': False, 'error': 'Failed to get state'}
 
 
 async def get_user_info_with_browser(
@@ -309,69 +454,18 @@ async def get_user_info_with_browser(
     provider_config: 'ProviderConfig',
     quota_divisor: int | float,
     auth_cookies: list[dict],
+    fingerprint_profile: 'FingerprintProfile | None' = None,
 ) -> dict:
-    print(
-        f"ℹ️ {account_name}: Starting browser to get user info "
-        f"(using proxy: {'true' if camoufox_proxy_config else 'false'})"
-    )
-
-    with tempfile.TemporaryDirectory(prefix=f'camoufox_{safe_account_name}_user_info_') as tmp_dir:
-        print(f'ℹ️ {account_name}: Using temporary directory: {tmp_dir}')
-        async with AsyncCamoufox(
-            user_data_dir=tmp_dir,
-            persistent_context=True,
-            headless=False,
-            humanize=True,
-            locale='en-US',
-            geoip=True if camoufox_proxy_config else False,
-            proxy=camoufox_proxy_config,
-            os='macos',
-        ) as browser:
-            page = await browser.new_page()
-            browser.add_cookies(auth_cookies)
-
-            try:
-                print(f'ℹ️ {account_name}: Opening main page')
-                await page.goto(provider_config.origin, wait_until='networkidle')
-
-                try:
-                    await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-                except Exception:
-                    await page.wait_for_timeout(3000)
-
-                if provider_config.aliyun_captcha:
-                    captcha_check = await aliyun_captcha_check(page, account_name)
-                    if captcha_check:
-                        await page.wait_for_timeout(3000)
-
-                response = await page.evaluate(
-                    f"""async () => {{
-                       const response = await fetch(
-                           '{provider_config.get_user_info_url()}'
-                       );
-                       const data = await response.json();
-                       return data;
-                    }}"""
-                )
-
-                if response and 'data' in response:
-                    user_data = response.get('data', {})
-                    quota = round(user_data.get('quota', 0) / quota_divisor, 2)
-                    used_quota = round(user_data.get('used_quota', 0) / quota_divisor, 2)
-                    bonus_quota = round(user_data.get('bonus_quota', 0) / quota_divisor, 2)
-                    print(f'✅ {account_name}: Current balance: ${quota}, Used: ${used_quota}, Bonus: ${bonus_quota}')
-                    return {
-                        'success': True,
-                        'quota': quota,
-                        'used_quota': used_quota,
-                        'bonus_quota': bonus_quota,
-                        'display': f'Current balance: ${quota}, Used: ${used_quota}, Bonus: ${bonus_quota}',
-                    }
-
-                return {'success': False, 'error': f'Failed to get user info, \n{json.dumps(response, indent=2)}'}
-            except Exception as e:
-                print(f'❌ {account_name}: Failed to get user info, {e}')
-                await take_screenshot(page, 'user_info_error', account_name)
-                return {'success': False, 'error': 'Failed to get user info'}
-            finally:
-                await page.close()
+    try:
+        async with BrowserSessionBroker(
+            account_name,
+            safe_account_name,
+            camoufox_proxy_config,
+            provider_config,
+            auth_cookies,
+            fingerprint_profile=fingerprint_profile,
+        ) as broker:
+            return await broker.get_user_info(quota_divisor)
+    except Exception as e:
+        print(f'❌ {account_name}: Failed to get user info, {e}')
+        return {'success': False, 'error': 'Failed to get user info'}
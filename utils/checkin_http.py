@@ -12,63 +12,157 @@ from urllib.parse import urlparse
 
 from curl_cffi import requests as curl_requests
 
-from utils.http_utils import classify_transport_error, response_resolve
+from utils.cdk_ledger import open_cdk_ledger
+from utils.http_utils import classify_transport_error, detect_challenge, response_resolve
 from utils.safe_logging import mask_secret
 from utils.topup import topup
+from utils.topup_pipeline import AdaptiveTopupPacer, TopupPacer, run_cdk_pipeline
 
 if TYPE_CHECKING:
     from utils.config import AccountConfig, ProviderConfig
+    from utils.provider_capabilities import ProviderCapabilityCache
 
 
-async def get_auth_client_id(
+# 单个 CDK 被限频时的最大重试次数
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+def _attach_challenge(result: dict, response: curl_requests.Response) -> dict:
+    """在失败结果中标记挑战页类型，供 lazy bypass 判断是否需要获取 bypass 后重试。"""
+    challenge = detect_challenge(response)
+    if challenge:
+        result['challenge'] = challenge
+    return result
+
+
+def fetch_status(
     account_name: str,
     provider_config: 'ProviderConfig',
     session: curl_requests.Session,
     headers: dict,
-    provider: str,
+    context: str = 'get_status',
 ) -> dict:
+    """请求 /api/status，返回 {"success": True, "data": status} 或错误信息"""
     try:
         response = session.get(provider_config.get_status_url(), headers=headers, timeout=30)
 
         if response.status_code == 200:
-            data = response_resolve(response, f'get_auth_client_id_{provider}', account_name)
+            data = response_resolve(response, context, account_name)
             if data is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to get client id: Invalid response type (saved to logs)',
-                }
-
-            if data.get('success'):
-                status_data = data.get('data', {})
-                oauth = status_data.get(f'{provider}_oauth', False)
-                if not oauth:
-                    return {
+                return _attach_challenge(
+                    {
                         'success': False,
-                        'error': f'{provider} OAuth is not enabled.',
-                    }
+                        'error': 'Invalid response type (saved to logs)',
+                    },
+                    response,
+                )
 
-                client_id = status_data.get(f'{provider}_client_id', '')
-                return {
-                    'success': True,
-                    'client_id': client_id,
-                }
+            if data.get('success'):
+                status_data = data.get('data') or {}
+                return {'success': True, 'data': status_data}
 
-            error_msg = data.get('message', 'Unknown error')
             return {
                 'success': False,
-                'error': f'Failed to get client id: {error_msg}',
+                'error': data.get('message', 'Unknown error'),
             }
 
+        return _attach_challenge(
+            {
+                'success': False,
+                'error': f'HTTP {response.status_code}',
+            },
+            response,
+        )
+    except Exception as e:
         return {
             'success': False,
-            'error': f'Failed to get client id: HTTP {response.status_code}',
+            'error': classify_transport_error(e),
+            'transport_error': True,
         }
-    except Exception as e:
+
+
+async def resolve_provider_status(
+    account_name: str,
+    provider_config: 'ProviderConfig',
+    session: curl_requests.Session,
+    headers: dict,
+    capability_cache: 'ProviderCapabilityCache | None' = None,
+    context: str = 'get_status',
+) -> dict:
+    """获取 /api/status，有能力缓存时优先使用缓存并写回
+
+    Returns:
+        与 fetch_status 相同结构的结果字典，命中缓存时 cached 为 True
+    """
+
+    def fetch() -> dict:
+        return fetch_status(account_name, provider_config, session, headers, context)
+
+    if capability_cache is None:
+        # 在线程中执行阻塞请求，让预启动的 OAuth 浏览器可以并行启动
+        return await asyncio.to_thread(fetch)
+
+    # 后台刷新在线程中运行，使用独立 session（复制当前 cookies），避免与主流程共享连接
+    impersonate = session.impersonate
+    proxies = dict(session.proxies)
+    cookies = dict(session.cookies)
+    refresh_headers = headers.copy()
+
+    def refresh() -> dict:
+        refresh_session = curl_requests.Session(impersonate=impersonate, proxies=proxies, timeout=30)
+        try:
+            refresh_session.cookies.update(cookies)
+            return fetch_status(account_name, provider_config, refresh_session, refresh_headers, context)
+        finally:
+            refresh_session.close()
+
+    status_result = await capability_cache.resolve(provider_config.origin, fetch, refresh)
+    if status_result.get('cached'):
+        print(f'ℹ️ {account_name}: Using cached provider status for {provider_config.origin}')
+    return status_result
+
+
+async def get_auth_client_id(
+    account_name: str,
+    provider_config: 'ProviderConfig',
+    session: curl_requests.Session,
+    headers: dict,
+    provider: str,
+    capability_cache: 'ProviderCapabilityCache | None' = None,
+) -> dict:
+    status_result = await resolve_provider_status(
+        account_name, provider_config, session, headers, capability_cache, f'get_auth_client_id_{provider}'
+    )
+
+    if not status_result.get('success'):
+        separator = ', ' if status_result.get('transport_error') else ': '
+        result = {
+            'success': False,
+            'error': f"Failed to get client id{separator}{status_result.get('error', 'Unknown error')}",
+        }
+        if status_result.get('challenge'):
+            result['challenge'] = status_result['challenge']
+        return result
+
+    return client_id_from_status(status_result.get('data', {}), provider)
+
+
+def client_id_from_status(status_data: dict | None, provider: str) -> dict:
+    """从 /api/status 数据中取出 OAuth client id（HTTP 与浏览器兜底共用）"""
+    status_data = status_data or {}
+    oauth = status_data.get(f'{provider}_oauth', False)
+    if not oauth:
         return {
             'success': False,
-            'error': f'Failed to get client id, {classify_transport_error(e)}',
+            'error': f'{provider} OAuth is not enabled.',
         }
 
+    client_id = status_data.get(f'{provider}_client_id', '')
+    return {
+        'success': True,
+        'client_id': client_id,
+    }
+
 
 async def get_auth_state(
     account_name: str,
@@ -77,7 +171,9 @@ async def get_auth_state(
     headers: dict,
 ) -> dict:
     try:
-        response = session.get(
+        # 在线程中执行阻塞请求，让预启动的 OAuth 浏览器可以并行启动
+        response = await asyncio.to_thread(
+            session.get,
             provider_config.get_auth_state_url(),
             headers=headers,
             timeout=30,
@@ -86,10 +182,13 @@ async def get_auth_state(
         if response.status_code == 200:
             json_data = response_resolve(response, 'get_auth_state', account_name)
             if json_data is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to get auth state: Invalid response type (saved to logs)',
-                }
+                return _attach_challenge(
+                    {
+                        'success': False,
+                        'error': 'Failed to get auth state: Invalid response type (saved to logs)',
+                    },
+                    response,
+                )
 
             if json_data.get('success'):
                 auth_data = json_data.get('data')
@@ -133,10 +232,13 @@ async def get_auth_state(
                 'error': f'Failed to get auth state: {error_msg}',
             }
 
-        return {
-            'success': False,
-            'error': f'Failed to get auth state: HTTP {response.status_code}',
-        }
+        return _attach_challenge(
+            {
+                'success': False,
+                'error': f'Failed to get auth state: HTTP {response.status_code}',
+            },
+            response,
+        )
     except Exception as e:
         return {
             'success': False,
@@ -157,10 +259,13 @@ async def get_user_info(
         if response.status_code == 200:
             json_data = response_resolve(response, 'get_user_info', account_name)
             if json_data is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to get user info: Invalid response type (saved to logs)',
-                }
+                return _attach_challenge(
+                    {
+                        'success': False,
+                        'error': 'Failed to get user info: Invalid response type (saved to logs)',
+                    },
+                    response,
+                )
 
             if json_data.get('success'):
                 user_data = json_data.get('data', {})
@@ -181,10 +286,13 @@ async def get_user_info(
                 'error': f'Failed to get user info: {error_msg}',
             }
 
-        return {
-            'success': False,
-            'error': f'Failed to get user info: HTTP {response.status_code}',
-        }
+        return _attach_challenge(
+            {
+                'success': False,
+                'error': f'Failed to get user info: HTTP {response.status_code}',
+            },
+            response,
+        )
     except Exception as e:
         return {
             'success': False,
@@ -221,7 +329,7 @@ def execute_check_in(
                 return {'success': True, 'message': 'Check-in successful'}
 
             print(f'❌ {account_name}: Check-in failed - Invalid response format')
-            return {'success': False, 'error': 'Invalid response format'}
+            return _attach_challenge({'success': False, 'error': 'Invalid response format'}, response)
 
         message = json_data.get('message', json_data.get('msg', ''))
         if (
@@ -252,7 +360,32 @@ def execute_check_in(
         return {'success': False, 'error': error_msg}
 
     print(f'❌ {account_name}: Check-in failed - HTTP {response.status_code}')
-    return {'success': False, 'error': f'HTTP {response.status_code}'}
+    return _attach_challenge({'success': False, 'error': f'HTTP {response.status_code}'}, response)
+
+
+def build_topup_headers(provider_config: 'ProviderConfig', headers: dict, api_user: str | int) -> dict:
+    """构建充值请求头（Referer / Origin / api user）"""
+    topup_headers = headers.copy()
+    topup_headers.update(
+        {
+            'Referer': f'{provider_config.origin}/console/topup',
+            'Origin': provider_config.origin,
+            provider_config.api_user_key: f'{api_user}',
+        }
+    )
+    return topup_headers
+
+
+def create_cdk_generator(get_cdk, account_config: 'AccountConfig', on_acquired):
+    """调用 get_cdk；支持 on_acquired 参数的 get_cdk 会在拿到 CDK 的那一刻记账，
+    不依赖调用方是否还在消费（提前停止时在途请求拿到的 CDK 也不会丢失）"""
+    try:
+        accepts_hook = 'on_acquired' in inspect.signature(get_cdk).parameters
+    except (TypeError, ValueError):
+        accepts_hook = False
+    if accepts_hook:
+        return get_cdk(account_config, on_acquired=on_acquired)
+    return get_cdk(account_config)
 
 
 async def execute_topup(
@@ -262,7 +395,9 @@ async def execute_topup(
     headers: dict,
     cookies: dict,
     api_user: str | int,
-    topup_interval: int = 60,
+    topup_interval: int | None = None,
+    pacing_state_file: str | None = None,
+    ledger_file: str | None = None,
 ) -> dict:
     if not provider_config.get_cdk:
         print(f'ℹ️ {account_name}: No get_cdk function configured for provider {provider_config.name}')
@@ -273,14 +408,7 @@ async def execute_topup(
             'error': '',
         }
 
-    topup_headers = headers.copy()
-    topup_headers.update(
-        {
-            'Referer': f'{provider_config.origin}/console/topup',
-            'Origin': provider_config.origin,
-            provider_config.api_user_key: f'{api_user}',
-        }
-    )
+    topup_headers = build_topup_headers(provider_config, headers, api_user)
 
     results = {
         'success': True,
@@ -289,12 +417,62 @@ async def execute_topup(
         'error': '',
     }
 
-    cdk_generator = provider_config.get_cdk(account_config)
     topup_count = 0
+    ledger = open_cdk_ledger(ledger_file, provider_config.name, account_name)
+    recorded_codes: set[str] = set()
+
+    def record_acquired(success: bool, data: dict) -> None:
+        code = data.get('code') if success else None
+        if ledger and code and code not in recorded_codes:
+            recorded_codes.add(code)
+            ledger.record_acquired(code)
+
+    cdk_generator = create_cdk_generator(provider_config.get_cdk, account_config, record_acquired)
+    if topup_interval is None and pacing_state_file:
+        pacer = AdaptiveTopupPacer(
+            provider_config.name, pacing_state_file, max_interval=provider_config.topup_interval
+        )
+        print(f'ℹ️ {account_name}: Using adaptive topup interval, starting at {pacer.interval:.0f}s')
+    else:
+        pacer = TopupPacer(provider_config.topup_interval if topup_interval is None else topup_interval)
 
-    async def process_cdk_result(success: bool, data: dict) -> bool:
+    async def redeem(cdk: str) -> dict:
+        """按节奏充值一个 CDK（限频时重试），更新账本与计数，返回 topup() 结果"""
         nonlocal topup_count
 
+        await pacer.wait(account_name)
+
+        topup_count += 1
+        print(f'💰 {account_name}: Executing topup #{topup_count} with CDK: {mask_secret(cdk)}')
+
+        rate_limit_retries = 0
+        while True:
+            # 充值请求在线程中执行，期间生产者可以继续获取下一个 CDK
+            topup_result = await asyncio.to_thread(
+                topup,
+                provider_config=provider_config,
+                account_config=account_config,
+                headers=topup_headers,
+                cookies=cookies,
+                key=cdk,
+            )
+            pacer.mark(topup_result)
+            # 被限频时按退避后的间隔重试同一个 CDK
+            if not topup_result.get('rate_limited') or rate_limit_retries >= MAX_RATE_LIMIT_RETRIES:
+                break
+            rate_limit_retries += 1
+            await pacer.wait(account_name)
+        if ledger:
+            ledger.record_result(cdk, topup_result)
+        results['topup_count'] += 1
+
+        if topup_result.get('success'):
+            results['topup_success_count'] += 1
+            if not topup_result.get('already_used'):
+                print(f'✅ {account_name}: Topup #{topup_count} successful')
+        return topup_result
+
+    async def process_cdk_result(success: bool, data: dict) -> bool:
         if not success:
             error_msg = data.get('error', 'Failed to get CDK')
             results['success'] = False
@@ -307,26 +485,8 @@ async def execute_topup(
             print(f'ℹ️ {account_name}: No CDK to topup (code is empty), continuing...')
             return True
 
-        if topup_count > 0 and topup_interval > 0:
-            print(f'⏳ {account_name}: Waiting {topup_interval} seconds before next topup...')
-            await asyncio.sleep(topup_interval)
-
-        topup_count += 1
-        print(f'💰 {account_name}: Executing topup #{topup_count} with CDK: {mask_secret(cdk)}')
-
-        topup_result = topup(
-            provider_config=provider_config,
-            account_config=account_config,
-            headers=topup_headers,
-            cookies=cookies,
-            key=cdk,
-        )
-        results['topup_count'] += 1
-
+        topup_result = await redeem(cdk)
         if topup_result.get('success'):
-            results['topup_success_count'] += 1
-            if not topup_result.get('already_used'):
-                print(f'✅ {account_name}: Topup #{topup_count} successful')
             return True
 
         error_msg = topup_result.get('error', 'Topup failed')
@@ -335,16 +495,28 @@ async def execute_topup(
         print(f'❌ {account_name}: Topup #{topup_count} failed, stopping topup process')
         return False
 
-    if inspect.isasyncgen(cdk_generator):
-        async for success, data in cdk_generator:
-            should_continue = await process_cdk_result(success, data)
-            if not should_continue:
-                break
-    else:
-        for success, data in cdk_generator:
-            should_continue = await process_cdk_result(success, data)
-            if not should_continue:
-                break
+    # 先兑换上次运行遗留的 CDK；遗留 CDK 失败只记入账本与计数（账本中按失败类型决定是否重试），
+    # 不影响本次的结果，也不阻止获取新的 CDK
+    pending_codes = ledger.pending_codes() if ledger else []
+    if pending_codes:
+        print(f'ℹ️ {account_name}: Found {len(pending_codes)} pending CDK(s) in ledger, redeeming first')
+    for pending_code in pending_codes:
+        topup_result = await redeem(pending_code)
+        if not topup_result.get('success'):
+            print(f'⚠️ {account_name}: Pending CDK topup #{topup_count} failed, ledger decides whether to retry it')
+
+    leftovers = await run_cdk_pipeline(cdk_generator, process_cdk_result, on_acquired=record_acquired)
+    leftover_codes = [data.get('code') for success, data in leftovers if success and data.get('code')]
+    if leftover_codes:
+        if ledger:
+            print(
+                f'ℹ️ {account_name}: {len(leftover_codes)} CDK(s) acquired but not redeemed, kept in ledger for next run'
+            )
+        else:
+            print(
+                f'⚠️ {account_name}: {len(leftover_codes)} CDK(s) acquired but not redeemed and no ledger configured: '
+                + ', '.join(mask_secret(code) for code in leftover_codes)
+            )
 
     if topup_count == 0:
         print(f'ℹ️ {account_name}: No CDK available for topup')
@@ -8,6 +8,7 @@ import os
 from dataclasses import dataclass, field
 from typing import AsyncGenerator, Callable, Dict, Generator, List, Literal
 
+from utils.browser_readiness import ReadinessStrategy
 from utils.constants import QUOTA_DIVISOR  # noqa: F401 - re-exported for backwards compatibility
 from utils.get_cdk import (
     get_b4u_cdk,
@@ -15,6 +16,7 @@ from utils.get_cdk import (
     get_x666_cdk,
 )
 from utils.get_check_in_status import newapi_check_in_status
+from utils.runtime_flags import lazy_bypass_enabled
 
 # 前向声明 AccountConfig 类型，用于类型注解
 # 实际的 AccountConfig 类在后面定义
@@ -46,6 +48,7 @@ class ProviderConfig:
     user_info_path: str = "/api/user/self"
     topup_path: str | None = "/api/user/topup"
     get_cdk: CdkGetterFunc | AsyncCdkGetterFunc | None = None
+    topup_interval: int = 60  # 多次 topup 之间的最小间隔（秒）
     api_user_key: str = "new-api-user"
     github_client_id: str | None = None
     github_auth_path: str = "/api/oauth/github"
@@ -55,6 +58,8 @@ class ProviderConfig:
     linuxdo_auth_redirect_path: str = "/oauth/**"  # OAuth 回调路径匹配模式，支持通配符
     aliyun_captcha: bool = False
     bypass_method: Literal["waf_cookies", "cf_clearance"] | None = None
+    lazy_bypass: bool = False  # 先直连，只有命中挑战页时才获取 bypass
+    readiness: dict | None = None  # 浏览器页面就绪条件，覆盖默认策略：cookie_names / response_url / selector / timeout
     isCustomize: bool = False  # 是否为自定义 provider（从环境变量加载）
     reward_mode: Literal["manual_checkin", "auto_on_userinfo", "draw_reward", "cdk_then_topup"] = "manual_checkin"
     required_account_fields: tuple[str, ...] = field(default_factory=tuple)
@@ -83,6 +88,7 @@ class ProviderConfig:
             user_info_path=data.get("user_info_path", "/api/user/self"),
             topup_path=data.get("topup_path", "/api/user/topup"),
             get_cdk=data.get("get_cdk"),  # 函数类型无法从 JSON 解析，需要代码中设置
+            topup_interval=data.get("topup_interval", 60),
             api_user_key=data.get("api_user_key", "new-api-user"),
             github_client_id=data.get("github_client_id"),
             github_auth_path=data.get("github_auth_path", "/api/oauth/github"),
@@ -92,6 +98,8 @@ class ProviderConfig:
             linuxdo_auth_redirect_path=data.get("linuxdo_auth_redirect_path", "/oauth/**"),
             aliyun_captcha=data.get("aliyun_captcha", False),
             bypass_method=data.get("bypass_method"),
+            lazy_bypass=data.get("lazy_bypass", False),
+            readiness=data.get("readiness"),
             isCustomize=is_customize,
             reward_mode=data.get("reward_mode", "manual_checkin"),
             required_account_fields=tuple(data.get("required_account_fields", [])),
@@ -105,6 +113,28 @@ class ProviderConfig:
         """判断是否需要获取 Cloudflare cf_clearance cookie"""
         return self.bypass_method == "cf_clearance"
 
+    def should_defer_bypass(self) -> bool:
+        """判断是否延迟获取 bypass（lazy 模式）
+
+        provider 配置了 lazy_bypass 或设置了 LAZY_BYPASS 环境变量时，
+        请求先直连，只有检测到挑战页时才启动浏览器获取 bypass
+        """
+        return self.bypass_method is not None and (self.lazy_bypass or lazy_bypass_enabled())
+
+    def get_readiness_strategy(self) -> ReadinessStrategy:
+        """浏览器打开登录页时的就绪条件
+
+        默认在登录页请求 status 接口（SPA 已加载）时就绪；aliyun_captcha 还会在验证码出现时就绪，
+        WAF 在 acw_tc 与 acw_sc__v2 都出现时就绪。provider 配置的 readiness 字段覆盖默认值
+        """
+        if self.aliyun_captcha:
+            default = ReadinessStrategy(response_url=self.status_path, selector="#traceid")
+        elif self.needs_waf_cookies():
+            default = ReadinessStrategy(cookie_names=("acw_tc", "acw_sc__v2"), response_url=self.status_path)
+        else:
+            default = ReadinessStrategy(response_url=self.status_path)
+        return default.merge(self.readiness)
+
     def needs_manual_check_in(self) -> bool:
         """判断是否需要手动调用签到接口"""
         return self.reward_mode == "manual_checkin" and self.check_in_path is not None
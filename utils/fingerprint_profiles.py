@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+持久化浏览器指纹档案
+
+cf_clearance / WAF cookies 与 User-Agent、浏览器指纹绑定。每次启动都随机生成 Camoufox 指纹时，
+上一次拿到的 cookies 与下一次的指纹对不上，挑战会更频繁地出现。
+
+这里按 (账号, 代理) 保存一份指纹档案：Camoufox 指纹（传入 fingerprint= 后字体 / GPU / 音频等
+派生值也由该指纹确定）、浏览器实际的 User-Agent 与 Client Hints，以及对应的 curl_cffi impersonate 值。
+同一账号的所有浏览器启动与 HTTP 请求都复用这份档案。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable
+
+from utils.get_headers import get_browser_headers, get_curl_cffi_impersonate
+
+FINGERPRINT_PROFILES_FILE = 'fingerprint_profiles.json'
+
+# 生成指纹使用的操作系统（与此前固定的 os='macos' 保持一致）
+DEFAULT_FINGERPRINT_OS = 'macos'
+
+DEFAULT_IMPERSONATE = 'firefox135'
+
+
+def profile_key(account_name: str, proxy_config: dict | None) -> str:
+    """档案键：账号名称 + 代理地址的哈希（不在文件中保存代理凭据）"""
+    server = (proxy_config or {}).get('server') or 'direct'
+    username = (proxy_config or {}).get('username') or ''
+    raw = f'{account_name}\n{server}\n{username}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _generate_fingerprint(os_name: str) -> dict:
+    from camoufox.fingerprints import generate_fingerprint
+
+    return generate_fingerprint(os=os_name)
+
+
+class FingerprintProfile:
+    """一个 (账号, 代理) 的指纹档案"""
+
+    def __init__(self, store: 'FingerprintProfileStore', key: str, account_name: str, data: dict):
+        self.store = store
+        self.key = key
+        self.account_name = account_name
+        self.data = data
+
+    @property
+    def fingerprint(self) -> dict | None:
+        return self.data.get('fingerprint')
+
+    @property
+    def user_agent(self) -> str | None:
+        return self.data.get('user_agent')
+
+    @property
+    def impersonate(self) -> str:
+        """curl_cffi impersonate 值，尚未记录 User-Agent 时使用默认值"""
+        return self.data.get('impersonate') or DEFAULT_IMPERSONATE
+
+    def camoufox_options(self) -> dict:
+        """AsyncCamoufox 的指纹参数
+
+        首次调用时生成并保存指纹；生成失败时退回到 Camoufox 默认的随机指纹。
+        """
+        if not self.fingerprint:
+            try:
+                fingerprint = self.store.generator(self.data.get('os', DEFAULT_FINGERPRINT_OS))
+            except Exception as e:
+                print(f'⚠️ {self.account_name}: Failed to generate fingerprint profile, using random fingerprint: {e}')
+                return {'os': DEFAULT_FINGERPRINT_OS}
+            self.data['fingerprint'] = fingerprint
+            self.data.setdefault('os', DEFAULT_FINGERPRINT_OS)
+            self.data['created_at'] = datetime.now().isoformat()
+            self.store.update(self)
+            print(f'ℹ️ {self.account_name}: Created persistent fingerprint profile {self.key}')
+
+        return {
+            'os': self.data.get('os', DEFAULT_FINGERPRINT_OS),
+            'fingerprint': self.fingerprint,
+            # 指纹来自 Camoufox 自身生成，跳过自定义指纹的告警
+            'i_know_what_im_doing': True,
+        }
+
+    def browser_headers(self) -> dict | None:
+        """已记录的 User-Agent 与 Client Hints，格式与 get_browser_headers 一致"""
+        if not self.user_agent:
+            return None
+        return {'User-Agent': self.user_agent, **(self.data.get('client_hints') or {})}
+
+    def record_headers(self, browser_headers: dict | None) -> None:
+        """记录浏览器实际发送的 User-Agent / Client Hints 及对应的 impersonate 值"""
+        if not browser_headers or not browser_headers.get('User-Agent'):
+            return
+        user_agent = browser_headers['User-Agent']
+        client_hints = {key: value for key, value in browser_headers.items() if key != 'User-Agent'}
+        if user_agent == self.user_agent and client_hints == (self.data.get('client_hints') or {}):
+            return
+        self.data['user_agent'] = user_agent
+        self.data['client_hints'] = client_hints
+        self.data['impersonate'] = get_curl_cffi_impersonate(user_agent)
+        self.data['updated_at'] = datetime.now().isoformat()
+        self.store.update(self)
+
+    async def capture(self, page) -> dict | None:
+        """从页面读取指纹头部并记录到档案"""
+        try:
+            browser_headers = await get_browser_headers(page)
+        except Exception as e:
+            print(f'⚠️ {self.account_name}: Failed to capture browser headers for fingerprint profile: {e}')
+            return None
+        self.record_headers(browser_headers)
+        return browser_headers
+
+
+class FingerprintProfileStore:
+    """指纹档案文件：{key: {"account_name", "os", "fingerprint", "user_agent", "client_hints", "impersonate", ...}}"""
+
+    def __init__(self, path: str, generator: Callable[[str], dict] | None = None):
+        """
+        Args:
+            path: 档案文件路径
+            generator: 指纹生成函数，参数为操作系统，默认使用 camoufox 的 generate_fingerprint
+        """
+        self.path = path
+        self.generator = generator or _generate_fingerprint
+
+    def load(self) -> dict:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception as e:
+            print(f'Warning: Failed to load fingerprint profiles: {e}')
+        return {}
+
+    def save(self, profiles: dict) -> None:
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f'Warning: Failed to save fingerprint profiles: {e}')
+
+    def profile(self, account_name: str, proxy_config: dict | None) -> FingerprintProfile:
+        """获取账号在该代理下的档案（不存在时返回空档案，首次启动浏览器时生成指纹）"""
+        key = profile_key(account_name, proxy_config)
+        data = self.load().get(key)
+        if not isinstance(data, dict):
+            data = {'account_name': account_name, 'os': DEFAULT_FINGERPRINT_OS}
+        return FingerprintProfile(self, key, account_name, data)
+
+    def update(self, profile: FingerprintProfile) -> None:
+        """写回单个档案（重新读取文件，避免覆盖其他账号的更新）"""
+        profiles = self.load()
+        profiles[profile.key] = profile.data
+        self.save(profiles)
+
+
+def camoufox_fingerprint_options(profile: FingerprintProfile | None) -> dict[str, Any]:
+    """没有档案时沿用此前的固定 macOS 随机指纹"""
+    if profile is None:
+        return {'os': DEFAULT_FINGERPRINT_OS}
+    return profile.camoufox_options()
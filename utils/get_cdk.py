@@ -10,34 +10,56 @@ CDK 获取模块
 """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, AsyncGenerator, Generator
+import asyncio
+import os
+from typing import TYPE_CHECKING, AsyncGenerator, Callable, Generator
 
 from curl_cffi import requests as curl_requests
 
+from utils.bypass_stats import BYPASS_STATS_FILE
+from utils.fingerprint_profiles import FINGERPRINT_PROFILES_FILE, FingerprintProfileStore
 from utils.get_cf_clearance import get_cf_clearance
 from utils.get_headers import get_curl_cffi_impersonate
 from utils.http_utils import proxy_resolve, response_resolve
+from utils.rsc_stream import (
+    SERVER_ACTIONS_FILE,
+    PageDeploy,
+    fetch_page_deploy,
+    load_server_actions,
+    post_server_action,
+    save_server_actions,
+    scan_server_actions,
+)
 from utils.safe_logging import mask_secret
+from utils.step_graph import Step, StepContext, StepGraph, run_paced
 
 if TYPE_CHECKING:
     from utils.config import AccountConfig
 
 
-def get_runawaytime_cdk(
+# 大转盘相邻两次启动的最小间隔（秒），可通过账号配置中的 wheel_spin_interval 覆盖
+WHEEL_SPIN_INTERVAL = 1.0
+
+
+async def get_runawaytime_cdk(
     account_config: "AccountConfig",
-) -> Generator[tuple[bool, dict], None, None]:
-    """获取 runawaytime CDK（签到 + 大转盘）
+    on_acquired: Callable[[bool, dict], None] | None = None,
+) -> AsyncGenerator[tuple[bool, dict], None]:
+    """获取 runawaytime CDK（签到 + 大转盘，异步生成器）
 
-    通过 fuli.hxi.me 签到和大转盘获取 CDK
+    通过 fuli.hxi.me 签到和大转盘获取 CDK。签到状态与大转盘状态两个查询并发执行，
+    大转盘依次执行，上一个 CDK 被取走后才开始下一次转盘
 
     Args:
         account_config: 账号配置对象，需要包含 get_cdk_cookies 在 extra 中
+        on_acquired: 拿到 CDK 时立即调用的回调（例如写入 CDK 账本），调用方提前停止时
+            仍在途的转盘结果与未被取走的 CDK 也会经过它，不会丢失
 
     Yields:
         tuple[bool, dict]: (True, {"code": "xxx"}) 成功，(False, {"error": "msg"}) 失败
     """
-    account_name = account_config.get_display_name()
-    
+    account_name = account_config.get("account_name") or account_config.get_display_name()
+
     # 优先使用 fuli_cookies 兼容之前的配置，如果没有则使用 get_cdk_cookies 新的配置
     get_cdk_cookies = account_config.get("fuli_cookies") or account_config.get("get_cdk_cookies")
 
@@ -51,7 +73,7 @@ def get_runawaytime_cdk(
     http_proxy = proxy_resolve(proxy_config)
 
     try:
-        session = curl_requests.Session(proxy=http_proxy, timeout=30)
+        session = curl_requests.AsyncSession(proxy=http_proxy, timeout=30)
         try:
             # 构建基础请求头
             headers = {
@@ -70,157 +92,171 @@ def get_runawaytime_cdk(
             session.cookies.update(get_cdk_cookies)
             session.cookies.set("i18next", "en")
 
-            # ===== 第一部分：签到 =====
-            # 先检查签到状态
-            status_headers = headers.copy()
-            status_headers.update(
-                {
-                    "referer": "https://fuli.hxi.me/",
-                    "sec-fetch-dest": "empty",
-                    "sec-fetch-mode": "cors",
-                    "sec-fetch-site": "same-origin",
-                }
+            graph = StepGraph(
+                build_fuli_wheel_steps(
+                    session,
+                    headers,
+                    account_name,
+                    origin="https://fuli.hxi.me",
+                    spin_interval=float(account_config.get("wheel_spin_interval", WHEEL_SPIN_INTERVAL)),
+                    on_acquired=on_acquired,
+                )
             )
+            async for item in graph.stream():
+                yield item
+        finally:
+            await session.close()
+    except Exception as e:
+        print(f"❌ {account_name}: Error getting runawaytime CDK - {e}")
+        yield False, {"error": f"Error getting runawaytime CDK - {e}"}
 
-            status_response = session.get(
-                "https://fuli.hxi.me/api/checkin/status",
-                headers=status_headers,
-                timeout=30,
-            )
 
-            already_checked_in = False
-            if status_response.status_code == 200:
-                status_data = response_resolve(status_response, "get_checkin_status", account_name)
-                if status_data and status_data.get("checked"):
-                    print(f"✅ {account_name}: Already checked in today")
-                    already_checked_in = True
-
-            if not already_checked_in:
-                # 执行签到
-                checkin_headers = headers.copy()
-                checkin_headers.update(
-                    {
-                        "content-length": "0",
-                        "origin": "https://fuli.hxi.me",
-                        "referer": "https://fuli.hxi.me/",
-                        "sec-fetch-dest": "empty",
-                        "sec-fetch-mode": "cors",
-                        "sec-fetch-site": "same-origin",
-                    }
-                )
+def build_fuli_wheel_steps(
+    session: curl_requests.AsyncSession,
+    headers: dict,
+    account_name: str,
+    origin: str,
+    spin_interval: float = WHEEL_SPIN_INTERVAL,
+    on_acquired: Callable[[bool, dict], None] | None = None,
+) -> list[Step]:
+    """fuli 类站点的签到 + 大转盘步骤
 
-                response = session.post(
-                    "https://fuli.hxi.me/api/checkin",
-                    headers=checkin_headers,
-                    timeout=30,
-                )
+    checkin_status 与 wheel_status 无依赖、并发执行；checkin 依赖 checkin_status；
+    spins 依赖 wheel_status 与 checkin（签到后再转盘，保持写请求的原有顺序）。
+    获取到的 CDK 先交给 on_acquired 记录，再通过 ctx.emit((True, {"code": code})) 产出；
+    每次转盘都会消耗真实次数，因此同时只有一个转盘在途，且要等已产出的 CDK 都被取走后才开始，
+    与 run_cdk_pipeline 最多领先充值一次获取的限制一致。调用方停止消费后不再启动新的转盘请求，在途请求照常完成。
 
-                if response.status_code in [200, 400]:
-                    json_data = response_resolve(response, "execute_checkin", account_name)
-                    if json_data is not None:
-                        if json_data.get("success"):
-                            code = json_data.get("code", "")
-                            if code:
-                                print(f"✅ {account_name}: Checkin successful! Code: {mask_secret(code)}")
-                                yield True, {"code": code}
-                        else:
-                            message = json_data.get("message", json_data.get("msg", ""))
-                            if "already" in message.lower() or "已经" in message or "已签" in message:
-                                print(f"✅ {account_name}: Already checked in today")
-                            else:
-                                print(f"❌ {account_name}: Checkin failed - {message}")
-
-            # ===== 第二部分：大转盘 =====
-            # 先检查大转盘状态
-            wheel_status_headers = headers.copy()
-            wheel_status_headers.update(
-                {
-                    "referer": "https://fuli.hxi.me/wheel",
-                    "sec-fetch-dest": "empty",
-                    "sec-fetch-mode": "cors",
-                    "sec-fetch-site": "same-origin",
-                }
-            )
+    Args:
+        session: curl_cffi AsyncSession（已设置 cookies）
+        headers: 基础请求头
+        account_name: 账号名称（用于日志）
+        origin: 站点地址，例如 https://fuli.hxi.me
+        spin_interval: 相邻两次转盘请求的最小间隔（秒）
+        on_acquired: 产出 CDK 前调用的回调（例如写入 CDK 账本）
+    """
 
-            wheel_status_response = session.get(
-                "https://fuli.hxi.me/api/wheel/status",
-                headers=wheel_status_headers,
-                timeout=30,
-            )
+    def emit_code(ctx: StepContext, code: str) -> None:
+        item = (True, {"code": code})
+        if on_acquired:
+            on_acquired(*item)
+        ctx.emit(item)
+
+    def build_headers(referer_path: str, post: bool = False) -> dict:
+        step_headers = headers.copy()
+        if post:
+            step_headers.update({"content-length": "0", "origin": origin})
+        step_headers.update(
+            {
+                "referer": f"{origin}{referer_path}",
+                "sec-fetch-dest": "empty",
+                "sec-fetch-mode": "cors",
+                "sec-fetch-site": "same-origin",
+            }
+        )
+        return step_headers
+
+    async def checkin_status(ctx: StepContext) -> bool:
+        """返回今天是否已签到"""
+        response = await session.get(f"{origin}/api/checkin/status", headers=build_headers("/"), timeout=30)
+        if response.status_code == 200:
+            status_data = response_resolve(response, "get_checkin_status", account_name)
+            if status_data and status_data.get("checked"):
+                print(f"✅ {account_name}: Already checked in today")
+                return True
+        return False
+
+    async def wheel_status(ctx: StepContext) -> int:
+        """返回剩余大转盘次数"""
+        response = await session.get(f"{origin}/api/wheel/status", headers=build_headers("/wheel"), timeout=30)
+        remaining = 0
+        if response.status_code == 200:
+            status_data = response_resolve(response, "get_wheel_status", account_name)
+            if status_data:
+                remaining = status_data.get("remaining", 0)
+                if remaining <= 0:
+                    print(f"ℹ️ {account_name}: No wheel spins remaining")
+                else:
+                    print(f"ℹ️ {account_name}: {remaining} wheel spin(s) remaining")
+        return remaining
 
-            remaining = 0
-            if wheel_status_response.status_code == 200:
-                status_data = response_resolve(wheel_status_response, "get_wheel_status", account_name)
-                if status_data:
-                    remaining = status_data.get("remaining", 0)
-                    if remaining <= 0:
-                        print(f"ℹ️ {account_name}: No wheel spins remaining")
+    async def checkin(ctx: StepContext) -> None:
+        if ctx.results["checkin_status"]:
+            return
+
+        response = await session.post(f"{origin}/api/checkin", headers=build_headers("/", post=True), timeout=30)
+        if response.status_code in [200, 400]:
+            json_data = response_resolve(response, "execute_checkin", account_name)
+            if json_data is not None:
+                if json_data.get("success"):
+                    code = json_data.get("code", "")
+                    if code:
+                        print(f"✅ {account_name}: Checkin successful! Code: {mask_secret(code)}")
+                        emit_code(ctx, code)
+                else:
+                    message = json_data.get("message", json_data.get("msg", ""))
+                    if "already" in message.lower() or "已经" in message or "已签" in message:
+                        print(f"✅ {account_name}: Already checked in today")
                     else:
-                        print(f"ℹ️ {account_name}: {remaining} wheel spin(s) remaining")
-
-            # 执行大转盘（循环直到 remaining <= 0）
-            if remaining > 0:
-                wheel_headers = headers.copy()
-                wheel_headers.update(
-                    {
-                        "content-length": "0",
-                        "origin": "https://fuli.hxi.me",
-                        "referer": "https://fuli.hxi.me/wheel",
-                        "sec-fetch-dest": "empty",
-                        "sec-fetch-mode": "cors",
-                        "sec-fetch-site": "same-origin",
-                    }
-                )
+                        print(f"❌ {account_name}: Checkin failed - {message}")
+
+    async def spins(ctx: StepContext) -> int:
+        """执行大转盘直到次数用完或失败，返回获取到的 CDK 数量"""
+        remaining = ctx.results["wheel_status"]
+        if remaining <= 0:
+            return 0
+
+        wheel_headers = build_headers("/wheel", post=True)
+        stop = ctx.linked_stop()
+        spin_count = 0
+
+        async def spin(index: int) -> None:
+            nonlocal spin_count
+            response = await session.post(f"{origin}/api/wheel", headers=wheel_headers, timeout=30)
+            if response.status_code not in [200, 400]:
+                stop.set()
+                return
 
-                spin_count = 0
+            json_data = response_resolve(response, "execute_wheel", account_name)
+            if json_data is None:
+                stop.set()
+                return
 
-                while remaining > 0:
-                    response = session.post(
-                        "https://fuli.hxi.me/api/wheel",
-                        headers=wheel_headers,
-                        timeout=30,
+            if json_data.get("success"):
+                code = json_data.get("code", "")
+                # 响应中的 remaining 为 0 时不再启动新的转盘请求
+                left = json_data.get("remaining")
+                if isinstance(left, int) and left <= 0:
+                    stop.set()
+                if code:
+                    spin_count += 1
+                    print(
+                        f"✅ {account_name}: Wheel spin #{spin_count} successful! "
+                        f"Code: {mask_secret(code)}, remaining: {left if left is not None else remaining - spin_count}"
                     )
+                    emit_code(ctx, code)
+                    return
 
-                    if response.status_code in [200, 400]:
-                        json_data = response_resolve(response, "execute_wheel", account_name)
-                        if json_data is None:
-                            break
-
-                        if json_data.get("success"):
-                            code = json_data.get("code", "")
-                            # 从响应中更新 remaining
-                            remaining = json_data.get("remaining", remaining - 1)
-                            if code:
-                                spin_count += 1
-                                print(
-                                    f"✅ {account_name}: Wheel spin #{spin_count} successful! "
-                                    f"Code: {mask_secret(code)}, remaining: {remaining}"
-                                )
-                                yield True, {"code": code}
-                                continue
-
-                        message = json_data.get("message", json_data.get("msg", ""))
-                        if (
-                            "already" in message.lower()
-                            or "已经" in message
-                            or "次数" in message
-                            or "no more" in message.lower()
-                        ):
-                            print(f"ℹ️ {account_name}: No more wheel spins remaining")
-                            break
-
-                        print(f"❌ {account_name}: Wheel spin #{spin_count + 1} failed - {message}")
-                        break
-                    else:
-                        break
+            stop.set()
+            message = json_data.get("message", json_data.get("msg", ""))
+            if "already" in message.lower() or "已经" in message or "次数" in message or "no more" in message.lower():
+                print(f"ℹ️ {account_name}: No more wheel spins remaining")
+                return
 
-                if spin_count > 0:
-                    print(f"✅ {account_name}: Total {spin_count} CDK(s) obtained from wheel")
-        finally:
-            session.close()
-    except Exception as e:
-        print(f"❌ {account_name}: Error getting runawaytime CDK - {e}")
-        yield False, {"error": f"Error getting runawaytime CDK - {e}"}
+            print(f"❌ {account_name}: Wheel spin #{index + 1} failed - {message}")
+
+        await run_paced(spin, remaining, min_interval=spin_interval, stop=stop, ready=ctx.wait_consumed)
+
+        if spin_count > 0:
+            print(f"✅ {account_name}: Total {spin_count} CDK(s) obtained from wheel")
+        return spin_count
+
+    return [
+        Step("checkin_status", checkin_status),
+        Step("wheel_status", wheel_status),
+        Step("checkin", checkin, depends_on=("checkin_status",)),
+        Step("spins", spins, depends_on=("wheel_status", "checkin")),
+    ]
 
 
 def get_x666_cdk(
@@ -237,7 +273,7 @@ def get_x666_cdk(
     Yields:
         tuple[bool, dict]: (True, {"code": ""}) 成功（不需要充值），(False, {"error": "msg"}) 失败
     """
-    account_name = account_config.get_display_name()
+    account_name = account_config.get("account_name") or account_config.get_display_name()
     access_token = account_config.get("access_token")
     proxy = account_config.proxy or account_config.get("global_proxy")
 
@@ -378,6 +414,144 @@ def get_x666_cdk(
         yield False, {"error": f"Error executing x666 draw - {e}"}
 
 
+B4U_LUCKYDRAW_URL = "https://tw.b4u.qzz.io/luckydraw"
+
+# 无法从页面发现 Server Action 时使用的 next-action id
+B4U_DEFAULT_ACTIONS = {
+    "status": "7a7a7bf7f7c47cf1a8351d225a4338b0f017cd35",
+    "draw": "cfc5966b4123c674815ce067b6b8894545c15604",
+}
+
+# 按函数名识别 Server Action 用途（先匹配 status；关键字按优先级排列）
+B4U_ACTION_KEYWORDS = {
+    "status": ("status", "remaining", "count"),
+    "draw": ("draw", "spin", "lottery"),
+}
+
+# 只读函数名前缀，这类 action 不会被当作 draw
+B4U_READ_ONLY_PREFIXES = ("get", "fetch", "load", "list", "query", "check")
+
+B4U_SERVER_ACTIONS_FILE = os.path.join("storage-states", SERVER_ACTIONS_FILE)
+
+# 页面中没有可识别的 flight 数据时使用的 next-router-state-tree header（正常情况下从页面生成）
+B4U_DEFAULT_ROUTER_STATE_TREE = "%5B%22%22%2C%7B%22children%22%3A%5B%22(dashboard)%22%2C%7B%22children%22%3A%5B%22luckydraw%22%2C%7B%22children%22%3A%5B%22__PAGE__%22%2C%7B%7D%2C%22%2Fluckydraw%22%2C%22refresh%22%5D%7D%5D%7D%5D%7D%2Cnull%2Cnull%2Ctrue%5D"
+
+
+def match_b4u_actions(actions: dict[str, str]) -> dict[str, str] | None:
+    """根据函数名从发现的 Server Action 中选出 status / draw
+
+    每个用途按关键字优先级匹配（getLuckyDrawStatus 优先于 getDrawCount）；
+    draw 必须是会产生副作用的 action，跳过 get* 等只读函数名。
+
+    Returns:
+        {"status": id, "draw": id}；任一用途无法识别时返回 None
+    """
+    matched: dict[str, str] = {}
+    for purpose, keywords in B4U_ACTION_KEYWORDS.items():
+        candidates = [
+            (name, action_id)
+            for name, action_id in actions.items()
+            if action_id not in matched.values()
+            and not (purpose == "draw" and name.lower().startswith(B4U_READ_ONLY_PREFIXES))
+        ]
+        for keyword in keywords:
+            action_id = next((action_id for name, action_id in candidates if keyword in name.lower()), None)
+            if action_id:
+                matched[purpose] = action_id
+                break
+    return matched if len(matched) == len(B4U_ACTION_KEYWORDS) else None
+
+
+def _is_valid_b4u_status(
+    session: curl_requests.Session, headers: dict, action_id: str, router_state_tree: str
+) -> bool:
+    """缓存前校验 status action：只读调用，响应中必须有剩余次数（整数行 "1"）"""
+    try:
+        result = post_server_action(
+            session,
+            B4U_LUCKYDRAW_URL,
+            headers,
+            action_id,
+            "[]",
+            router_state_tree=router_state_tree,
+            stop_at="1",
+        )
+    except Exception:
+        return False
+    row = result.rows.get("1")
+    return (
+        result.status_code == 200
+        and not result.action_not_found
+        and row is not None
+        and isinstance(row.value, int)
+        and not isinstance(row.value, bool)
+    )
+
+
+def _resolve_b4u_actions(
+    session: curl_requests.Session,
+    headers: dict,
+    account_name: str,
+    force: bool = False,
+    cache_file: str = B4U_SERVER_ACTIONS_FILE,
+) -> tuple[dict[str, str], str, bool]:
+    """获取 luckydraw 的 next-action id 与 next-router-state-tree（同步请求，调用方应放到线程中执行）
+
+    先获取页面的部署标识与路由树，部署标识与缓存一致时直接使用磁盘缓存（每次部署只扫描一次 chunk）；
+    新发现的映射校验通过后才写入缓存。
+
+    Args:
+        force: 忽略缓存（某个 action 调用失败后重新发现）
+
+    Returns:
+        (action ids, next-router-state-tree, 是否为本次新发现)
+    """
+    page_headers = {
+        **headers,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "sec-fetch-dest": "document",
+        "sec-fetch-mode": "navigate",
+    }
+    page_headers.pop("Content-Type", None)
+    try:
+        page = fetch_page_deploy(session, B4U_LUCKYDRAW_URL, page_headers)
+    except Exception as e:
+        print(f"⚠️ {account_name}: Failed to load luckydraw page: {e}")
+        page = PageDeploy(deploy_id=None)
+
+    cached = load_server_actions(cache_file).get(B4U_LUCKYDRAW_URL) or {}
+    router_state_tree = page.router_state_tree or cached.get("router_state_tree")
+    if not router_state_tree:
+        print(f"⚠️ {account_name}: Could not read luckydraw router state from page, using built-in value")
+        router_state_tree = B4U_DEFAULT_ROUTER_STATE_TREE
+
+    if not force:
+        cached_actions = cached.get("actions") or {}
+        # 页面获取失败时无法比较部署标识，先使用缓存，调用失败后再重新发现
+        same_deploy = page.deploy_id is None or cached.get("deploy_id") == page.deploy_id
+        if same_deploy and all(cached_actions.get(purpose) for purpose in B4U_ACTION_KEYWORDS):
+            return cached_actions, router_state_tree, False
+        if cached_actions:
+            print(f"ℹ️ {account_name}: Luckydraw deploy changed ({cached.get('deploy_id')} -> {page.deploy_id})")
+
+    try:
+        discovered = scan_server_actions(session, page.chunk_urls, page_headers, page_hint="luckydraw")
+    except Exception as e:
+        print(f"⚠️ {account_name}: Failed to discover luckydraw server actions: {e}")
+        discovered = {}
+
+    actions = match_b4u_actions(discovered)
+    if actions and _is_valid_b4u_status(session, headers, actions["status"], router_state_tree):
+        print(f"ℹ️ {account_name}: Discovered luckydraw server actions for deploy {page.deploy_id}")
+        save_server_actions(cache_file, B4U_LUCKYDRAW_URL, page.deploy_id, actions, page.router_state_tree)
+        return actions, router_state_tree, True
+    if actions:
+        print(f"⚠️ {account_name}: Discovered luckydraw status action failed validation, not caching")
+
+    print(f"⚠️ {account_name}: Could not discover luckydraw server actions, using built-in ids")
+    return dict(B4U_DEFAULT_ACTIONS), router_state_tree, True
+
+
 async def get_b4u_cdk(
     account_config: "AccountConfig",
 ) -> AsyncGenerator[tuple[bool, dict], None]:
@@ -392,7 +566,7 @@ async def get_b4u_cdk(
     Yields:
         tuple[bool, dict]: (True, {"code": "xxx"}) 成功，(False, {"error": "msg"}) 失败
     """
-    account_name = account_config.get_display_name()
+    account_name = account_config.get("account_name") or account_config.get_display_name()
     get_cdk_cookies = account_config.get("get_cdk_cookies")
 
     if not get_cdk_cookies:
@@ -408,9 +582,13 @@ async def get_b4u_cdk(
     print(f"ℹ️ {account_name}: Getting cf_clearance for tw.b4u.qzz.io...")
     try:
         cf_cookies, browser_headers = await get_cf_clearance(
-            url="https://tw.b4u.qzz.io/luckydraw",
+            url=B4U_LUCKYDRAW_URL,
             account_name=account_name,
             proxy_config=proxy_config,
+            stats_file=os.path.join("storage-states", BYPASS_STATS_FILE),
+            fingerprint_profile=FingerprintProfileStore(
+                os.path.join("storage-states", FINGERPRINT_PROFILES_FILE)
+            ).profile(account_name, proxy_config),
         )
     except Exception as e:
         print(f"❌ {account_name}: Failed to get cf_clearance: {e}")
@@ -480,44 +658,51 @@ async def get_b4u_cdk(
             session.cookies.update(get_cdk_cookies)
             session.cookies.set("i18next", "en")
 
-            # Next.js Server Actions 需要的 next-router-state-tree header
-            next_router_state_tree = "%5B%22%22%2C%7B%22children%22%3A%5B%22(dashboard)%22%2C%7B%22children%22%3A%5B%22luckydraw%22%2C%7B%22children%22%3A%5B%22__PAGE__%22%2C%7B%7D%2C%22%2Fluckydraw%22%2C%22refresh%22%5D%7D%5D%7D%5D%7D%2Cnull%2Cnull%2Ctrue%5D"
-
-            # ===== 第一步：检查抽奖状态 =====
-            status_headers = headers.copy()
-            status_headers["next-action"] = "7a7a7bf7f7c47cf1a8351d225a4338b0f017cd35"
-            status_headers["next-router-state-tree"] = next_router_state_tree
-
-            status_response = session.post(
-                "https://tw.b4u.qzz.io/luckydraw",
-                headers=status_headers,
-                data="[]",
-                timeout=30,
+            # 页面发现与 action 调用都是同步请求，放到线程中执行，不阻塞其他流水线共享的事件循环
+            actions, router_state_tree, discovered = await asyncio.to_thread(
+                _resolve_b4u_actions, session, headers, account_name
             )
 
-            import json
+            async def call_action(purpose: str, data: str):
+                """调用 luckydraw action；任一 action 失效（站点重新部署）时重新发现后重试一次"""
+                nonlocal actions, router_state_tree, discovered
+                while True:
+                    result = await asyncio.to_thread(
+                        post_server_action,
+                        session,
+                        B4U_LUCKYDRAW_URL,
+                        headers,
+                        actions[purpose],
+                        data,
+                        router_state_tree=router_state_tree,
+                        stop_at="1",
+                    )
+                    if not result.action_not_found or discovered:
+                        return result
+                    print(f"⚠️ {account_name}: Luckydraw {purpose} action id expired, rediscovering...")
+                    actions, router_state_tree, discovered = await asyncio.to_thread(
+                        _resolve_b4u_actions, session, headers, account_name, True
+                    )
+
+            # ===== 第一步：检查抽奖状态 =====
+            # 响应格式如: 0:["$@1",["xxx",null]]\n1:1，其中 "1:N" 的 N 表示剩余抽奖次数
+            status_result = await call_action("status", "[]")
 
             remaining = 0
-            if status_response.status_code == 200:
-                # 解析响应，格式如: 0:["$@1",["xxx",null]]\n1:1
-                # 其中 "1:N" 的 N 表示剩余抽奖次数
-                response_text = status_response.text
-                print(f"ℹ️ {account_name}: Luckydraw status response: {response_text[:200]}")
-
-                # 解析剩余次数
-                lines = response_text.strip().split("\n")
-                for line in lines:
-                    if line.startswith("1:"):
-                        try:
-                            remaining = int(line[2:])
-                            print(f"ℹ️ {account_name}: Remaining draws: {remaining}")
-                        except ValueError:
-                            # 不是数字，可能是其他格式
-                            print(f"⚠️ {account_name}: Could not parse remaining draws, trying once")
-                            remaining = 1
-                        break
+            if status_result.status_code == 200 and not status_result.action_not_found:
+                print(f"ℹ️ {account_name}: Luckydraw status response: {status_result.preview[:200]}")
+
+                status_row = status_result.rows.get("1")
+                if status_row is not None:
+                    if isinstance(status_row.value, int) and not isinstance(status_row.value, bool):
+                        remaining = status_row.value
+                        print(f"ℹ️ {account_name}: Remaining draws: {remaining}")
+                    else:
+                        # 不是数字，可能是其他格式
+                        print(f"⚠️ {account_name}: Could not parse remaining draws, trying once")
+                        remaining = 1
             else:
-                print(f"⚠️ {account_name}: Failed to check luckydraw status, HTTP {status_response.status_code}")
+                print(f"⚠️ {account_name}: Failed to check luckydraw status, HTTP {status_result.status_code}")
                 # 即使状态检查失败，也尝试抽奖一次
                 remaining = 1
 
@@ -528,81 +713,54 @@ async def get_b4u_cdk(
                 return
 
             # ===== 第二步：循环执行抽奖直到次数用完 =====
-            draw_headers = headers.copy()
-            draw_headers["next-action"] = "cfc5966b4123c674815ce067b6b8894545c15604"
-            draw_headers["next-router-state-tree"] = next_router_state_tree
-
             draw_count = 0
             while remaining > 0:
-                response = session.post(
-                    "https://tw.b4u.qzz.io/luckydraw",
-                    headers=draw_headers,
-                    data='[{"excludeThankYou":false}]',
-                    timeout=30,
-                )
-
-                if response.status_code == 200:
-                    response_text = response.text
-                    print(f"ℹ️ {account_name}: Luckydraw response #{draw_count + 1}: {response_text[:300]}")
-
-                    # 解析响应，格式如:
-                    # 0:["$@1",["xxx",null]]
-                    # 1:{"success":true,"message":"...","prize":{...},"redemptionCode":"xxx"}
-
-                    # 尝试从响应中提取 JSON 部分
-                    # 查找以 "1:" 开头的行
-                    lines = response_text.strip().split("\n")
-                    for line in lines:
-                        if line.startswith("1:"):
-                            json_str = line[2:]  # 去掉 "1:" 前缀
-                            try:
-                                json_data = json.loads(json_str)
-                                if isinstance(json_data, dict):
-                                    if json_data.get("success"):
-                                        redemption_code = json_data.get("redemptionCode", "")
-                                        prize = json_data.get("prize", {})
-                                        prize_name = prize.get("name", "Unknown")
-                                        message = json_data.get("message", "")
-
-                                        if redemption_code:
-                                            draw_count += 1
-                                            remaining -= 1
-                                            print(
-                                                f"✅ {account_name}: Luckydraw #{draw_count} successful! "
-                                                f"Prize: {prize_name}, Code: {mask_secret(redemption_code)}, "
-                                                f"remaining: {remaining}"
-                                            )
-                                            yield True, {"code": redemption_code}
-                                        else:
-                                            print(
-                                                f"⚠️ {account_name}: Luckydraw successful but no redemption code: {message}"
-                                            )
-                                            remaining -= 1
-                                    else:
-                                        message = json_data.get("message", "Unknown error")
-                                        print(f"❌ {account_name}: Luckydraw failed - {message}")
-                                        yield False, {"error": f"Luckydraw failed - {message}"}
-                                        remaining = 0  # 失败时停止
-                                        break
-                            except json.JSONDecodeError:
-                                # 如果不是 JSON，可能是数字（如 "1:0" 表示已抽完）
-                                try:
-                                    new_remaining = int(json_str)
-                                    if new_remaining == 0:
-                                        print(f"ℹ️ {account_name}: No more draws remaining")
-                                        remaining = 0
-                                except ValueError:
-                                    pass
-                                continue
-                            break
+                # 响应格式如:
+                # 0:["$@1",["xxx",null]]
+                # 1:{"success":true,"message":"...","prize":{...},"redemptionCode":"xxx"}
+                draw_result = await call_action("draw", '[{"excludeThankYou":false}]')
+
+                if draw_result.status_code != 200 or draw_result.action_not_found:
+                    print(f"❌ {account_name}: Luckydraw failed - HTTP {draw_result.status_code}")
+                    yield False, {"error": f"Luckydraw failed - HTTP {draw_result.status_code}"}
+                    break
+
+                print(f"ℹ️ {account_name}: Luckydraw response #{draw_count + 1}: {draw_result.preview[:300]}")
+
+                draw_row = draw_result.rows.get("1")
+                json_data = draw_row.value if draw_row is not None else None
+                if isinstance(json_data, dict):
+                    if json_data.get("success"):
+                        redemption_code = json_data.get("redemptionCode", "")
+                        prize = json_data.get("prize") or {}
+                        prize_name = prize.get("name", "Unknown")
+                        message = json_data.get("message", "")
+
+                        if redemption_code:
+                            draw_count += 1
+                            remaining -= 1
+                            print(
+                                f"✅ {account_name}: Luckydraw #{draw_count} successful! "
+                                f"Prize: {prize_name}, Code: {mask_secret(redemption_code)}, "
+                                f"remaining: {remaining}"
+                            )
+                            yield True, {"code": redemption_code}
+                        else:
+                            print(f"⚠️ {account_name}: Luckydraw successful but no redemption code: {message}")
+                            remaining -= 1
                     else:
-                        # 如果没有找到有效的 JSON 响应
-                        print(f"⚠️ {account_name}: Could not parse luckydraw response")
-                        remaining = 0
+                        message = json_data.get("message", "Unknown error")
+                        print(f"❌ {account_name}: Luckydraw failed - {message}")
+                        yield False, {"error": f"Luckydraw failed - {message}"}
+                        break
+                elif json_data == 0 and not isinstance(json_data, bool):
+                    # "1:0" 表示已抽完
+                    print(f"ℹ️ {account_name}: No more draws remaining")
+                    break
                 else:
-                    print(f"❌ {account_name}: Luckydraw failed - HTTP {response.status_code}")
-                    yield False, {"error": f"Luckydraw failed - HTTP {response.status_code}"}
-                    remaining = 0
+                    # 如果没有找到有效的 JSON 响应
+                    print(f"⚠️ {account_name}: Could not parse luckydraw response")
+                    break
 
             if draw_count > 0:
                 print(f"✅ {account_name}: Total {draw_count} CDK(s) obtained from luckydraw")
@@ -8,19 +8,33 @@ Cloudflare cf_clearance cookie 获取模块
 from __future__ import annotations
 
 import tempfile
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
 
 from camoufox.async_api import AsyncCamoufox
 from playwright_captcha import CaptchaType, ClickSolver, FrameworkType
 
+from utils.browser_readiness import get_cf_page_state, wait_for_cookies
+from utils.browser_resources import ResourceGuard
+from utils.bypass_stats import record_solve_latency
+from utils.fingerprint_profiles import camoufox_fingerprint_options
 from utils.get_headers import get_browser_headers, print_browser_headers
+from utils.proxy_egress import camoufox_geo_options
 from utils.runtime_flags import allow_interactive_auth
 from utils.safe_logging import mask_secret
 
+if TYPE_CHECKING:
+    from utils.fingerprint_profiles import FingerprintProfile
+
 
 async def get_cf_clearance(
     url: str,
     account_name: str,
     proxy_config: dict | None = None,
+    stats_file: str | None = None,
+    provider_name: str | None = None,
+    fingerprint_profile: "FingerprintProfile | None" = None,
 ) -> tuple[dict | None, dict | None]:
     """获取指定 URL 的 cf_clearance cookie
     
@@ -33,6 +47,9 @@ async def get_cf_clearance(
         url: 目标 URL，需要获取 cf_clearance 的页面地址
         account_name: 账号名称，用于日志输出
         proxy_config: 代理配置，格式为 {"server": "http://...", "username": "...", "password": "..."}
+        stats_file: bypass 统计文件路径，提供时记录本次求解耗时
+        provider_name: 统计使用的 provider 名称，默认使用 URL 的 host
+        fingerprint_profile: 账号的持久化指纹档案，提供时复用其指纹并记录浏览器头部
         
     Returns:
         tuple: (cf_cookies, browser_headers)
@@ -51,6 +68,7 @@ async def get_cf_clearance(
         f"(using proxy: {'true' if proxy_config else 'false'})"
     )
     
+    geo_options = await camoufox_geo_options(proxy_config, config={"forceScopeAccess": True})
     with tempfile.TemporaryDirectory(prefix=f"camoufox_{safe_account_name}_cf_clearance_") as tmp_dir:
         print(f"ℹ️ {account_name}: Using temporary directory: {tmp_dir}")
         
@@ -60,32 +78,37 @@ async def get_cf_clearance(
             headless=False,
             humanize=True,
             locale="en-US",
-            geoip=True if proxy_config else False,
             proxy=proxy_config,
-            os="macos",
-            config={
-                "forceScopeAccess": True,
-            }
+            **geo_options,
+            **camoufox_fingerprint_options(fingerprint_profile),
         ) as browser:
+            resource_guard = ResourceGuard("cf_clearance", account_name)
+            await resource_guard.attach(browser)
             page = await browser.new_page()
             
             try:
                 print(f"ℹ️ {account_name}: Access {url} to trigger Cloudflare challenge")
                 
+                started_at = time.monotonic()
                 async with ClickSolver(
                     framework=FrameworkType.CAMOUFOX,
                     page=page,
                     max_attempts=5,
                     attempt_delay=3
                 ) as solver:
-                    await page.goto(url, wait_until="networkidle")
-                    await page.wait_for_timeout(5000)
-                    
-                    # 检查是否在 Cloudflare 验证页面
-                    page_title = await page.title()
-                    page_content = await page.content()
-                    
-                    if "Just a moment" in page_title or "Checking your browser" in page_content:
+                    await page.goto(url, wait_until="domcontentloaded")
+
+                    # 等待 cf_clearance 出现、挑战页出现或页面加载完成（最多 5 秒）
+                    async def page_settled(_cookies: dict) -> bool:
+                        return await get_cf_page_state(page) != "loading"
+
+                    cleared = await wait_for_cookies(
+                        browser, page, ["cf_clearance"], timeout=5000, poll_interval=500, stop_when=page_settled
+                    )
+
+                    if cleared:
+                        print(f"✅ {account_name}: cf_clearance cookie obtained")
+                    elif await get_cf_page_state(page) == "challenge":
                         print(f"ℹ️ {account_name}: Cloudflare challenge detected, auto-solving...")
                         try:
                             await solver.solve_captcha(
@@ -93,11 +116,13 @@ async def get_cf_clearance(
                                 captcha_type=CaptchaType.CLOUDFLARE_INTERSTITIAL
                             )
                             print(f"✅ {account_name}: Cloudflare challenge auto-solved")
-                            await page.wait_for_timeout(10000)
+                            # 求解后 cf_clearance 出现即继续，10 秒只是上限
+                            await wait_for_cookies(browser, page, ["cf_clearance"], timeout=10000)
                         except Exception as solve_err:
                             print(f"⚠️ {account_name}: Auto-solve failed: {solve_err}, waiting for manual verification...")
                             if not allow_interactive_auth():
                                 print(f"❌ {account_name}: Interactive Cloudflare verification required in unattended mode")
+                                _record_solve(stats_file, provider_name or urlparse(url).hostname, started_at, False)
                                 return None, None
                             # 自动求解失败，回退到手动等待
                             await wait_for_cf_clearance_manually(browser, page, account_name)
@@ -124,7 +149,13 @@ async def get_cf_clearance(
                 # 获取浏览器指纹信息
                 browser_headers = await get_browser_headers(page)
                 print_browser_headers(account_name, browser_headers)
+                if fingerprint_profile is not None:
+                    fingerprint_profile.record_headers(browser_headers)
                 
+                _record_solve(
+                    stats_file, provider_name or urlparse(url).hostname, started_at, "cf_clearance" in cf_cookies
+                )
+
                 # 检查是否获取到 cf_clearance cookie
                 if "cf_clearance" not in cf_cookies:
                     print(f"⚠️ {account_name}: cf_clearance cookie not obtained")
@@ -140,9 +171,22 @@ async def get_cf_clearance(
                 return None, None
             
             finally:
+                await resource_guard.print_report()
                 await page.close()
 
 
+def _record_solve(stats_file: str | None, provider_name: str | None, started_at: float, solved: bool) -> None:
+    """记录求解耗时（未提供统计文件时跳过）"""
+    if not stats_file or not provider_name:
+        return
+    elapsed_ms = int((time.monotonic() - started_at) * 1000)
+    solve_stats = record_solve_latency(stats_file, provider_name, elapsed_ms, solved)
+    print(
+        f"ℹ️ {provider_name}: Cloudflare solve took {elapsed_ms / 1000:.1f}s "
+        f"(avg {solve_stats['avg_ms'] / 1000:.1f}s over {solve_stats['solved']} solve(s))"
+    )
+
+
 async def wait_for_cf_clearance_manually(
     browser,
     page,
@@ -153,54 +197,60 @@ async def wait_for_cf_clearance_manually(
 ) -> bool:
     """等待 Cloudflare 验证完成（手动）
     
-    轮询检查 cf_clearance cookie 是否已获取，用于自动验证失败后的手动验证场景。
+    监听页面响应 / 导航事件，cf_clearance cookie 出现后立即返回，用于自动验证失败后的手动验证场景。
     
     Args:
         browser: Camoufox 浏览器实例
         page: 页面实例
         account_name: 账号名称，用于日志输出
         max_wait_time: 最大等待时间（毫秒），默认 60000（60 秒）
-        check_interval: 检查间隔（毫秒），默认 2000（2 秒）
+        check_interval: 没有页面事件时的兜底检查间隔（毫秒），默认 2000（2 秒）
+        max_loaded_checks_without_cf: 页面加载完成且没有挑战时，
+            持续 max_loaded_checks_without_cf * check_interval 毫秒仍无 cf_clearance 则提前结束
         
     Returns:
         bool: 是否成功获取 cf_clearance cookie
     """
-    elapsed_time = 0
-    loaded_without_cf_count = 0
-
-    while elapsed_time < max_wait_time:
-        # 检查是否已经获取到 cf_clearance cookie
-        cookies = await browser.cookies()
-        cf_clearance = None
-        for cookie in cookies:
-            if cookie.get("name") == "cf_clearance":
-                cf_clearance = cookie.get("value")
-                break
-
-        if cf_clearance:
-            print(f"✅ {account_name}: cf_clearance cookie obtained")
-            return True
+    stable_window = max_loaded_checks_without_cf * check_interval / 1000
+    state = {"page_state": None, "loaded_since": None, "stopped_early": False}
 
-        # 检查页面是否还在 Cloudflare 验证页面
-        page_title = await page.title()
-        page_content = await page.content()
-        
-        if "Just a moment" in page_title or "Checking your browser" in page_content:
-            loaded_without_cf_count = 0
-            print(f"ℹ️ {account_name}: Cloudflare challenge in progress, waiting...")
-        else:
-            # 页面已经加载完成，但可能还没有 cf_clearance
-            loaded_without_cf_count += 1
-            print(f"ℹ️ {account_name}: Page loaded, checking for cf_clearance...")
-            if loaded_without_cf_count >= max_loaded_checks_without_cf and len(cookies) > 0:
-                print(
-                    f"ℹ️ {account_name}: Page has remained stable without cf_clearance for "
-                    f"{loaded_without_cf_count} checks, stopping early"
-                )
-                return False
+    async def give_up(cookies: dict) -> bool:
+        page_state = await get_cf_page_state(page)
+        if page_state != state["page_state"]:
+            state["page_state"] = page_state
+            if page_state == "challenge":
+                print(f"ℹ️ {account_name}: Cloudflare challenge in progress, waiting...")
+            else:
+                print(f"ℹ️ {account_name}: Page loaded, checking for cf_clearance...")
 
-        await page.wait_for_timeout(check_interval)
-        elapsed_time += check_interval
+        if page_state == "challenge":
+            state["loaded_since"] = None
+            return False
+
+        now = time.monotonic()
+        if state["loaded_since"] is None:
+            state["loaded_since"] = now
+        if cookies and now - state["loaded_since"] >= stable_window:
+            print(
+                f"ℹ️ {account_name}: Page has remained stable without cf_clearance for "
+                f"{now - state['loaded_since']:.0f}s, stopping early"
+            )
+            state["stopped_early"] = True
+            return True
+        return False
+
+    cleared = await wait_for_cookies(
+        browser,
+        page,
+        ["cf_clearance"],
+        timeout=max_wait_time,
+        poll_interval=check_interval,
+        stop_when=give_up,
+    )
+    if cleared:
+        print(f"✅ {account_name}: cf_clearance cookie obtained")
+        return True
 
-    print(f"⚠️ {account_name}: Timeout waiting for cf_clearance cookie")
+    if not state["stopped_early"]:
+        print(f"⚠️ {account_name}: Timeout waiting for cf_clearance cookie")
     return False
@@ -12,6 +12,9 @@ from curl_cffi import requests as curl_requests
 
 from utils.safe_logging import should_write_debug_artifacts
 
+# 挑战页常见的状态码（Cloudflare 403/503，部分 WAF 返回 429）
+CHALLENGE_STATUS_CODES = {403, 429, 503}
+
 
 def proxy_resolve(proxy_config: dict | None = None) -> str | None:
     """将 proxy_config 转换为代理 URL 字符串
@@ -68,6 +71,10 @@ def response_resolve(
     except json.JSONDecodeError as e:
         print(f"❌ {account_name}: Failed to parse JSON response: {e}")
 
+        challenge = detect_challenge(response)
+        if challenge:
+            print(f"⚠️ {account_name}: {challenge} challenge page detected ({context})")
+
         if not should_write_debug_artifacts():
             print(f"⚠️ {account_name}: Debug artifacts disabled, response body not persisted")
             return None
@@ -102,6 +109,42 @@ def response_resolve(
         return None
 
 
+def detect_challenge(response: curl_requests.Response) -> str | None:
+    """识别 Cloudflare / 阿里云 WAF 等挑战页
+
+    Args:
+        response: curl_cffi Response 对象
+
+    Returns:
+        挑战类型（cloudflare / aliyun_waf / aliyun_captcha / waf），不是挑战页则返回 None
+    """
+    try:
+        headers = response.headers
+        content_type = (headers.get("content-type") or "").lower()
+        if "application/json" in content_type:
+            return None
+
+        text = (response.text or "")[:20000]
+    except Exception:
+        return None
+
+    lowered = text.lower()
+    if "acw_sc__v2" in lowered or "var arg1=" in lowered:
+        return "aliyun_waf"
+    if (
+        (headers.get("cf-mitigated") or "").lower() == "challenge"
+        or "just a moment" in lowered
+        or "challenge-platform" in lowered
+        or "cf-chl" in lowered
+    ):
+        return "cloudflare"
+    if "traceid" in lowered and ("nocaptcha" in lowered or "aliyun" in lowered):
+        return "aliyun_captcha"
+    if response.status_code in CHALLENGE_STATUS_CODES and "text/html" in content_type:
+        return "waf"
+    return None
+
+
 def classify_transport_error(error: Exception | str) -> str:
     """对底层连接错误做更可操作的分类。"""
     message = str(error)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Linux.do（Discourse）JSON API 客户端
+
+复用浏览器 context 的 cookies，通过一个连接池化的 curl_cffi AsyncSession 请求 Discourse JSON 接口，
+列表页按 more_topics_url 翻页并发获取；只有遇到挑战页时才需要回到浏览器。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from curl_cffi import requests as curl_requests
+
+from utils.step_graph import run_paced
+
+LINUXDO_ORIGIN = 'https://linux.do'
+
+# 每个列表来源最多翻页数
+DEFAULT_LIST_MAX_PAGES = 5
+
+# topic 探测：同时在途的请求数与相邻两次请求的最小间隔（秒）
+DEFAULT_PROBE_CONCURRENCY = 4
+DEFAULT_PROBE_INTERVAL = 0.25
+
+_CHALLENGE_MARKERS = ('just a moment', 'cf-chl', 'challenge-platform', '/challenge')
+
+
+def is_challenge_response(status_code: int, text: str) -> bool:
+    """非 JSON 响应是否为挑战页（Cloudflare / Discourse challenge）"""
+    lowered = (text or '')[:5000].lower()
+    if any(marker in lowered for marker in _CHALLENGE_MARKERS):
+        return True
+    return status_code in (403, 503) and '<html' in lowered
+
+
+def to_json_url(url: str, origin: str = LINUXDO_ORIGIN) -> str:
+    """把列表页地址（例如 more_topics_url 的 /latest?page=1）转换为对应的 .json 地址"""
+    parts = urlsplit(urljoin(f'{origin}/', url))
+    path = parts.path.rstrip('/') or '/latest'
+    if not path.endswith('.json'):
+        path = f'{path}.json'
+    return urlunsplit((parts.scheme, parts.netloc, path, parts.query, ''))
+
+
+def classify_topic_probe(topic_id: int, response: dict, origin: str = LINUXDO_ORIGIN) -> dict:
+    """把 /t/{id}.json 的响应归类为 valid / invalid / challenge / rate_limited / error
+
+    只有可见、未删除的普通帖子（archetype=regular）算作 valid。
+
+    Returns:
+        {"status": str, "http_status": int | None, "url": str, "posts_count": int, "highest_post_number": int}
+    """
+    status = response.get('status')
+    data = response.get('data')
+    probe = {
+        'status': 'error',
+        'http_status': status,
+        'url': f'{origin}/t/topic/{topic_id}',
+        'posts_count': 0,
+        'highest_post_number': 0,
+    }
+    if response.get('challenge'):
+        probe['status'] = 'challenge'
+    elif status == 429:
+        probe['status'] = 'rate_limited'
+    elif status == 200 and isinstance(data, dict):
+        regular = (
+            data.get('id') == topic_id
+            and (data.get('archetype') or 'regular') == 'regular'
+            and data.get('visible', True) is not False
+            and not data.get('deleted_at')
+        )
+        probe['status'] = 'valid' if regular else 'invalid'
+        if data.get('slug'):
+            probe['url'] = f"{origin}/t/{data['slug']}/{topic_id}"
+        probe['posts_count'] = int(data.get('posts_count') or 0)
+        probe['highest_post_number'] = int(data.get('highest_post_number') or 0)
+    elif status in (403, 404, 410):
+        probe['status'] = 'invalid'
+    return probe
+
+
+class LinuxDoApiClient:
+    """基于浏览器 cookies 的 Discourse JSON 客户端（连接池复用，限制并发）"""
+
+    def __init__(
+        self,
+        cookies: list[dict] | None = None,
+        user_agent: str | None = None,
+        origin: str = LINUXDO_ORIGIN,
+        max_concurrency: int = 4,
+        impersonate: str = 'firefox135',
+        session=None,
+    ):
+        """
+        Args:
+            cookies: 浏览器 context.cookies() 的结果
+            user_agent: 与浏览器一致的 User-Agent
+            origin: 站点地址
+            max_concurrency: 同时在途的请求数
+            impersonate: curl_cffi 浏览器指纹
+            session: 已有的 AsyncSession（测试或复用时传入）
+        """
+        self.origin = origin
+        self.user_agent = user_agent
+        self._owns_session = session is None
+        self.session = session or curl_requests.AsyncSession(
+            impersonate=impersonate, timeout=30, max_clients=max(1, max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        for cookie in cookies or []:
+            name = cookie.get('name')
+            value = cookie.get('value')
+            if name and value is not None:
+                self.session.cookies.set(
+                    name, value, domain=cookie.get('domain') or 'linux.do', path=cookie.get('path') or '/'
+                )
+
+    @classmethod
+    async def from_context(cls, context, page=None, **kwargs) -> 'LinuxDoApiClient':
+        """使用浏览器 context 的 cookies（以及页面的 User-Agent）创建客户端"""
+        cookies = await context.cookies()
+        user_agent = None
+        if page is not None:
+            try:
+                user_agent = await page.evaluate('() => navigator.userAgent')
+            except Exception:
+                user_agent = None
+        return cls(cookies=cookies, user_agent=user_agent, **kwargs)
+
+    async def __aenter__(self) -> 'LinuxDoApiClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_session:
+            try:
+                await self.session.close()
+            except Exception:
+                pass
+
+    async def get_json(self, url: str, referer: str | None = None) -> dict:
+        """请求 JSON 接口
+
+        Returns:
+            {"success": bool, "status": int, "data": dict} 或
+            {"success": False, "status": int, "challenge": bool, "text": str} 或
+            {"success": False, "error": str}
+        """
+        full_url = urljoin(f'{self.origin}/', url)
+        headers = {
+            'accept': 'application/json, text/plain, */*',
+            'referer': referer or f'{self.origin}/',
+            'x-requested-with': 'XMLHttpRequest',
+        }
+        if self.user_agent:
+            headers['user-agent'] = self.user_agent
+
+        async with self._semaphore:
+            try:
+                response = await self.session.get(full_url, headers=headers, timeout=30)
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        text = response.text
+        try:
+            data = response.json()
+        except Exception:
+            return {
+                'success': False,
+                'status': response.status_code,
+                'challenge': is_challenge_response(response.status_code, text),
+                'text': text[:500],
+            }
+        return {'success': response.status_code == 200, 'status': response.status_code, 'data': data}
+
+    async def fetch_topic_lists(
+        self,
+        list_urls: list[str],
+        max_topics: int,
+        max_pages: int = DEFAULT_LIST_MAX_PAGES,
+    ) -> dict[str, dict]:
+        """并发获取多个列表来源，按 more_topics_url 翻页，直到累计 topic 数达到 max_topics
+
+        每一轮并发请求所有仍有下一页的来源；任一来源失败（例如命中挑战页）后不再翻页。
+
+        Args:
+            list_urls: 列表页地址，例如 https://linux.do/latest
+            max_topics: 所有来源合计需要的 topic 数（按 id 去重）
+            max_pages: 每个来源最多请求的页数
+
+        Returns:
+            {列表页地址: {"pages": [topic_list payload...], "status", "success", "challenge", "error"}}
+        """
+        results: dict[str, dict] = {url: {'pages': [], 'success': False} for url in list_urls}
+        next_urls: dict[str, str] = {url: to_json_url(url, self.origin) for url in list_urls}
+        seen_ids: set[int] = set()
+
+        while next_urls and len(seen_ids) < max_topics:
+            sources = list(next_urls)
+            responses = await asyncio.gather(
+                *(self.get_json(next_urls[source], referer=source) for source in sources)
+            )
+            next_urls = {}
+            for source, response in zip(sources, responses):
+                result = results[source]
+                result['status'] = response.get('status')
+                data = response.get('data')
+                topic_list = data.get('topic_list') if isinstance(data, dict) else None
+                if not response.get('success') or not isinstance(topic_list, dict):
+                    result['challenge'] = bool(response.get('challenge'))
+                    result['error'] = response.get('error') or response.get('text') or 'non-topic payload'
+                    continue
+
+                result['success'] = True
+                result['pages'].append(data)
+                for topic in topic_list.get('topics') or []:
+                    if isinstance(topic, dict) and topic.get('id'):
+                        seen_ids.add(topic['id'])
+
+                more_topics_url = topic_list.get('more_topics_url')
+                if more_topics_url and len(result['pages']) < max_pages:
+                    next_urls[source] = to_json_url(more_topics_url, self.origin)
+
+        return results
+
+    async def probe_topics(
+        self,
+        topic_ids: list[int],
+        max_in_flight: int = DEFAULT_PROBE_CONCURRENCY,
+        min_interval: float = DEFAULT_PROBE_INTERVAL,
+    ) -> dict[int, dict]:
+        """按节奏并发请求一批 /t/{id}.json，判断哪些 id 是可阅读的 topic
+
+        命中挑战页或 429 限流后不再发起新的请求，未请求的 id 不会出现在结果中。
+
+        Returns:
+            {topic_id: classify_topic_probe 的结果}
+        """
+        results: dict[int, dict] = {}
+        stop = asyncio.Event()
+
+        async def probe(index: int) -> None:
+            topic_id = topic_ids[index]
+            response = await self.get_json(f'/t/{topic_id}.json')
+            results[topic_id] = classify_topic_probe(topic_id, response, self.origin)
+            if results[topic_id]['status'] in ('challenge', 'rate_limited'):
+                stop.set()
+
+        await run_paced(probe, len(topic_ids), max_in_flight=max_in_flight, min_interval=min_interval, stop=stop)
+        return results
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Linux.do topic id 密度索引
+
+把 topic id 按固定宽度分桶，记录每个桶里探测 / 阅读过的 id 数与其中有效的数量，跨运行保存在 linuxdo_reads/ 中。
+只保存出现过的桶（稀疏），并记录见过的最大有效 id。
+ID fallback 据此在最大 id 附近、有效密度高的区间里抽样待探测的 id，代替固定步长的随机游走。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from datetime import datetime
+from typing import Callable, Iterable
+
+ID_DENSITY_VERSION = 1
+ID_DENSITY_FILE = 'topic_id_density.json'
+
+DEFAULT_BUCKET_SIZE = 1_000
+# 抽样范围：最大有效 id 往下多少个桶；权重随距离按半衰期衰减
+DEFAULT_SPAN_BUCKETS = 50
+DEFAULT_HALF_LIFE_BUCKETS = 10
+# 最多保留的桶数，超出时丢弃离最大 id 最远的桶
+DEFAULT_MAX_BUCKETS = 2_000
+
+
+class TopicIdDensityIndex:
+    """topic id 有效密度的稀疏分桶索引：桶编号（id // bucket_size）-> [有效数, 探测数]"""
+
+    def __init__(
+        self,
+        path: str,
+        bucket_size: int = DEFAULT_BUCKET_SIZE,
+        span_buckets: int = DEFAULT_SPAN_BUCKETS,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ):
+        self.path = path
+        self.bucket_size = bucket_size
+        self.span_buckets = span_buckets
+        self.max_buckets = max_buckets
+        self.buckets: dict[int, list[int]] = {}
+        self.max_valid_id = 0
+
+    def _bucket(self, topic_id: int) -> int:
+        return topic_id // self.bucket_size
+
+    def record(self, topic_id: int, valid: bool) -> None:
+        """记录一次探测 / 阅读的结果"""
+        counts = self.buckets.setdefault(self._bucket(topic_id), [0, 0])
+        counts[1] += 1
+        if valid:
+            counts[0] += 1
+            self.max_valid_id = max(self.max_valid_id, topic_id)
+        self._trim()
+
+    def observe(self, topic_ids: Iterable[int]) -> None:
+        """列表发现的 topic 一定有效，但不是随机探测得到的，只用来更新最大有效 id"""
+        for topic_id in topic_ids:
+            self.max_valid_id = max(self.max_valid_id, topic_id)
+
+    def density(self, bucket: int) -> float:
+        """桶内有效 id 的比例（加一平滑，未探测过的桶为 0.5）"""
+        valid, probed = self.buckets.get(bucket, (0, 0))
+        return (valid + 1) / (probed + 2)
+
+    def suggested_base(self) -> int | None:
+        """抽样区间的下界，没有数据时返回 None"""
+        if not self.max_valid_id:
+            return None
+        return max(1, (self._bucket(self.max_valid_id) - self.span_buckets + 1) * self.bucket_size)
+
+    def sample_window(
+        self,
+        size: int,
+        skip: Callable[[int], bool] | None = None,
+        rng: random.Random | None = None,
+    ) -> list[int]:
+        """在最大有效 id 附近按密度加权抽样 size 个不重复的 id（升序）；没有数据时返回空列表
+
+        Args:
+            size: 抽样数
+            skip: 返回 True 的 id 不参与抽样（例如已读 / 本次已探测过的 id）
+            rng: 随机数生成器（测试时传入）
+        """
+        if not self.max_valid_id or size <= 0:
+            return []
+        rng = rng or random
+        top = self._bucket(self.max_valid_id)
+        buckets = [bucket for bucket in range(top - self.span_buckets + 1, top + 1) if bucket >= 0]
+        weights = [
+            self.density(bucket) * 0.5 ** ((top - bucket) / DEFAULT_HALF_LIFE_BUCKETS) for bucket in buckets
+        ]
+
+        chosen: set[int] = set()
+        for _ in range(size * 10):
+            if len(chosen) >= size:
+                break
+            bucket = rng.choices(buckets, weights=weights)[0]
+            low = max(1, bucket * self.bucket_size)
+            high = min((bucket + 1) * self.bucket_size - 1, self.max_valid_id)
+            if high < low:
+                continue
+            topic_id = rng.randint(low, high)
+            if topic_id in chosen or (skip is not None and skip(topic_id)):
+                continue
+            chosen.add(topic_id)
+        return sorted(chosen)
+
+    def _trim(self) -> None:
+        if len(self.buckets) <= self.max_buckets:
+            return
+        top = self._bucket(self.max_valid_id)
+        keep = sorted(self.buckets, key=lambda bucket: abs(top - bucket))[: self.max_buckets]
+        self.buckets = {bucket: self.buckets[bucket] for bucket in keep}
+
+    def load(self) -> 'TopicIdDensityIndex':
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('bucket_size') == self.bucket_size:
+                    self.max_valid_id = int(data.get('max_valid_id') or 0)
+                    self.buckets = {
+                        int(bucket): [int(counts[0]), int(counts[1])]
+                        for bucket, counts in (data.get('buckets') or {}).items()
+                    }
+        except Exception as e:
+            print(f'Warning: Failed to load topic id density index: {e}')
+        return self
+
+    def save(self) -> None:
+        data = {
+            'version': ID_DENSITY_VERSION,
+            'updated_at': datetime.now().isoformat(),
+            'bucket_size': self.bucket_size,
+            'max_valid_id': self.max_valid_id,
+            'buckets': {str(bucket): counts for bucket, counts in sorted(self.buckets.items())},
+        }
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+        except Exception as e:
+            print(f'Warning: Failed to save topic id density index: {e}')
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Linux.do 已读 topic 索引
+
+按用户记录已经读过的 topic id 以及读到的最高楼层，跨运行保存在 linuxdo_reads/ 中。
+内存中是按 id 排序的两个并行数组（bisect 查找），文件中 id 以差分形式保存，几万个 topic 也只有几百 KB。
+发现候选后据此过滤已读完的 topic，并优先阅读未读 / 未读完的 topic。
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+from datetime import datetime
+
+READ_INDEX_VERSION = 1
+
+# 最多保留的 topic 数，超出时丢弃 id 最小（最旧）的记录
+DEFAULT_READ_INDEX_MAX_TOPICS = 50_000
+
+
+class ReadTopicIndex:
+    """已读 topic 索引：topic_id -> 读到的最高楼层"""
+
+    def __init__(self, path: str, max_topics: int = DEFAULT_READ_INDEX_MAX_TOPICS):
+        self.path = path
+        self.max_topics = max_topics
+        self.ids: list[int] = []
+        self.posts: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, topic_id: int) -> bool:
+        return self.get(topic_id) > 0
+
+    def get(self, topic_id: int) -> int:
+        """读到的最高楼层，未读过时返回 0"""
+        index = bisect.bisect_left(self.ids, topic_id)
+        if index < len(self.ids) and self.ids[index] == topic_id:
+            return self.posts[index]
+        return 0
+
+    def mark(self, topic_id: int, post_number: int) -> None:
+        """记录读到的楼层（只会增大）"""
+        post_number = max(1, int(post_number or 1))
+        index = bisect.bisect_left(self.ids, topic_id)
+        if index < len(self.ids) and self.ids[index] == topic_id:
+            self.posts[index] = max(self.posts[index], post_number)
+            return
+        self.ids.insert(index, topic_id)
+        self.posts.insert(index, post_number)
+        if len(self.ids) > self.max_topics:
+            overflow = len(self.ids) - self.max_topics
+            del self.ids[:overflow]
+            del self.posts[:overflow]
+
+    def unread_posts(self, topic_id: int, highest_post_number: int | None) -> int | None:
+        """剩余未读楼层数；不知道 topic 总楼层时返回 None"""
+        if not highest_post_number:
+            return None
+        return max(0, int(highest_post_number) - self.get(topic_id))
+
+    def load(self) -> 'ReadTopicIndex':
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                deltas = data.get('ids') or []
+                posts = data.get('posts') or []
+                if len(deltas) == len(posts):
+                    ids: list[int] = []
+                    current = 0
+                    for delta in deltas:
+                        current += int(delta)
+                        ids.append(current)
+                    self.ids = ids
+                    self.posts = [int(post) for post in posts]
+        except Exception as e:
+            print(f'Warning: Failed to load read topic index: {e}')
+        return self
+
+    def save(self) -> None:
+        deltas = [topic_id - previous for previous, topic_id in zip([0, *self.ids[:-1]], self.ids)]
+        data = {
+            'version': READ_INDEX_VERSION,
+            'updated_at': datetime.now().isoformat(),
+            'ids': deltas,
+            'posts': self.posts,
+        }
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+        except Exception as e:
+            print(f'Warning: Failed to save read topic index: {e}')
+
+    def filter_candidates(
+        self,
+        candidates: list[tuple[int, str]],
+        topic_meta: dict[int, dict] | None = None,
+    ) -> tuple[list[tuple[int, str]], int]:
+        """过滤已读完的候选，并按 未读 > 未读完 > 读过但楼层未知 的顺序排列（同组内保持原顺序）
+
+        Args:
+            candidates: [(topic_id, url)]
+            topic_meta: {topic_id: {"highest_post_number": int, ...}}，来自列表 JSON
+
+        Returns:
+            (排序后的候选, 跳过的已读完候选数)
+        """
+        topic_meta = topic_meta or {}
+        unread: list[tuple[int, str]] = []
+        partial: list[tuple[int, str]] = []
+        seen_unknown: list[tuple[int, str]] = []
+        skipped = 0
+
+        for topic_id, topic_url in candidates:
+            if topic_id not in self:
+                unread.append((topic_id, topic_url))
+                continue
+            remaining = self.unread_posts(topic_id, (topic_meta.get(topic_id) or {}).get('highest_post_number'))
+            if remaining is None:
+                seen_unknown.append((topic_id, topic_url))
+            elif remaining > 0:
+                partial.append((topic_id, topic_url))
+            else:
+                skipped += 1
+
+        return unread + partial + seen_unknown, skipped
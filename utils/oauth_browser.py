@@ -5,9 +5,14 @@ OAuth 浏览器公共辅助函数
 
 from __future__ import annotations
 
+import asyncio
 import json
+import os
 from urllib.parse import parse_qs, urlparse
 
+from camoufox.async_api import AsyncCamoufox
+
+from utils.fingerprint_profiles import FingerprintProfile, camoufox_fingerprint_options
 from utils.get_headers import get_browser_headers, print_browser_headers
 from utils.safe_logging import mask_secret
 
@@ -73,3 +78,97 @@ async def should_treat_redirect_timeout_as_success(page, provider_origin: str) -
 
     api_user = await read_api_user_from_local_storage(page, 'redirect-timeout-check', silent=True)
     return api_user is not None
+
+
+class OAuthBrowserSession:
+    """OAuth 登录使用的 Camoufox 浏览器上下文
+
+    调用 start() 后在后台启动浏览器并加载 storage_state，可与 client id / auth state 的
+    HTTP 请求并行；前置请求失败时调用 aclose() 取消启动并释放浏览器。
+    """
+
+    def __init__(
+        self,
+        account_name: str,
+        cache_file_path: str = '',
+        fingerprint_profile: FingerprintProfile | None = None,
+    ):
+        self.account_name = account_name
+        self.cache_file_path = cache_file_path
+        self.fingerprint_profile = fingerprint_profile
+        self._camoufox: AsyncCamoufox | None = None
+        self._context = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> 'OAuthBrowserSession':
+        """在后台开始启动浏览器（需在事件循环中调用）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._launch())
+        return self
+
+    async def _launch(self):
+        camoufox = AsyncCamoufox(
+            headless=False,
+            humanize=True,
+            locale='en-US',
+            # 复用账号的持久化指纹（没有档案时强制 macOS 指纹，避免跨平台指纹不一致问题）
+            **camoufox_fingerprint_options(self.fingerprint_profile),
+            config={
+                'forceScopeAccess': True,
+            },
+        )
+        # 启动过程中被取消时 AsyncCamoufox 会自行清理，启动成功后才交给 aclose 管理
+        browser = await camoufox.__aenter__()
+        self._camoufox = camoufox
+        try:
+            # 只有在缓存文件存在时才加载 storage_state
+            has_cache = bool(self.cache_file_path) and await asyncio.to_thread(os.path.exists, self.cache_file_path)
+            storage_state = self.cache_file_path if has_cache else None
+            if storage_state:
+                print(f'ℹ️ {self.account_name}: Found cache file, restore storage state')
+            else:
+                print(f'ℹ️ {self.account_name}: No cache file found, starting fresh')
+
+            self._context = await browser.new_context(storage_state=storage_state)
+            return self._context
+        except BaseException:
+            camoufox, self._camoufox = self._camoufox, None
+            await asyncio.shield(camoufox.__aexit__(None, None, None))
+            raise
+
+    async def get_context(self):
+        """等待浏览器启动完成并返回 context"""
+        self.start()
+        return await self._task
+
+    async def aclose(self) -> None:
+        """取消未完成的启动，关闭 context 与浏览器（可重复调用）"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            print(f'ℹ️ {self.account_name}: Cancelling speculative OAuth browser launch')
+            task.cancel()
+        if task is not None:
+            try:
+                await task
+            except BaseException:
+                pass
+
+        context, self._context = self._context, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+        camoufox, self._camoufox = self._camoufox, None
+        if camoufox is not None:
+            try:
+                await camoufox.__aexit__(None, None, None)
+            except Exception as e:
+                print(f'⚠️ {self.account_name}: Error occurred while closing OAuth browser: {e}')
+
+    async def __aenter__(self) -> 'OAuthBrowserSession':
+        return self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
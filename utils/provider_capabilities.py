@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Provider 能力缓存
+
+缓存 /api/status 返回的站点能力（OAuth 开关、client id、quota 设置、签到开关），
+按 origin 落盘并带 TTL；过期后先返回旧值，同时在后台刷新。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+from utils.constants import QUOTA_DIVISOR
+
+PROVIDER_CAPABILITIES_FILE = 'provider_capabilities.json'
+
+# /api/status 变化很少，默认缓存 6 小时
+DEFAULT_CAPABILITY_TTL = 6 * 3600
+
+
+class ProviderCapabilityCache:
+    """按 origin 缓存 /api/status 结果"""
+
+    def __init__(self, cache_file: str, ttl: int | float = DEFAULT_CAPABILITY_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._refreshing: dict[str, asyncio.Future] = {}
+        # 缓存文件每个实例只读取一次；后台刷新在线程中写入，用锁保护
+        self._data: dict | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """获取缓存内容，首次访问时读取缓存文件
+
+        Returns:
+            {origin: {"fetched_at": float, "status": dict}}
+        """
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._read_file()
+        return self._data
+
+    def _read_file(self) -> dict:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception as e:
+            print(f'Warning: Failed to load provider capabilities: {e}')
+        return {}
+
+    def save(self, data: dict) -> None:
+        """保存缓存文件"""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f'Warning: Failed to save provider capabilities: {e}')
+
+    def get(self, origin: str) -> tuple[dict | None, bool]:
+        """读取缓存
+
+        Returns:
+            (status 数据, 是否在 TTL 内)；未缓存时为 (None, False)
+        """
+        entry = self.load().get(origin)
+        if not isinstance(entry, dict) or not isinstance(entry.get('status'), dict):
+            return None, False
+        fetched_at = float(entry.get('fetched_at', 0))
+        return entry['status'], time.time() - fetched_at < self.ttl
+
+    def put(self, origin: str, status: dict) -> None:
+        """写入缓存；重新读取文件再合并，保留其他实例写入的 origin"""
+        with self._lock:
+            data = self._read_file()
+            data[origin] = {'fetched_at': time.time(), 'status': status}
+            self._data = data
+            self.save(data)
+
+    async def resolve(
+        self,
+        origin: str,
+        fetch: Callable[[], dict],
+        refresh: Callable[[], dict] | None = None,
+    ) -> dict:
+        """获取 status，优先使用缓存
+
+        Args:
+            origin: provider origin
+            fetch: 同步拉取 /api/status 的函数，返回 {"success": bool, "data": dict, ...}
+            refresh: 后台刷新使用的拉取函数（需可在线程中独立运行），默认为 fetch
+
+        Returns:
+            与 fetch 相同结构的结果字典，命中缓存时 cached 为 True
+        """
+        status, fresh = self.get(origin)
+        if status is not None:
+            if not fresh:
+                self._schedule_refresh(origin, refresh or fetch)
+            return {'success': True, 'data': status, 'cached': True}
+
+        result = await asyncio.to_thread(fetch)
+        if result.get('success') and isinstance(result.get('data'), dict):
+            self.put(origin, result['data'])
+        return result
+
+    def _schedule_refresh(self, origin: str, refresh: Callable[[], dict]) -> None:
+        """在线程池中刷新过期缓存，同一 origin 同时只刷新一次"""
+        pending = self._refreshing.get(origin)
+        if pending is not None and not pending.done():
+            return
+
+        def run_refresh() -> None:
+            try:
+                result = refresh()
+                if result.get('success') and isinstance(result.get('data'), dict):
+                    self.put(origin, result['data'])
+            except Exception as e:
+                print(f'Warning: Failed to refresh provider capabilities for {origin}: {e}')
+
+        self._refreshing[origin] = asyncio.get_running_loop().run_in_executor(None, run_refresh)
+
+    async def wait_for_refresh(self) -> None:
+        """等待所有后台刷新完成"""
+        pending = [future for future in self._refreshing.values() if not future.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_quota_divisor(self, origin: str) -> int | float:
+        """quota 原始值到美元的除数，优先使用站点的 quota_per_unit"""
+        status, _ = self.get(origin)
+        quota_per_unit = (status or {}).get('quota_per_unit')
+        if isinstance(quota_per_unit, (int, float)) and not isinstance(quota_per_unit, bool) and quota_per_unit > 0:
+            return quota_per_unit
+        return QUOTA_DIVISOR
+
+    def is_check_in_enabled(self, origin: str) -> bool:
+        """站点是否开启签到；只有 status 明确关闭时才返回 False"""
+        status, _ = self.get(origin)
+        for key in ('checkin_enabled', 'check_in_enabled'):
+            if (status or {}).get(key) is False:
+                return False
+        return True
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+代理出口 IP / 地理信息缓存
+
+配置代理时，Camoufox 的 geoip=True 会在每次启动前通过代理请求公网 IP 服务并查询 GeoIP 数据库，
+一个账号的 WAF / 登录页 / cf_clearance / CDK 流程各启动一次浏览器就要重复一次。
+
+这里每个代理只解析一次出口 IP 与地理信息（进程内缓存），并以 TTL 保存到 storage-states，
+启动浏览器时直接把时区、经纬度、语言区域与 WebRTC IP 写入 config，代替 geoip=True。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable
+
+PROXY_EGRESS_FILE = 'proxy_egress.json'
+PROXY_EGRESS_PATH = os.path.join('storage-states', PROXY_EGRESS_FILE)
+
+# 跨运行复用解析结果的有效期（秒）
+PROXY_EGRESS_TTL = 6 * 3600
+
+# geoip=True 时 Camoufox 只在 config 未设置时填入的键（调用方的值优先），其余地理键直接覆盖
+GEO_DEFAULT_KEYS = ('timezone', 'locale:language', 'locale:region', 'locale:script')
+
+# 本次运行已解析的代理：{key: {"ip", "geo", "resolved_at"}}
+_run_cache: dict[str, dict] = {}
+
+
+def proxy_key(proxy_config: dict) -> str:
+    """缓存键：代理地址 + 用户名的哈希（不在文件中保存代理凭据）"""
+    raw = f"{proxy_config.get('server', '')}\n{proxy_config.get('username') or ''}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _resolve_with_camoufox(proxy_config: dict) -> dict:
+    """通过代理获取出口 IP，并在本地 GeoIP 数据库中查询地理信息（与 geoip=True 的逻辑一致）"""
+    from camoufox.geolocation import get_geolocation
+    from camoufox.ip import Proxy, public_ip
+
+    ip = public_ip(Proxy(**proxy_config).as_string())
+    geo = get_geolocation(ip).as_config()
+    return {
+        'ip': ip,
+        'geo': {key: value for key, value in geo.items() if key.startswith('geolocation:') or key in GEO_DEFAULT_KEYS},
+    }
+
+
+class ProxyEgressCache:
+    """代理出口解析缓存"""
+
+    def __init__(
+        self,
+        path: str = PROXY_EGRESS_PATH,
+        ttl: float = PROXY_EGRESS_TTL,
+        resolver: Callable[[dict], dict] | None = None,
+    ):
+        """
+        Args:
+            path: 缓存文件路径
+            ttl: 缓存有效期（秒）
+            resolver: 解析函数，参数为 Camoufox 代理配置，返回 {"ip", "geo"}
+        """
+        self.path = path
+        self.ttl = ttl
+        self.resolver = resolver or _resolve_with_camoufox
+
+    def load(self) -> dict:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception as e:
+            print(f'Warning: Failed to load proxy egress cache: {e}')
+        return {}
+
+    def save(self, entries: dict) -> None:
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f'Warning: Failed to save proxy egress cache: {e}')
+
+    def _is_fresh(self, entry: Any) -> bool:
+        if not isinstance(entry, dict) or not entry.get('ip'):
+            return False
+        return time.time() - float(entry.get('resolved_at', 0)) < self.ttl
+
+    async def resolve(self, proxy_config: dict | None) -> dict | None:
+        """获取代理出口信息
+
+        Returns:
+            {"ip": str, "geo": dict, "resolved_at": float}；未配置代理或解析失败时返回 None
+        """
+        if not proxy_config or not proxy_config.get('server'):
+            return None
+
+        key = proxy_key(proxy_config)
+        entry = _run_cache.get(key)
+        if self._is_fresh(entry):
+            return entry
+
+        entries = self.load()
+        entry = entries.get(key)
+        if self._is_fresh(entry):
+            _run_cache[key] = entry
+            return entry
+
+        try:
+            resolved = await asyncio.to_thread(self.resolver, proxy_config)
+        except Exception as e:
+            print(f'⚠️ Failed to resolve proxy egress, falling back to Camoufox geoip: {e}')
+            return None
+
+        entry = {'ip': resolved['ip'], 'geo': resolved.get('geo') or {}, 'resolved_at': time.time()}
+        _run_cache[key] = entry
+        entries = self.load()
+        entries[key] = entry
+        self.save(entries)
+        print(f"ℹ️ Resolved proxy egress {entry['ip']} ({entry['geo'].get('timezone', 'unknown timezone')})")
+        return entry
+
+
+def egress_launch_options(proxy_config: dict | None, egress: dict | None, config: dict | None = None) -> dict:
+    """根据出口信息生成 AsyncCamoufox 的 geoip / config / firefox_user_prefs 参数
+
+    Args:
+        proxy_config: Camoufox 代理配置
+        egress: ProxyEgressCache.resolve() 的结果
+        config: 调用方自己的 Camoufox config，会与地理信息合并
+
+    Returns:
+        AsyncCamoufox 关键字参数
+    """
+    options: dict[str, Any] = {}
+    if proxy_config and egress:
+        ip = egress['ip']
+        merged = dict(config or {})
+        # 与 Camoufox geoip=True 的合并方式一致：时区与语言区域不覆盖调用方的设置
+        for key, value in egress.get('geo', {}).items():
+            if key in GEO_DEFAULT_KEYS:
+                merged.setdefault(key, value)
+            else:
+                merged[key] = value
+        prefs = {}
+        if ':' in ip:
+            merged.setdefault('webrtc:ipv6', ip)
+        else:
+            merged.setdefault('webrtc:ipv4', ip)
+            prefs['network.dns.disableIPv6'] = True
+        options.update(geoip=False, config=merged, firefox_user_prefs=prefs)
+        return options
+
+    # 未配置代理，或解析失败时交给 Camoufox 自行解析
+    options['geoip'] = bool(proxy_config)
+    if config:
+        options['config'] = config
+    return options
+
+
+async def camoufox_geo_options(
+    proxy_config: dict | None,
+    config: dict | None = None,
+    cache: ProxyEgressCache | None = None,
+) -> dict:
+    """解析代理出口（带缓存）并生成 AsyncCamoufox 的地理信息参数"""
+    egress = await (cache or ProxyEgressCache()).resolve(proxy_config)
+    return egress_launch_options(proxy_config, egress, config)
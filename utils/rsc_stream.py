@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Next.js React Server Components (text/x-component) 响应解析
+
+RscFlightParser 按字节增量解码 flight 流中的行（"<id>:<payload>\\n" 或 "<id>:T<hex 长度>,<内容>"），
+配合 curl_cffi 的 stream=True 可以在响应到达时逐行处理，不需要缓冲整个响应体。
+
+Server Action 的 next-action id 随部署变化，discover_server_actions 从页面引用的 JS chunk 中
+提取 createServerReference 的 (id, 函数名)，结果按页面缓存到磁盘，id 失效时再重新发现。
+调用 action 需要的 next-router-state-tree 请求头从页面内联的 flight 数据（初始路由树）中生成。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote, urljoin, urlparse
+
+SERVER_ACTIONS_FILE = 'server_actions.json'
+
+# 以 "<tag><hex 长度>," 开头、按字节长度读取的行类型（T 为文本，其余为二进制）
+_LENGTH_PREFIXED_TAGS = frozenset(b'TABOoUSsLlGgMmV')
+_HEX_DIGITS = frozenset(b'0123456789abcdefABCDEF')
+
+_ROW_TAG_PATTERN = re.compile(r'^([A-Z]{1,2})(?=[\[{"])')
+_BUILD_ID_PATTERNS = (
+    re.compile(r'"buildId"\s*:\s*"([^"]+)"'),
+    re.compile(r'\\"b\\"\s*:\s*\\"([^\\"]+)\\"'),
+)
+_CHUNK_SCRIPT_PATTERN = re.compile(r'["\'](/_next/static/chunks/[^"\']+?\.js)["\']')
+_SERVER_REFERENCE_PATTERN = re.compile(
+    r'createServerReference\)?\(\s*["\']([0-9a-f]{40,42})["\']([^()]*?)\)',
+)
+_SERVER_REFERENCE_NAME_PATTERN = re.compile(r'["\']([A-Za-z_$][\w$]*)["\']\s*$')
+_NEXT_F_PUSH_PATTERN = re.compile(r'self\.__next_f\.push\(\[1,\s*("(?:[^"\\]|\\.)*")\]\)')
+# encodeURIComponent 不编码的字符（quote 默认已保留字母数字与 _.-~）
+_URI_COMPONENT_SAFE = "()!*'"
+
+# 预览日志保留的最大字节数
+_PREVIEW_BYTES = 300
+
+
+@dataclass
+class RscRow:
+    """flight 流中的一行"""
+
+    id: str
+    value: Any
+    tag: str | None = None
+
+
+class RscFlightParser:
+    """增量 flight 流解析器
+
+    feed() 接收任意切分的字节块，返回其中已完整的行；不完整的部分留在缓冲区等待后续数据。
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list[RscRow]:
+        """写入一段字节，返回新解析出的完整行"""
+        if chunk:
+            self._buffer.extend(chunk)
+        rows = []
+        while True:
+            row = self._next_row()
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def close(self) -> list[RscRow]:
+        """流结束时解析缓冲区中最后一个没有换行结尾的行"""
+        rows = self.feed(b'')
+        if self._buffer.strip():
+            self._buffer.extend(b'\n')
+            rows.extend(self.feed(b''))
+        self._buffer.clear()
+        return rows
+
+    def _next_row(self) -> RscRow | None:
+        # 跳过行之间多余的换行
+        while self._buffer[:1] in (b'\n', b'\r'):
+            del self._buffer[:1]
+
+        colon = self._buffer.find(b':')
+        if colon < 0 or colon + 1 >= len(self._buffer):
+            return None
+        row_id = self._buffer[:colon].decode('ascii', errors='replace')
+        start = colon + 1
+
+        if self._buffer[start] in _LENGTH_PREFIXED_TAGS:
+            # JSON 不会以这些字母开头；需要看到下一个字节才能确定是否为长度前缀行
+            if start + 1 >= len(self._buffer):
+                return None
+            is_length_prefixed = self._buffer[start + 1] in _HEX_DIGITS
+        else:
+            is_length_prefixed = False
+
+        if is_length_prefixed:
+            comma = self._buffer.find(b',', start + 1)
+            if comma < 0:
+                return None
+            length = int(self._buffer[start + 1 : comma], 16)
+            end = comma + 1 + length
+            if len(self._buffer) < end:
+                return None
+            tag = chr(self._buffer[start])
+            payload = bytes(self._buffer[comma + 1 : end])
+            del self._buffer[:end]
+            value = payload.decode('utf-8', errors='replace') if tag == 'T' else payload
+            return RscRow(id=row_id, value=value, tag=tag)
+
+        newline = self._buffer.find(b'\n', start)
+        if newline < 0:
+            return None
+        line = self._buffer[start:newline].decode('utf-8', errors='replace').rstrip('\r')
+        del self._buffer[: newline + 1]
+        return _parse_line(row_id, line)
+
+
+def _parse_line(row_id: str, line: str) -> RscRow:
+    """解析普通行：可选的大写 tag + JSON；无法解析为 JSON 时保留原始文本"""
+    tag = None
+    match = _ROW_TAG_PATTERN.match(line)
+    if match:
+        tag = match.group(1)
+        line = line[len(tag) :]
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError:
+        value = line
+    return RscRow(id=row_id, value=value, tag=tag)
+
+
+def iter_rsc_rows(chunks: Iterable[bytes]) -> Iterator[RscRow]:
+    """逐块解析 flight 流，行完整后立即产出"""
+    parser = RscFlightParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def parse_rsc_text(text: str) -> dict[str, RscRow]:
+    """解析完整的 flight 响应文本，按行 id 索引"""
+    return {row.id: row for row in iter_rsc_rows([text.encode('utf-8')])}
+
+
+@dataclass
+class RscActionResponse:
+    """Server Action 调用结果"""
+
+    status_code: int
+    rows: dict[str, RscRow] = field(default_factory=dict)
+    action_not_found: bool = False
+    preview: str = ''
+
+
+def is_action_not_found(status_code: int, headers: Any) -> bool:
+    """next-action id 已失效（通常是重新部署）"""
+    if status_code == 404:
+        return True
+    try:
+        return bool(headers and headers.get('x-nextjs-action-not-found'))
+    except Exception:
+        return False
+
+
+def post_server_action(
+    session: Any,
+    url: str,
+    headers: dict,
+    action_id: str,
+    data: str,
+    router_state_tree: str | None = None,
+    stop_at: str | None = None,
+    timeout: int = 30,
+) -> RscActionResponse:
+    """以流式方式调用 Server Action 并解析 flight 响应
+
+    Args:
+        session: curl_cffi Session
+        url: 页面地址（Server Action 提交到页面本身）
+        headers: 基础请求头
+        action_id: next-action id
+        data: 请求体（JSON 编码的参数数组）
+        router_state_tree: next-router-state-tree 请求头
+        stop_at: 收到该 id 的行后立即停止读取剩余响应
+        timeout: 超时秒数
+
+    Returns:
+        RscActionResponse；HTTP 非 200 时 rows 为空
+    """
+    action_headers = {**headers, 'next-action': action_id}
+    if router_state_tree:
+        action_headers['next-router-state-tree'] = router_state_tree
+
+    response = session.post(url, headers=action_headers, data=data, timeout=timeout, stream=True)
+    try:
+        result = RscActionResponse(
+            status_code=response.status_code,
+            action_not_found=is_action_not_found(response.status_code, getattr(response, 'headers', None)),
+        )
+        if response.status_code != 200 or result.action_not_found:
+            return result
+
+        preview = bytearray()
+        for row in iter_rsc_rows(_iter_response_chunks(response, preview)):
+            result.rows[row.id] = row
+            if stop_at is not None and row.id == stop_at:
+                break
+        result.preview = preview.decode('utf-8', errors='replace')
+        return result
+    finally:
+        response.close()
+
+
+def _iter_response_chunks(response: Any, preview: bytearray) -> Iterator[bytes]:
+    for chunk in response.iter_content():
+        if not chunk:
+            continue
+        if len(preview) < _PREVIEW_BYTES:
+            preview.extend(chunk[: _PREVIEW_BYTES - len(preview)])
+        yield chunk
+
+
+def extract_build_id(html: str) -> str | None:
+    """从页面 HTML 中提取 Next.js buildId"""
+    for pattern in _BUILD_ID_PATTERNS:
+        match = pattern.search(html or '')
+        if match:
+            return match.group(1)
+    return None
+
+
+def extract_chunk_urls(html: str, page_url: str) -> list[str]:
+    """页面引用的 JS chunk 地址（去重、保持顺序）"""
+    urls = []
+    for path in _CHUNK_SCRIPT_PATTERN.findall(html or ''):
+        url = urljoin(page_url, path)
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def extract_server_actions(js_text: str) -> dict[str, str]:
+    """从 JS chunk 中提取 Server Action
+
+    匹配客户端引用桩 createServerReference("<id>", callServer, void 0, findSourceMapURL, "<函数名>")，
+    没有函数名的引用无法区分用途，忽略。
+
+    Returns:
+        {函数名: action id}
+    """
+    actions = {}
+    for match in _SERVER_REFERENCE_PATTERN.finditer(js_text or ''):
+        name_match = _SERVER_REFERENCE_NAME_PATTERN.search(match.group(2))
+        if name_match:
+            actions.setdefault(name_match.group(1), match.group(1))
+    return actions
+
+
+def extract_flight_data(html: str) -> str:
+    """拼接页面内联的 flight 数据（self.__next_f.push([1, "..."]) 的字符串参数）"""
+    parts = []
+    for literal in _NEXT_F_PUSH_PATTERN.findall(html or ''):
+        try:
+            parts.append(json.loads(literal))
+        except json.JSONDecodeError:
+            continue
+    return ''.join(parts)
+
+
+def _normalize_router_tree(node: list, page_path: str) -> list:
+    """把 flight 数据中的路由树节点转换为请求头格式：$undefined 转为 null，页面叶子节点补上 url 与 refresh 标记"""
+    segment, children = node[0], node[1]
+    normalized = [
+        segment,
+        {
+            key: _normalize_router_tree(child, page_path)
+            for key, child in children.items()
+            if isinstance(child, list) and len(child) >= 2 and isinstance(child[1], dict)
+        },
+    ]
+    if isinstance(segment, str) and segment.startswith('__PAGE__'):
+        return normalized + [page_path, 'refresh']
+    extras = [None if value == '$undefined' else value for value in node[2:]]
+    while extras and extras[-1] is None:
+        extras.pop()
+    return normalized + extras
+
+
+def extract_router_state_tree(html: str, page_url: str) -> str | None:
+    """从页面内联的 flight 数据中取出初始路由树，编码为 next-router-state-tree 请求头
+
+    初始 payload 行形如 {"b": buildId, "f": [[路由树, ...]], ...}，与客户端刷新当前页面时发送的值一致。
+
+    Returns:
+        URL 编码后的路由树；页面中没有可识别的 flight 数据时返回 None
+    """
+    for row in parse_rsc_text(extract_flight_data(html)).values():
+        flight_data = row.value.get('f') if isinstance(row.value, dict) else None
+        if not (isinstance(flight_data, list) and flight_data and isinstance(flight_data[0], list) and flight_data[0]):
+            continue
+        tree = flight_data[0][0]
+        if isinstance(tree, list) and len(tree) >= 2 and isinstance(tree[1], dict):
+            normalized = _normalize_router_tree(tree, urlparse(page_url).path or '/')
+            return quote(json.dumps(normalized, separators=(',', ':'), ensure_ascii=False), safe=_URI_COMPONENT_SAFE)
+    return None
+
+
+@dataclass
+class PageDeploy:
+    """页面当前部署的信息"""
+
+    deploy_id: str | None
+    chunk_urls: list[str] = field(default_factory=list)
+    router_state_tree: str | None = None
+
+
+def fetch_page_deploy(
+    session: Any,
+    page_url: str,
+    headers: dict | None = None,
+    timeout: int = 30,
+) -> PageDeploy:
+    """获取页面 HTML，返回当前部署标识、页面引用的 JS chunk 与路由树请求头
+
+    没有 buildId 时用 chunk 地址（带内容哈希）标识部署。
+
+    Returns:
+        PageDeploy；页面获取失败时 deploy_id 为 None
+    """
+    response = session.get(page_url, headers=headers, timeout=timeout)
+    if response.status_code != 200:
+        return PageDeploy(deploy_id=None)
+
+    html = response.text
+    chunk_urls = extract_chunk_urls(html, page_url)
+    deploy_id = extract_build_id(html) or hashlib.sha256('\n'.join(sorted(chunk_urls)).encode('utf-8')).hexdigest()[:16]
+    return PageDeploy(
+        deploy_id=deploy_id, chunk_urls=chunk_urls, router_state_tree=extract_router_state_tree(html, page_url)
+    )
+
+
+def scan_server_actions(
+    session: Any,
+    chunk_urls: list[str],
+    headers: dict | None = None,
+    page_hint: str | None = None,
+    timeout: int = 30,
+) -> dict[str, str]:
+    """扫描 JS chunk 中的 Server Action
+
+    Args:
+        page_hint: 优先扫描路径中包含该字符串的 chunk（通常为页面路由名）
+
+    Returns:
+        {函数名: action id}
+    """
+    chunk_urls = list(chunk_urls)
+    if page_hint:
+        chunk_urls.sort(key=lambda url: page_hint not in url)
+
+    actions: dict[str, str] = {}
+    for chunk_url in chunk_urls:
+        try:
+            chunk_response = session.get(chunk_url, headers=headers, timeout=timeout)
+        except Exception:
+            continue
+        if chunk_response.status_code == 200:
+            for name, action_id in extract_server_actions(chunk_response.text).items():
+                actions.setdefault(name, action_id)
+    return actions
+
+
+def discover_server_actions(
+    session: Any,
+    page_url: str,
+    headers: dict | None = None,
+    page_hint: str | None = None,
+    timeout: int = 30,
+) -> tuple[str | None, dict[str, str]]:
+    """获取页面并扫描其 JS chunk 中的 Server Action
+
+    Args:
+        session: curl_cffi Session
+        page_url: 页面地址
+        headers: 请求头
+        page_hint: 优先扫描路径中包含该字符串的 chunk（通常为页面路由名）
+        timeout: 超时秒数
+
+    Returns:
+        (部署标识, {函数名: action id})；页面获取失败时为 (None, {})
+    """
+    page = fetch_page_deploy(session, page_url, headers, timeout)
+    if page.deploy_id is None:
+        return None, {}
+    return page.deploy_id, scan_server_actions(session, page.chunk_urls, headers, page_hint, timeout)
+
+
+def load_server_actions(cache_file: str) -> dict:
+    """加载 Server Action 缓存
+
+    Returns:
+        {page_url: {"deploy_id": str, "actions": {用途: action id}, "router_state_tree": str | None, "discovered_at": str}}
+    """
+    try:
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+    except Exception as e:
+        print(f'Warning: Failed to load server actions: {e}')
+    return {}
+
+
+def save_server_actions(
+    cache_file: str,
+    page_url: str,
+    deploy_id: str | None,
+    actions: dict[str, str],
+    router_state_tree: str | None = None,
+) -> None:
+    """保存某个页面的 Server Action 缓存"""
+    data = load_server_actions(cache_file)
+    data[page_url] = {
+        'deploy_id': deploy_id,
+        'actions': actions,
+        'router_state_tree': router_state_tree,
+        'discovered_at': datetime.now().isoformat(),
+    }
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f'Warning: Failed to save server actions: {e}')
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-运行时开关
+运行时开关与环境变量读取
 """
 
 from __future__ import annotations
@@ -11,3 +11,41 @@ import os
 def allow_interactive_auth() -> bool:
     """是否允许需要人工介入的认证流程。"""
     return os.getenv('ALLOW_INTERACTIVE_AUTH', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def lazy_bypass_enabled() -> bool:
+    """是否对所有配置了 bypass_method 的 provider 启用 lazy bypass（先直连，命中挑战页再获取 bypass）。"""
+    return os.getenv('LAZY_BYPASS', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def browser_light_mode_enabled() -> bool:
+    """是否在自动化浏览器中拦截图片 / 字体 / 媒体和第三方统计脚本。"""
+    return os.getenv('BROWSER_LIGHT_MODE', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def get_int_env(name: str, default: int) -> int:
+    """读取整数环境变量；空字符串或非法值时回退默认值。"""
+    raw = (os.getenv(name) or '').strip()
+    if not raw:
+        return default
+
+    try:
+        return int(raw)
+    except ValueError:
+        print(f'⚠️ Invalid integer for {name}: {raw!r}, using default {default}')
+        return default
+
+
+def get_bool_env(name: str, default: bool = False) -> bool:
+    """读取布尔环境变量；空字符串或非法值时回退默认值。"""
+    raw = (os.getenv(name) or '').strip().lower()
+    if not raw:
+        return default
+
+    if raw in {'1', 'true', 'yes', 'on'}:
+        return True
+    if raw in {'0', 'false', 'no', 'off'}:
+        return False
+
+    print(f'⚠️ Invalid boolean for {name}: {raw!r}, using default {default}')
+    return default
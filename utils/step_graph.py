@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+声明式步骤图执行器
+
+把签到 / 抽奖类流程描述为带依赖的步骤，依赖已完成的步骤并发执行；
+步骤通过 ctx.emit() 产出结果（例如 CDK），调用方以异步迭代的方式实时获取。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+_DONE = object()
+
+
+@dataclass
+class Step:
+    """流程中的一个步骤
+
+    Attributes:
+        name: 步骤名称，结果以该名称保存在 ctx.results 中
+        run: 执行步骤的协程函数，参数为 StepContext，返回值作为步骤结果
+        depends_on: 依赖的步骤名称，全部完成后才会开始执行
+    """
+
+    name: str
+    run: Callable[['StepContext'], Awaitable[Any]]
+    depends_on: tuple[str, ...] = ()
+
+
+class StepContext:
+    """步骤执行上下文"""
+
+    def __init__(self, results: dict[str, Any], queue: asyncio.Queue):
+        self.results = results
+        self._queue = queue
+        self._stop = asyncio.Event()
+        self._linked_stops: list[asyncio.Event] = []
+
+    def emit(self, item: Any) -> None:
+        """向调用方产出一个结果"""
+        self._queue.put_nowait(item)
+
+    async def wait_consumed(self) -> None:
+        """等待已产出的结果都被调用方取走（调用方请求下一个结果时才算取走），调用方停止消费时立即返回"""
+        waiters = {asyncio.ensure_future(self._queue.join()), asyncio.ensure_future(self._stop.wait())}
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    @property
+    def stopping(self) -> bool:
+        """调用方是否已停止消费（不再启动新的步骤 / 请求）"""
+        return self._stop.is_set()
+
+    def linked_stop(self) -> asyncio.Event:
+        """返回一个新的 Event，调用方停止消费时会被一并设置（例如作为 run_paced 的 stop）"""
+        event = asyncio.Event()
+        if self._stop.is_set():
+            event.set()
+        self._linked_stops.append(event)
+        return event
+
+    def request_stop(self) -> None:
+        self._stop.set()
+        for event in self._linked_stops:
+            event.set()
+
+
+class StepGraph:
+    """按依赖关系并发执行步骤"""
+
+    def __init__(self, steps: list[Step]):
+        names = [step.name for step in steps]
+        if len(names) != len(set(names)):
+            raise ValueError('Duplicate step names in step graph')
+        for step in steps:
+            missing = [dep for dep in step.depends_on if dep not in names]
+            if missing:
+                raise ValueError(f'Step {step.name!r} depends on unknown steps: {missing}')
+        self.steps = steps
+        self.unconsumed: list[Any] = []
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        resolved: set[str] = set()
+        pending = list(self.steps)
+        while pending:
+            ready = [step for step in pending if all(dep in resolved for dep in step.depends_on)]
+            if not ready:
+                raise ValueError(f'Cycle in step graph: {[step.name for step in pending]}')
+            resolved.update(step.name for step in ready)
+            pending = [step for step in pending if step.name not in resolved]
+
+    async def _run_all(self, ctx: StepContext) -> None:
+        pending = {step.name: step for step in self.steps}
+        running: dict[asyncio.Task, str] = {}
+        try:
+            while pending or running:
+                if ctx.stopping:
+                    pending.clear()
+                for name, step in list(pending.items()):
+                    if all(dep in ctx.results for dep in step.depends_on):
+                        del pending[name]
+                        running[asyncio.create_task(step.run(ctx))] = name
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    ctx.results[name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+    async def stream(self) -> AsyncIterator[Any]:
+        """执行全部步骤，按产出顺序返回 ctx.emit() 的结果
+
+        调用方请求下一个结果时，上一个结果才算被取走（见 ctx.wait_consumed()）。
+        任一步骤抛出异常时取消其余步骤，并在已产出的结果之后抛出该异常。
+        调用方提前停止消费时不取消在途步骤（服务端可能已经发放了结果），只是不再启动新的步骤 / 请求，
+        等在途步骤完成后，把尚未被取走的结果放入 self.unconsumed。
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        ctx = StepContext({}, queue)
+        self.unconsumed = []
+        runner = asyncio.create_task(self._run_all(ctx))
+        runner.add_done_callback(lambda _: queue.put_nowait(_DONE))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                yield item
+                queue.task_done()
+            runner.result()
+        finally:
+            if not runner.done():
+                ctx.request_stop()
+                try:
+                    await asyncio.shield(runner)
+                except asyncio.CancelledError:
+                    if not runner.done():
+                        runner.cancel()
+                    raise
+                except BaseException:
+                    pass
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not _DONE:
+                    self.unconsumed.append(item)
+
+
+async def run_paced(
+    func: Callable[[int], Awaitable[Any]],
+    count: int,
+    max_in_flight: int = 1,
+    min_interval: float = 0,
+    stop: asyncio.Event | None = None,
+    ready: Callable[[], Awaitable[Any]] | None = None,
+) -> list[Any]:
+    """按节奏限制流水线执行 count 次 func(index)
+
+    同时最多 max_in_flight 个在途请求，相邻两次启动至少间隔 min_interval 秒，
+    每次启动前先等待 ready()（例如等待上一个结果被取走）；
+    stop 被设置（或任一次调用抛出异常）后不再启动新的调用，已在途的调用会等待完成。
+
+    Returns:
+        已启动调用的结果列表（按启动顺序）
+    """
+    stop = stop or asyncio.Event()
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    tasks: list[asyncio.Task] = []
+    last_start: float | None = None
+
+    def on_done(task: asyncio.Task) -> None:
+        semaphore.release()
+        if task.cancelled() or task.exception() is not None:
+            stop.set()
+
+    try:
+        for index in range(count):
+            await semaphore.acquire()
+            if stop.is_set():
+                semaphore.release()
+                break
+            if ready:
+                await ready()
+                if stop.is_set():
+                    semaphore.release()
+                    break
+            if last_start is not None and min_interval > 0:
+                delay = last_start + min_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if stop.is_set():
+                    semaphore.release()
+                    break
+            last_start = time.monotonic()
+            task = asyncio.create_task(func(index))
+            task.add_done_callback(on_done)
+            tasks.append(task)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
@@ -15,6 +15,26 @@ if TYPE_CHECKING:
     from utils.config import AccountConfig, ProviderConfig
 
 
+RATE_LIMIT_KEYWORDS = ("频繁", "过快", "too frequent", "too many requests", "rate limit")
+
+
+def is_rate_limit_message(message: str) -> bool:
+    """判断充值失败信息是否为频率限制"""
+    lowered = (message or "").lower()
+    return any(keyword in lowered for keyword in RATE_LIMIT_KEYWORDS)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After 头（仅支持秒数）"""
+    if not value:
+        return None
+    try:
+        seconds = float(value.strip())
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
 def topup(
     provider_config: "ProviderConfig",
     account_config: "AccountConfig",
@@ -22,6 +42,7 @@ def topup(
     cookies: dict,
     key: str,
     impersonate: str = "firefox135",
+    session: curl_requests.Session | None = None,
 ) -> dict:
     """执行充值请求
 
@@ -32,9 +53,11 @@ def topup(
         cookies: cookies 字典
         key: 充值密钥
         impersonate: curl_cffi 浏览器指纹模拟，默认为 "firefox135"
+        session: 复用的 curl_cffi Session（可选，批量充值时复用连接）；传入时由调用方负责关闭
 
     Returns:
-        包含 success 和 message 或 error 的字典
+        包含 success 和 message 或 error 的字典；被限频时额外包含 rate_limited 和 retry_after；
+        provider 明确拒绝该 key 时包含 terminal=True
     """
     account_name = account_config.get_display_name()
     # 代理优先级: 账号配置 > 全局配置
@@ -50,7 +73,9 @@ def topup(
             "error": "No topup URL configured",
         }
     
-    session = curl_requests.Session(impersonate=impersonate, proxy=http_proxy, timeout=30)
+    owns_session = session is None
+    if owns_session:
+        session = curl_requests.Session(impersonate=impersonate, proxy=http_proxy, timeout=30)
     try:
         # 设置 cookies
         session.cookies.update(cookies)
@@ -70,6 +95,16 @@ def topup(
             timeout=30,
         )
 
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            print(f"⚠️ {account_name}: Topup rate limited - HTTP 429 (retry after: {retry_after})")
+            return {
+                "success": False,
+                "error": f"Topup failed: HTTP 429(key: {key})",
+                "rate_limited": True,
+                "retry_after": retry_after,
+            }
+
         if response.status_code in [200, 400]:
             json_data = response_resolve(response, "topup", account_name)
             if json_data is None:
@@ -97,10 +132,21 @@ def topup(
                         "message": error_msg,
                         "already_used": True,
                     }
+                if is_rate_limit_message(error_msg):
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    print(f"⚠️ {account_name}: Topup rate limited - {error_msg}")
+                    return {
+                        "success": False,
+                        "error": f"Topup failed: {error_msg}(key: {key})",
+                        "rate_limited": True,
+                        "retry_after": retry_after,
+                    }
                 print(f"❌ {account_name}: Topup failed - {error_msg}")
+                # provider 明确拒绝了这个 key（例如无效 CDK），重试也不会成功
                 return {
                     "success": False,
                     "error": f"Topup failed: {error_msg}(key: {key})",
+                    "terminal": True,
                 }
         else:
             print(f"❌ {account_name}: Topup failed - HTTP {response.status_code}")
@@ -115,4 +161,5 @@ def topup(
             "error": f"Topup failed: {e}(key: {key})",
         }
     finally:
-        session.close()
\ No newline at end of file
+        if owns_session:
+            session.close()
\ No newline at end of file
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+CDK 获取与充值流水线
+
+get_cdk 生成器作为生产者，充值方按 provider 的节奏策略依次消费，
+获取下一个 CDK 与等待 / 执行当前充值可以重叠进行（生产者最多领先一次获取）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+TOPUP_PACING_FILE = 'topup_pacing.json'
+
+# 自适应节奏：初始间隔（秒，没有学习记录时使用）、上下限与调整系数
+ADAPTIVE_INITIAL_INTERVAL = 5
+ADAPTIVE_MIN_INTERVAL = 1
+ADAPTIVE_MAX_INTERVAL = 600
+ADAPTIVE_BACKOFF_FACTOR = 2
+ADAPTIVE_SPEEDUP_FACTOR = 0.8
+ADAPTIVE_SPEEDUP_AFTER = 3  # 连续成功多少次后尝试缩短间隔
+
+_DONE = object()
+
+
+class TopupPacer:
+    """按固定间隔控制充值节奏
+
+    间隔从上一次充值完成时开始计算，获取 CDK 花费的时间会计入间隔，
+    不再在每次充值前固定 sleep。
+    """
+
+    def __init__(self, interval: int | float):
+        self.interval = interval
+        self._last_topup_at: float | None = None
+
+    def delay(self) -> float:
+        """距离下一次允许充值还需等待的秒数"""
+        if self._last_topup_at is None or self.interval <= 0:
+            return 0
+        return max(0.0, self._last_topup_at + self.interval - time.monotonic())
+
+    async def wait(self, account_name: str) -> None:
+        """等待到允许下一次充值"""
+        delay = self.delay()
+        if delay > 0:
+            print(f'⏳ {account_name}: Waiting {delay:.0f} seconds before next topup...')
+            await asyncio.sleep(delay)
+
+    def mark(self, result: dict | None = None) -> None:
+        """记录一次充值完成"""
+        self._last_topup_at = time.monotonic()
+
+
+def load_topup_pacing(state_file: str) -> dict:
+    """加载各 provider 学习到的充值间隔
+
+    Returns:
+        {provider: {"interval": float, "rate_limited_interval": float | None, "updated_at": str}}
+    """
+    try:
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+    except Exception as e:
+        print(f'Warning: Failed to load topup pacing: {e}')
+    return {}
+
+
+def save_topup_pacing(state_file: str, data: dict) -> None:
+    """保存各 provider 学习到的充值间隔"""
+    try:
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f'Warning: Failed to save topup pacing: {e}')
+
+
+class AdaptiveTopupPacer(TopupPacer):
+    """根据 provider 响应自适应调整充值间隔
+
+    没有学习记录时从较短的 ADAPTIVE_INITIAL_INTERVAL 开始；遇到 429、"频繁"/too frequent 提示时退避，
+    退避上限为 provider 配置的 topup_interval（已知安全的固定间隔），只有 Retry-After 要求更久时才超过它；
+    连续成功后逐步缩短但不低于上次被限频的间隔。学习到的安全间隔按 provider 持久化，供下次运行使用。
+    """
+
+    def __init__(self, provider_name: str, state_file: str, max_interval: float = ADAPTIVE_MAX_INTERVAL):
+        """
+        Args:
+            provider_name: provider 名称（持久化的键）
+            state_file: 节奏状态文件
+            max_interval: 退避上限，通常为 ProviderConfig.topup_interval
+        """
+        self.provider_name = provider_name
+        self.state_file = state_file
+        self.max_interval = min(ADAPTIVE_MAX_INTERVAL, max(ADAPTIVE_MIN_INTERVAL, max_interval))
+        state = load_topup_pacing(state_file).get(provider_name) or {}
+        self.rate_limited_interval: float | None = state.get('rate_limited_interval')
+        super().__init__(self._clamp(state.get('interval', ADAPTIVE_INITIAL_INTERVAL)))
+        self._success_streak = 0
+
+    def _clamp(self, interval) -> float:
+        try:
+            interval = float(interval)
+        except (TypeError, ValueError):
+            interval = ADAPTIVE_INITIAL_INTERVAL
+        return min(self.max_interval, max(ADAPTIVE_MIN_INTERVAL, interval))
+
+    def mark(self, result: dict | None = None) -> None:
+        """记录一次充值结果并调整间隔"""
+        super().mark(result)
+        result = result or {}
+
+        if result.get('rate_limited'):
+            self._success_streak = 0
+            self.rate_limited_interval = self.interval
+            self.interval = self._clamp(self.interval * ADAPTIVE_BACKOFF_FACTOR)
+            retry_after = result.get('retry_after')
+            if isinstance(retry_after, (int, float)) and retry_after > self.interval:
+                # provider 明确要求的等待时间优先于配置的上限
+                self.interval = min(ADAPTIVE_MAX_INTERVAL, float(retry_after))
+            print(f'⚠️ {self.provider_name}: Topup rate limited, backing off to {self.interval:.0f}s interval')
+            self._save()
+            return
+
+        if not result.get('success'):
+            return
+
+        self._success_streak += 1
+        if self._success_streak >= ADAPTIVE_SPEEDUP_AFTER:
+            self._success_streak = 0
+            faster = self.interval * ADAPTIVE_SPEEDUP_FACTOR
+            if self.rate_limited_interval is not None:
+                # 不低于上次被限频时的间隔
+                faster = max(faster, self.rate_limited_interval + ADAPTIVE_MIN_INTERVAL)
+            self.interval = self._clamp(min(self.interval, faster))
+        self._save()
+
+    def _save(self) -> None:
+        data = load_topup_pacing(self.state_file)
+        data[self.provider_name] = {
+            'interval': round(self.interval, 2),
+            'rate_limited_interval': self.rate_limited_interval,
+            'updated_at': datetime.now().isoformat(),
+        }
+        save_topup_pacing(self.state_file, data)
+
+
+async def run_cdk_pipeline(
+    cdk_generator: Iterator | AsyncIterator,
+    handle: Callable[[bool, dict], Awaitable[bool]],
+    on_acquired: Callable[[bool, dict], None] | None = None,
+) -> list[tuple[bool, dict]]:
+    """运行 CDK 生产者 / 充值消费者流水线
+
+    生产者最多领先正在处理的结果一次获取：充值方取走第 N 个结果后才开始获取第 N+1 个，
+    第 N+1 个要等第 N 个处理完成后才会被取走，因此只重叠下一次获取的网络耗时。
+    充值失败停止时最多多获取一次（转盘 / 抽奖的每次获取都会消耗真实次数），
+    这些已获取但未处理的结果作为返回值交还调用方；在途的获取会等待完成，不会被取消。
+
+    Args:
+        cdk_generator: get_cdk 返回的同步或异步生成器，产出 (success, data)
+        handle: 处理单个 (success, data) 的协程，返回 False 时停止流水线
+        on_acquired: 生产者拿到每个结果后立即调用的回调（例如写入 CDK 账本）
+
+    Returns:
+        已获取但没有交给 handle 处理的结果
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    stop = asyncio.Event()
+    leftovers: list[tuple[bool, dict]] = []
+    is_async = inspect.isasyncgen(cdk_generator) or hasattr(cdk_generator, '__anext__')
+    iterator = None if is_async else iter(cdk_generator)
+
+    async def produce() -> None:
+        try:
+            while not stop.is_set():
+                if is_async:
+                    item = await anext(cdk_generator, _DONE)
+                else:
+                    # 同步生成器内部可能阻塞（HTTP 请求 / sleep），放到线程中执行
+                    item = await asyncio.to_thread(next, iterator, _DONE)
+                if item is _DONE:
+                    break
+                if on_acquired:
+                    on_acquired(*item)
+                if stop.is_set():
+                    leftovers.append(item)
+                    break
+                await queue.put(item)
+                # 等充值方取走这个结果后再获取下一个
+                await queue.join()
+        except Exception as e:
+            if not stop.is_set():
+                await queue.put(e)
+            raise
+        finally:
+            if not stop.is_set():
+                await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    producer_error: Exception | None = None
+    try:
+        while True:
+            item: Any = await queue.get()
+            queue.task_done()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                producer_error = item
+                break
+            success, data = item
+            if not await handle(success, data):
+                break
+    finally:
+        stop.set()
+        # 取出尚未处理的结果，释放等待 join 的生产者
+        while not queue.empty():
+            item = queue.get_nowait()
+            queue.task_done()
+            if item is not _DONE and not isinstance(item, Exception):
+                leftovers.append(item)
+        try:
+            await producer
+        except BaseException:
+            pass
+        if is_async and hasattr(cdk_generator, 'aclose'):
+            await cdk_generator.aclose()
+        elif not is_async and hasattr(cdk_generator, 'close'):
+            cdk_generator.close()
+
+    if producer_error is not None:
+        raise producer_error
+    return leftovers